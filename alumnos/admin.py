@@ -1,4 +1,5 @@
 from django.contrib import admin
+from .busqueda import filtrar_por_texto
 from .models import Alumno
 
 @admin.register(Alumno)
@@ -7,3 +8,9 @@ class AlumnoAdmin(admin.ModelAdmin):
     list_filter = ['fecha_creacion', 'usuario']
     search_fields = ['nombre', 'apellido', 'email']
     readonly_fields = ['fecha_creacion']
+
+    def get_search_results(self, request, queryset, search_term):
+        # Índice FTS5 en lugar de LIKE '%texto%' sobre cada columna
+        if not search_term:
+            return super().get_search_results(request, queryset, search_term)
+        return filtrar_por_texto(queryset, search_term), False
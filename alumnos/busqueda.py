@@ -0,0 +1,75 @@
+import re
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from .models import Alumno
+
+# Índice de texto completo (SQLite FTS5) sobre nombre, apellido, email y dirección.
+# Es una tabla "external content": guarda solo el índice y los triggers la mantienen
+# sincronizada con alumnos_alumno (también en bulk_create y update(), que no disparan señales).
+# La tabla y los triggers los crea la migración 0003 con su propia copia del SQL. En SQLite,
+# una migración que reconstruya alumnos_alumno (por ejemplo AlterField) elimina los triggers
+# junto con la tabla vieja y tiene que volver a crearlos; BusquedaTests lo verifica.
+TABLA_FTS = 'alumnos_alumno_fts'
+
+# Peso de cada columna en el ranking bm25 (nombre, apellido, email, dirección)
+PESOS_RANKING = '10.0, 10.0, 5.0, 1.0'
+
+_indice_disponible = None
+
+
+def indice_disponible():
+    """Indica si la base tiene el índice FTS5 (en otros motores se usa LIKE)"""
+    global _indice_disponible
+    if _indice_disponible is None:
+        _indice_disponible = connection.vendor == 'sqlite' and TABLA_FTS in connection.introspection.table_names()
+    return _indice_disponible
+
+
+def consulta_fts(texto):
+    """Convierte lo que escribe el usuario en una consulta FTS5 por prefijos
+
+    Cada palabra se busca como prefijo ("mar" encuentra "Martínez") y todas deben
+    aparecer. Las comillas evitan que el texto se interprete como sintaxis FTS5.
+    """
+    return ' '.join(f'"{termino}"*' for termino in re.findall(r'\w+', texto))
+
+
+def filtrar_por_texto(queryset, texto):
+    """Filtra un queryset de alumnos por texto usando el índice de texto completo"""
+    consulta = consulta_fts(texto)
+    if not consulta:
+        return queryset.none()
+
+    if indice_disponible():
+        return queryset.filter(pk__in=RawSQL(f'SELECT rowid FROM {TABLA_FTS} WHERE {TABLA_FTS} MATCH %s', [consulta]))
+
+    filtro = Q()
+    for termino in re.findall(r'\w+', texto):
+        filtro &= (
+            Q(nombre__icontains=termino) | Q(apellido__icontains=termino)
+            | Q(email__icontains=termino) | Q(direccion__icontains=termino)
+        )
+    return queryset.filter(filtro)
+
+
+def buscar_alumnos(usuario, texto, limite):
+    """Alumnos del usuario que coinciden con el texto, de más a menos relevante"""
+    consulta = consulta_fts(texto)
+    if not consulta:
+        return []
+
+    if not indice_disponible():
+        return list(filtrar_por_texto(Alumno.objects.filter(usuario=usuario), texto)[:limite])
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""SELECT a.id FROM {TABLA_FTS} JOIN alumnos_alumno a ON a.id = {TABLA_FTS}.rowid
+                WHERE {TABLA_FTS} MATCH %s AND a.usuario_id = %s
+                ORDER BY bm25({TABLA_FTS}, {PESOS_RANKING}) LIMIT %s""",
+            [consulta, usuario.pk, limite],
+        )
+        ids = [fila[0] for fila in cursor.fetchall()]
+
+    alumnos = Alumno.objects.in_bulk(ids)
+    return [alumnos[pk] for pk in ids if pk in alumnos]
@@ -23,3 +23,9 @@ class AlumnoForm(forms.ModelForm):
             'direccion': 'Dirección',
         }
 
+class ImportarAlumnosForm(forms.Form):
+    """Formulario para importar alumnos desde un archivo CSV"""
+    archivo = forms.FileField(
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,text/csv'}),
+        label='Archivo CSV',
+    )
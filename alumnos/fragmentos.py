@@ -0,0 +1,32 @@
+import hashlib
+import time
+from django.core.cache import cache
+
+# La tabla del dashboard se cachea ya renderizada, por usuario. En lugar de borrar
+# cada página cacheada cuando cambian los alumnos, la clave incluye una "versión" por
+# usuario que se renueva con cada cambio: las entradas viejas dejan de usarse y vencen solas.
+
+
+def _clave_version(usuario_id):
+    return f'alumnos:tabla:version:{usuario_id}'
+
+
+def version_tabla(usuario_id):
+    """Versión actual de la tabla del usuario"""
+    version = cache.get(_clave_version(usuario_id))
+    if version is None:
+        version = invalidar_tabla(usuario_id)
+    return version
+
+
+def invalidar_tabla(usuario_id):
+    """Renueva la versión del usuario para que se vuelva a renderizar su tabla"""
+    version = time.time_ns()
+    cache.set(_clave_version(usuario_id), version, None)
+    return version
+
+
+def clave_tabla(usuario_id, *parametros):
+    """Clave de caché de una página de la tabla (búsqueda, cursor, etc.)"""
+    parametros = hashlib.md5(repr(parametros).encode()).hexdigest()
+    return f'alumnos:tabla:{usuario_id}:{version_tabla(usuario_id)}:{parametros}'
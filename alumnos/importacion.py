@@ -0,0 +1,102 @@
+import csv
+import io
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from .forms import AlumnoForm
+from .fragmentos import invalidar_tabla
+from .models import Alumno
+
+COLUMNAS_OBLIGATORIAS = ['nombre', 'apellido', 'email']
+MAX_ERRORES_REPORTADOS = 1000
+
+
+class ErrorImportacion(Exception):
+    """El archivo completo no se puede importar (formato, codificación, columnas)"""
+
+
+def importar_csv(archivo, usuario, tamano_lote):
+    """Importa alumnos desde un CSV leyéndolo fila por fila
+
+    Cada fila se valida con las reglas de AlumnoForm; las válidas se insertan con
+    bulk_create en lotes de `tamano_lote` (sin PDF ni correo por alumno) y las inválidas
+    se informan con su número de fila. También se rechazan las filas cuyo email ya tiene
+    otro alumno del usuario o aparece antes en el archivo, así volver a subir la misma
+    lista no duplica los alumnos. Todo ocurre en una transacción: si el archivo resulta
+    ilegible a mitad de camino no queda nada importado.
+    Devuelve (cantidad de alumnos creados, filas leídas, lista de errores).
+    """
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    try:
+        muestra = texto.read(4096)
+        texto.seek(0)
+        try:
+            dialecto = csv.Sniffer().sniff(muestra, delimiters=',;\t')
+        except csv.Error:
+            dialecto = csv.excel
+
+        lector = csv.DictReader(texto, dialect=dialecto)
+        if not lector.fieldnames:
+            raise ErrorImportacion('El archivo está vacío.')
+        lector.fieldnames = [nombre.strip().lower() for nombre in lector.fieldnames]
+        faltantes = [columna for columna in COLUMNAS_OBLIGATORIAS if columna not in lector.fieldnames]
+        if faltantes:
+            raise ErrorImportacion(f'Faltan las columnas: {", ".join(faltantes)}.')
+
+        # Se validan las filas con los campos de AlumnoForm (mismas reglas que el alta
+        # manual), pero sin crear un form por fila: cada instancia copia todos sus campos
+        campos = AlumnoForm().fields
+        # email (en minúsculas) -> fila del archivo en que apareció (None si ya estaba en la base)
+        vistos = dict.fromkeys(
+            email.lower() for email in Alumno.objects.filter(usuario=usuario).values_list('email', flat=True)
+        )
+        creados = 0
+        filas = 0
+        errores = []
+        lote = []
+        with transaction.atomic():
+            for numero, fila in enumerate(lector, start=2):
+                filas += 1
+                datos = {}
+                errores_fila = []
+                for columna, campo in campos.items():
+                    try:
+                        datos[columna] = campo.clean((fila.get(columna) or '').strip())
+                    except ValidationError as e:
+                        errores_fila.append(f'{campo.label}: {" ".join(e.messages)}')
+
+                email = (datos.get('email') or '').lower()
+                if email and email in vistos:
+                    anterior = vistos[email]
+                    errores_fila.append(
+                        f'{campos["email"].label}: ya existe un alumno con este correo'
+                        if anterior is None else
+                        f'{campos["email"].label}: repetido (fila {anterior})'
+                    )
+
+                if errores_fila:
+                    if len(errores) < MAX_ERRORES_REPORTADOS:
+                        errores.append({'fila': numero, 'errores': '; '.join(errores_fila)})
+                    continue
+
+                vistos[email] = numero
+
+                lote.append(Alumno(usuario=usuario, **datos))
+                if len(lote) >= tamano_lote:
+                    Alumno.objects.bulk_create(lote)
+                    creados += len(lote)
+                    lote = []
+
+            if lote:
+                Alumno.objects.bulk_create(lote)
+                creados += len(lote)
+    except UnicodeDecodeError:
+        raise ErrorImportacion('El archivo debe estar codificado en UTF-8.')
+    except csv.Error as e:
+        raise ErrorImportacion(f'El archivo no es un CSV válido: {e}')
+    finally:
+        texto.detach()
+
+    # bulk_create no dispara post_save: se invalida a mano la tabla del dashboard
+    if creados:
+        invalidar_tabla(usuario.pk)
+    return creados, filas, errores
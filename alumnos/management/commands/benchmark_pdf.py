@@ -0,0 +1,66 @@
+import os
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from alumnos.pdf import cerrar_pool, renderizar_fichas
+
+
+class Command(BaseCommand):
+    help = ('Mide cuántas fichas PDF por segundo se renderizan con 1..N procesos, '
+            'de a un lote por llamada como en el envío masivo')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fichas', type=int, default=500,
+                            help='Cantidad de fichas a renderizar en cada medición (default: 500)')
+        parser.add_argument('--lote', type=int, default=settings.ALUMNOS_ENVIO_LOTE,
+                            help='Fichas por llamada, como los lotes de enviar_pdfs_alumnos '
+                                 '(default: ALUMNOS_ENVIO_LOTE)')
+        parser.add_argument('--max-procesos', type=int, default=os.cpu_count() or 1,
+                            help='Cantidad máxima de procesos a probar (default: núcleos disponibles)')
+        parser.add_argument('--minimo', type=int, default=settings.PDF_MINIMO_PARALELO,
+                            help='Lotes más chicos se renderizan sin el pool; 0 lo usa siempre '
+                                 '(default: PDF_MINIMO_PARALELO)')
+
+    def handle(self, *args, **options):
+        # Datos sintéticos: el benchmark no depende de la base de datos
+        lista_lineas = [
+            [
+                f"Nombre: Alumno{i} Apellido{i}",
+                f"Email: alumno{i}@ejemplo.com",
+                "Teléfono: +54 9 11 1234-5678",
+                "Fecha de Nacimiento: 2010-03-15",
+                f"Dirección: Calle Falsa {i}, Ciudad",
+                "Fecha de Registro: 01/03/2025 08:00",
+            ]
+            for i in range(options['fichas'])
+        ]
+        lote = max(1, options['lote'])
+        lotes = [lista_lineas[inicio:inicio + lote] for inicio in range(0, len(lista_lineas), lote)]
+
+        self.stdout.write(
+            f"Renderizando {options['fichas']} fichas en lotes de {lote} "
+            f"({os.cpu_count()} núcleos disponibles, mínimo para el pool: {options['minimo']})"
+        )
+        base = None
+        for procesos in range(1, options['max_procesos'] + 1):
+            # Cada medición arranca sin pool: el primer lote incluye crear los procesos
+            cerrar_pool()
+            duraciones = []
+            for fichas in lotes:
+                inicio = time.perf_counter()
+                renderizar_fichas(fichas, procesos=procesos, minimo=options['minimo'])
+                duraciones.append(time.perf_counter() - inicio)
+            duracion = sum(duraciones)
+
+            fichas_por_segundo = options['fichas'] / duracion
+            base = base or fichas_por_segundo
+            self.stdout.write(
+                f'{procesos:>3} proceso(s): {fichas_por_segundo:8.1f} fichas/s '
+                f'({duracion:.2f}s, x{fichas_por_segundo / base:.2f}; '
+                f'primer lote {duraciones[0] * 1000:.0f} ms, siguientes {_promedio(duraciones[1:]) * 1000:.0f} ms)'
+            )
+        cerrar_pool()
+
+
+def _promedio(valores):
+    return sum(valores) / len(valores) if valores else 0.0
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumnos', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='alumno',
+            options={'ordering': ['-fecha_creacion', '-id'], 'verbose_name': 'Alumno', 'verbose_name_plural': 'Alumnos'},
+        ),
+        migrations.AddIndex(
+            model_name='alumno',
+            index=models.Index(fields=['usuario', '-fecha_creacion', '-id'], name='alumno_usuario_fecha_idx'),
+        ),
+    ]
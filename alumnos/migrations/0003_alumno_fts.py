@@ -0,0 +1,60 @@
+from django.db import migrations
+
+# El SQL va copiado acá y no importado de alumnos.busqueda: una migración no debe cambiar
+# si después se modifica el código de la app
+TABLA_FTS = 'alumnos_alumno_fts'
+
+SQL_CREAR_INDICE = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA_FTS} USING fts5(
+        nombre, apellido, email, direccion,
+        content='alumnos_alumno', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_ai AFTER INSERT ON alumnos_alumno BEGIN
+        INSERT INTO {TABLA_FTS}(rowid, nombre, apellido, email, direccion)
+        VALUES (new.id, new.nombre, new.apellido, new.email, new.direccion);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_ad AFTER DELETE ON alumnos_alumno BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, nombre, apellido, email, direccion)
+        VALUES ('delete', old.id, old.nombre, old.apellido, old.email, old.direccion);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_au AFTER UPDATE ON alumnos_alumno BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, nombre, apellido, email, direccion)
+        VALUES ('delete', old.id, old.nombre, old.apellido, old.email, old.direccion);
+        INSERT INTO {TABLA_FTS}(rowid, nombre, apellido, email, direccion)
+        VALUES (new.id, new.nombre, new.apellido, new.email, new.direccion);
+    END""",
+    f"INSERT INTO {TABLA_FTS}({TABLA_FTS}) VALUES ('rebuild')",
+]
+
+SQL_ELIMINAR_INDICE = [
+    f"DROP TRIGGER IF EXISTS {TABLA_FTS}_ai",
+    f"DROP TRIGGER IF EXISTS {TABLA_FTS}_ad",
+    f"DROP TRIGGER IF EXISTS {TABLA_FTS}_au",
+    f"DROP TABLE IF EXISTS {TABLA_FTS}",
+]
+
+
+def crear(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in SQL_CREAR_INDICE:
+        schema_editor.execute(sql)
+
+
+def eliminar(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in SQL_ELIMINAR_INDICE:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumnos', '0002_alumno_usuario_fecha_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear, eliminar),
+    ]
@@ -15,7 +15,11 @@ class Alumno(models.Model):
     class Meta:
         verbose_name = 'Alumno'
         verbose_name_plural = 'Alumnos'
-        ordering = ['-fecha_creacion']
+        ordering = ['-fecha_creacion', '-id']
+        indexes = [
+            # Cubre el filtro por usuario y el orden del dashboard (paginación por cursor)
+            models.Index(fields=['usuario', '-fecha_creacion', '-id'], name='alumno_usuario_fecha_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nombre} {self.apellido}"
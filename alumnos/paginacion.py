@@ -0,0 +1,42 @@
+import base64
+from datetime import datetime
+from django.db.models import Q
+
+
+def codificar_cursor(alumno):
+    """Cursor opaco que apunta a la posición de un alumno en el orden del dashboard"""
+    valor = f'{alumno.fecha_creacion.isoformat()}|{alumno.pk}'
+    return base64.urlsafe_b64encode(valor.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Devuelve (fecha_creacion, id) o None si el cursor no es válido"""
+    try:
+        valor = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        fecha, pk = valor.rsplit('|', 1)
+        fecha, pk = datetime.fromisoformat(fecha), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    # codificar_cursor siempre escribe la zona horaria y un id que entra en un INTEGER de SQLite
+    if fecha.tzinfo is None or not 0 < pk < 2 ** 63:
+        return None
+    return fecha, pk
+
+
+def pagina_por_cursor(queryset, cursor, tamano):
+    """Paginación por cursor (keyset) sobre (fecha_creacion, id), de más nuevo a más viejo
+
+    A diferencia de OFFSET, cada página es una búsqueda por índice que cuesta lo mismo
+    sin importar cuántas filas hay antes, y no hace falta un COUNT(*).
+    Devuelve (filas, cursor de la página siguiente o None).
+    """
+    queryset = queryset.order_by('-fecha_creacion', '-id')
+    posicion = decodificar_cursor(cursor) if cursor else None
+    if posicion:
+        fecha, pk = posicion
+        queryset = queryset.filter(Q(fecha_creacion__lt=fecha) | Q(fecha_creacion=fecha, id__lt=pk))
+
+    # Se pide una fila de más para saber si existe una página siguiente
+    filas = list(queryset[:tamano + 1])
+    siguiente = codificar_cursor(filas[tamano - 1]) if len(filas) > tamano else None
+    return filas[:tamano], siguiente
@@ -0,0 +1,361 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from itertools import count
+from pathlib import Path
+from django.conf import settings
+
+# Diseño de la ficha (compartido por ReportLab y por la exportación en streaming).
+# ReportLab se importa recién al renderizar una ficha: los workers que no generan PDFs
+# no pagan su carga ni su memoria
+CARTA = (612.0, 792.0)  # puntos, igual a reportlab.lib.pagesizes.letter
+TITULO_FICHA = "Información del Alumno"
+MARGEN_IZQUIERDO = 100
+Y_TITULO = 100  # desde el borde superior
+Y_DATOS = 150  # desde el borde superior
+INTERLINEADO = 30
+
+# Cambiarla al modificar el diseño para que la caché no sirva fichas viejas
+VERSION_FICHA = 1
+
+
+def lineas_alumno(alumno):
+    """Devuelve las líneas de texto que se imprimen en la ficha del alumno"""
+    return [
+        f"Nombre: {alumno.nombre} {alumno.apellido}",
+        f"Email: {alumno.email}",
+        f"Teléfono: {alumno.telefono or 'No especificado'}",
+        f"Fecha de Nacimiento: {alumno.fecha_nacimiento or 'No especificada'}",
+        f"Dirección: {alumno.direccion or 'No especificada'}",
+        f"Fecha de Registro: {alumno.fecha_creacion.strftime('%d/%m/%Y %H:%M')}",
+    ]
+
+
+def dibujar_ficha(p, lineas):
+    """Dibuja la ficha de un alumno en la página actual del canvas"""
+    width, height = CARTA
+
+    # Título
+    p.setFont("Helvetica-Bold", 20)
+    p.drawString(MARGEN_IZQUIERDO, height - Y_TITULO, TITULO_FICHA)
+
+    # Datos del alumno
+    y = height - Y_DATOS
+    p.setFont("Helvetica", 12)
+    for dato in lineas:
+        p.drawString(MARGEN_IZQUIERDO, y, dato)
+        y -= INTERLINEADO
+
+    p.showPage()
+
+
+def renderizar_ficha(lineas):
+    """Renderiza con ReportLab la ficha a partir de sus líneas y devuelve los bytes del PDF"""
+    from reportlab.pdfgen import canvas
+
+    buffer = BytesIO()
+    p = canvas.Canvas(buffer, pagesize=CARTA)
+    dibujar_ficha(p, lineas)
+    p.save()
+
+    pdf_data = buffer.getvalue()
+    buffer.close()
+    return pdf_data
+
+
+def generar_pdf_alumno(alumno):
+    """Genera el PDF con la ficha del alumno y devuelve sus bytes"""
+    return renderizar_ficha(lineas_alumno(alumno))
+
+
+def renderizar_fichas(lista_lineas, procesos=None, minimo=None):
+    """Renderiza muchas fichas repartiéndolas entre varios procesos
+
+    ReportLab es Python puro y usa solo CPU, así que los hilos no ayudan: con
+    PDF_PROCESOS procesos el lote se reparte entre todos los núcleos. Los procesos se
+    crean una sola vez y se reutilizan en los lotes siguientes; con menos de
+    PDF_MINIMO_PARALELO fichas, o con un solo núcleo, repartir cuesta más de lo que
+    ahorra y se renderiza en este proceso. Devuelve los PDFs en el mismo orden que
+    `lista_lineas`.
+    """
+    lista_lineas = list(lista_lineas)
+    procesos = min(procesos or settings.PDF_PROCESOS, os.cpu_count() or 1, len(lista_lineas))
+    minimo = settings.PDF_MINIMO_PARALELO if minimo is None else minimo
+    if procesos <= 1 or len(lista_lineas) < minimo:
+        return [renderizar_ficha(lineas) for lineas in lista_lineas]
+
+    # Varios PDFs por envío entre procesos para amortizar el pickling
+    chunksize = max(1, len(lista_lineas) // (procesos * 4))
+    try:
+        return list(_pool(procesos).map(renderizar_ficha, lista_lineas, chunksize=chunksize))
+    except BrokenProcessPool:
+        # Un proceso murió (por ejemplo, por falta de memoria): se descarta el pool
+        cerrar_pool()
+        return [renderizar_ficha(lineas) for lineas in lista_lineas]
+
+
+_pool_actual = None
+_pool_clave = None
+_pool_lock = threading.Lock()
+
+
+def _inicializar_proceso():
+    # ReportLab se carga una vez por proceso del pool, no en cada lote
+    from reportlab.pdfgen import canvas  # noqa: F401
+
+
+def _pool(procesos):
+    """Pool de procesos compartido por todos los lotes de este proceso"""
+    global _pool_actual, _pool_clave
+    # El pid cambia si el proceso se bifurcó (gunicorn con preload_app): el pool del padre no sirve
+    clave = (os.getpid(), procesos)
+    with _pool_lock:
+        if _pool_clave != clave:
+            if _pool_actual is not None and _pool_clave[0] == os.getpid():
+                _pool_actual.shutdown(wait=False, cancel_futures=True)
+            _pool_actual = ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_proceso)
+            _pool_clave = clave
+        return _pool_actual
+
+
+def cerrar_pool():
+    """Termina los procesos de renderizado (se vuelven a crear en el próximo lote)"""
+    global _pool_actual, _pool_clave
+    with _pool_lock:
+        if _pool_actual is not None and _pool_clave[0] == os.getpid():
+            _pool_actual.shutdown(wait=True, cancel_futures=True)
+        _pool_actual = _pool_clave = None
+
+
+def generar_pdfs_lote(alumnos, procesos=None):
+    """Genera las fichas PDF de un lote de alumnos en paralelo"""
+    return renderizar_fichas((lineas_alumno(alumno) for alumno in alumnos), procesos)
+
+
+# ============================================
+# CACHÉ EN DISCO DE FICHAS
+# ============================================
+# Cada ficha se guarda en PDF_CACHE_DIR/<id alumno>/<hash de las líneas>.pdf: si los
+# datos cambian cambia el hash, y al editar o eliminar el alumno se borra su carpeta.
+_escrituras = count(1)
+
+
+def clave_ficha(lineas):
+    """Hash del contenido que se imprime en la ficha"""
+    digest = hashlib.sha256(f'v{VERSION_FICHA}'.encode())
+    for linea in lineas:
+        digest.update(b'\0' + linea.encode())
+    return digest.hexdigest()
+
+
+def obtener_pdf_alumno(alumno):
+    """Devuelve la ficha PDF desde la caché en disco, generándola solo si no está"""
+    lineas = lineas_alumno(alumno)
+    ruta = Path(settings.PDF_CACHE_DIR) / str(alumno.pk) / f'{clave_ficha(lineas)}.pdf'
+    try:
+        pdf_data = ruta.read_bytes()
+    except FileNotFoundError:
+        pdf_data = renderizar_ficha(lineas)
+        _guardar_en_cache(ruta, pdf_data)
+    else:
+        # La fecha de modificación es la marca de último uso para el LRU
+        try:
+            os.utime(ruta)
+        except OSError:
+            pass
+    return pdf_data
+
+
+def obtener_pdfs_lote(alumnos, procesos=None):
+    """Como obtener_pdf_alumno para un lote: las fichas que faltan se renderizan en paralelo"""
+    directorio = Path(settings.PDF_CACHE_DIR)
+    pdfs = []
+    faltantes = []
+    for alumno in alumnos:
+        lineas = lineas_alumno(alumno)
+        ruta = directorio / str(alumno.pk) / f'{clave_ficha(lineas)}.pdf'
+        try:
+            pdfs.append(ruta.read_bytes())
+        except OSError:
+            pdfs.append(None)
+            faltantes.append((len(pdfs) - 1, ruta, lineas))
+            continue
+        try:
+            os.utime(ruta)
+        except OSError:
+            pass
+
+    if faltantes:
+        generados = renderizar_fichas((lineas for _, _, lineas in faltantes), procesos)
+        for (posicion, ruta, _), pdf_data in zip(faltantes, generados):
+            pdfs[posicion] = pdf_data
+            _guardar_en_cache(ruta, pdf_data)
+    return pdfs
+
+
+def _guardar_en_cache(ruta, pdf_data):
+    try:
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        # Escritura atómica: otro proceso nunca lee un PDF a medio escribir
+        descriptor, temporal = tempfile.mkstemp(dir=ruta.parent, suffix='.tmp')
+        with os.fdopen(descriptor, 'wb') as archivo:
+            archivo.write(pdf_data)
+        os.replace(temporal, ruta)
+    except OSError:
+        # Sin caché se sigue funcionando, solo que se renderiza cada vez
+        return
+
+    # Recorrer el directorio es caro: se controla el tamaño cada tantas escrituras
+    if next(_escrituras) % settings.PDF_CACHE_CONTROL_CADA == 0:
+        recortar_cache_pdf()
+
+
+def invalidar_pdf_alumno(alumno_id):
+    """Elimina de la caché las fichas del alumno"""
+    shutil.rmtree(Path(settings.PDF_CACHE_DIR) / str(alumno_id), ignore_errors=True)
+
+
+def recortar_cache_pdf():
+    """Elimina las fichas usadas hace más tiempo hasta quedar bajo PDF_CACHE_MAX_BYTES"""
+    directorio = Path(settings.PDF_CACHE_DIR)
+    archivos = []
+    total = 0
+    for carpeta in os.scandir(directorio) if directorio.is_dir() else []:
+        if not carpeta.is_dir():
+            continue
+        for entrada in os.scandir(carpeta.path):
+            try:
+                info = entrada.stat()
+            except FileNotFoundError:
+                continue
+            archivos.append((info.st_mtime, info.st_size, entrada.path))
+            total += info.st_size
+
+    if total <= settings.PDF_CACHE_MAX_BYTES:
+        return 0
+
+    # Se baja al 90% del límite para no recortar en cada escritura
+    objetivo = settings.PDF_CACHE_MAX_BYTES * 0.9
+    eliminados = 0
+    for _, tamano, ruta in sorted(archivos):
+        if total <= objetivo:
+            break
+        try:
+            os.remove(ruta)
+        except FileNotFoundError:
+            continue
+        total -= tamano
+        eliminados += 1
+        try:
+            os.rmdir(os.path.dirname(ruta))
+        except OSError:
+            pass  # la carpeta todavía tiene otras fichas
+    return eliminados
+
+
+def nombre_archivo_pdf(alumno):
+    """Nombre del adjunto PDF del alumno"""
+    return f'alumno_{alumno.id}_{alumno.nombre}_{alumno.apellido}.pdf'
+
+
+def _texto_pdf(texto):
+    """Codifica un string como literal PDF con las fuentes estándar (WinAnsi)"""
+    datos = texto.encode('cp1252', 'replace')
+    return b'(' + datos.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def pdf_fichas_en_streaming(alumnos):
+    """Genera un único PDF (una página por alumno) emitiendo los bytes a medida que avanza
+
+    ReportLab arma el documento completo en memoria antes de escribirlo, así que para
+    exportar cursos enteros se escribe el PDF directamente: cada página se emite apenas
+    se dibuja y solo se conservan los offsets de la tabla de referencias cruzadas.
+    """
+    width, height = CARTA
+    offsets = {}
+    paginas = []
+    posicion = 0
+
+    def objeto(numero, contenido):
+        nonlocal posicion
+        offsets[numero] = posicion
+        datos = b'%d 0 obj\n' % numero + contenido + b'\nendobj\n'
+        posicion += len(datos)
+        return datos
+
+    cabecera = b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n'
+    posicion += len(cabecera)
+    yield cabecera + b''.join([
+        objeto(1, b'<< /Type /Catalog /Pages 2 0 R >>'),
+        objeto(3, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>'),
+        objeto(4, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>'),
+    ])
+
+    siguiente = 5
+    for alumno in alumnos:
+        # Mismo diseño que dibujar_ficha
+        operaciones = [b'BT /F2 20 Tf %d %d Td %s Tj ET' % (MARGEN_IZQUIERDO, height - Y_TITULO, _texto_pdf(TITULO_FICHA))]
+        y = height - Y_DATOS
+        for dato in lineas_alumno(alumno):
+            operaciones.append(b'BT /F1 12 Tf %d %d Td %s Tj ET' % (MARGEN_IZQUIERDO, y, _texto_pdf(dato)))
+            y -= INTERLINEADO
+        contenido = zlib.compress(b'\n'.join(operaciones))
+
+        numero_contenido, numero_pagina = siguiente, siguiente + 1
+        siguiente += 2
+        paginas.append(numero_pagina)
+        yield objeto(numero_contenido, b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(contenido) + contenido + b'\nendstream') + objeto(
+            numero_pagina,
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>'
+            % (width, height, numero_contenido),
+        )
+
+    hijos = b' '.join(b'%d 0 R' % numero for numero in paginas)
+    final = objeto(2, b'<< /Type /Pages /Kids [%s] /Count %d >>' % (hijos, len(paginas)))
+
+    inicio_xref = posicion
+    final += b'xref\n0 %d\n0000000000 65535 f \n' % siguiente
+    final += b''.join(b'%010d 00000 n \n' % offsets[numero] for numero in range(1, siguiente))
+    final += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (siguiente, inicio_xref)
+    yield final
+
+
+class _SalidaEnStreaming:
+    """Archivo de solo escritura que acumula lo escrito hasta que se lo vacía"""
+
+    def __init__(self):
+        self._partes = []
+        self._posicion = 0
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        self._posicion += len(datos)
+        return len(datos)
+
+    def tell(self):
+        return self._posicion
+
+    def flush(self):
+        pass
+
+    def vaciar(self):
+        datos = b''.join(self._partes)
+        self._partes = []
+        return datos
+
+
+def zip_fichas_en_streaming(alumnos):
+    """Genera un ZIP con un PDF por alumno emitiendo cada archivo apenas se comprime"""
+    salida = _SalidaEnStreaming()
+    with zipfile.ZipFile(salida, 'w', compression=zipfile.ZIP_DEFLATED) as archivo_zip:
+        for alumno in alumnos:
+            archivo_zip.writestr(nombre_archivo_pdf(alumno), generar_pdf_alumno(alumno))
+            yield salida.vaciar()
+    yield salida.vaciar()
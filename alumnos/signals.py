@@ -0,0 +1,19 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .fragmentos import invalidar_tabla
+from .models import Alumno
+from .pdf import invalidar_pdf_alumno
+
+
+@receiver(post_save, sender=Alumno)
+@receiver(post_delete, sender=Alumno)
+def invalidar_cache_alumno(sender, instance, **kwargs):
+    """Descarta las fichas PDF cacheadas cuando el alumno se edita o se elimina"""
+    invalidar_pdf_alumno(instance.pk)
+
+
+@receiver(post_save, sender=Alumno)
+@receiver(post_delete, sender=Alumno)
+def invalidar_tabla_usuario(sender, instance, **kwargs):
+    """Fuerza a renderizar de nuevo la tabla del dashboard del docente"""
+    invalidar_tabla(instance.usuario_id)
@@ -0,0 +1,116 @@
+from itertools import islice
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.mail import EmailMessage, get_connection
+from tareas.cola import latido
+from .models import Alumno
+from .pdf import obtener_pdf_alumno, obtener_pdfs_lote, nombre_archivo_pdf
+
+
+def correo_pdf_alumno(alumno, usuario, pdf_data, nuevo=False):
+    """Arma el correo con la ficha PDF del alumno para el ADMIN/DOCENTE"""
+    if nuevo:
+        cuerpo = (
+            f'Hola {usuario.username},\n\n'
+            f'Se ha registrado un nuevo alumno: {alumno.nombre} {alumno.apellido}.\n'
+            f'Adjunto encontrarás la información completa del alumno.\n\n'
+            'Saludos,\nSistema Educativo'
+        )
+    else:
+        cuerpo = (
+            f'Hola {usuario.username},\n\n'
+            f'Adjunto encontrarás la información del alumno {alumno.nombre} {alumno.apellido}.\n\n'
+            'Saludos,\nSistema Educativo'
+        )
+
+    from_email = settings.DEFAULT_FROM_EMAIL if settings.DEFAULT_FROM_EMAIL else settings.EMAIL_HOST_USER
+    email = EmailMessage(
+        f'Información del Alumno: {alumno.nombre} {alumno.apellido}',
+        cuerpo,
+        from_email,
+        [usuario.email],  # Se envía al correo del ADMIN/DOCENTE
+    )
+    email.attach(nombre_archivo_pdf(alumno), pdf_data, 'application/pdf')
+    return email
+
+
+def enviar_pdf_alumno(alumno_id, usuario_id, nuevo=False):
+    """Tarea: genera la ficha PDF del alumno y la envía por correo al docente"""
+    alumno = Alumno.objects.filter(pk=alumno_id, usuario_id=usuario_id).first()
+    if alumno is None:
+        # El alumno se eliminó antes de que el worker llegara a la tarea
+        return {'enviado': False, 'detalle': 'El alumno ya no existe'}
+
+    usuario = User.objects.get(pk=usuario_id)
+    if not usuario.email:
+        return {'enviado': False, 'detalle': 'El usuario no tiene correo registrado'}
+
+    correo_pdf_alumno(alumno, usuario, obtener_pdf_alumno(alumno), nuevo=nuevo).send()
+    return {'enviado': True, 'destinatario': usuario.email}
+
+
+def _en_lotes(iterable, tamano):
+    iterador = iter(iterable)
+    while lote := list(islice(iterador, tamano)):
+        yield lote
+
+
+def enviar_pdfs_alumnos(usuario_id, alumno_ids=None):
+    """Tarea: envía las fichas PDF de varios alumnos reutilizando la conexión SMTP
+
+    Se abre una sola conexión por lote de ALUMNOS_ENVIO_LOTE correos. Los errores
+    se registran por alumno y no cortan el envío del resto (tampoco se reintenta la
+    tarea completa, para no duplicar los correos ya enviados).
+    """
+    usuario = User.objects.get(pk=usuario_id)
+    if not usuario.email:
+        return {'enviados': 0, 'fallidos': 0, 'detalle': [], 'error': 'El usuario no tiene correo registrado'}
+
+    alumnos = Alumno.objects.filter(usuario=usuario)
+    if alumno_ids is not None:
+        alumnos = alumnos.filter(pk__in=alumno_ids)
+
+    detalle = []
+    conexion = get_connection()
+    for lote in _en_lotes(alumnos.iterator(chunk_size=settings.ALUMNOS_ENVIO_LOTE), settings.ALUMNOS_ENVIO_LOTE):
+        # Un envío de todo el curso dura más que TAREAS_TIEMPO_MAXIMO: sin el latido otro
+        # worker lo daría por abandonado y volvería a enviar los correos
+        latido()
+        # Las fichas del lote se renderizan en paralelo antes de abrir la conexión
+        pdfs = obtener_pdfs_lote(lote)
+        try:
+            conexion.open()
+        except Exception as e:
+            # Sin conexión no se puede enviar ningún correo del lote
+            detalle.extend(
+                {'alumno_id': alumno.pk, 'alumno': str(alumno), 'enviado': False, 'error': str(e)}
+                for alumno in lote
+            )
+            continue
+
+        try:
+            for alumno, pdf_data in zip(lote, pdfs):
+                latido()
+                try:
+                    email = correo_pdf_alumno(alumno, usuario, pdf_data)
+                    email.connection = conexion
+                    email.send()
+                    detalle.append({'alumno_id': alumno.pk, 'alumno': str(alumno), 'enviado': True, 'error': ''})
+                except Exception as e:
+                    detalle.append({'alumno_id': alumno.pk, 'alumno': str(alumno), 'enviado': False, 'error': str(e)})
+                    # La sesión SMTP puede quedar inutilizable después de un error
+                    try:
+                        conexion.close()
+                        conexion.open()
+                    except Exception:
+                        pass
+        finally:
+            conexion.close()
+
+    enviados = sum(1 for d in detalle if d['enviado'])
+    return {
+        'destinatario': usuario.email,
+        'enviados': enviados,
+        'fallidos': len(detalle) - enviados,
+        'detalle': detalle,
+    }
@@ -1,3 +1,813 @@
-from django.test import TestCase
+import base64
+import csv
+import os
+import random
+import re
+import tempfile
+import time
+import zlib
+import warnings
+from datetime import date, timedelta
+from io import BytesIO, StringIO
+from pathlib import Path
+from smtplib import SMTPRecipientsRefused
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends import locmem
+from django.db import connection
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from pruebas.presupuestos import PresupuestoMixin
+from sistema_educativo.bench import datos_alumno, sembrar
+from tareas.cola import encolar, ejecutar, latido, reclamar
+from tareas.models import Tarea
+from usuarios.backends import CachedModelBackend
+from .busqueda import TABLA_FTS, buscar_alumnos, filtrar_por_texto, indice_disponible
+from .fragmentos import clave_tabla, invalidar_tabla, version_tabla
+from .importacion import ErrorImportacion, importar_csv
+from .models import Alumno
+from .paginacion import codificar_cursor, decodificar_cursor, pagina_por_cursor
+from .tareas import enviar_pdfs_alumnos
+from . import pdf
 
-# Create your tests here.
+CACHE_LOCAL = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(
+    CACHES=CACHE_LOCAL,
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    TAREAS_EN_LINEA=False,
+    ALUMNOS_POR_PAGINA=50,
+    ALUMNOS_EXPORTACION_LOTE=100,
+)
+class PresupuestoAlumnosTests(PresupuestoMixin, TestCase):
+    """Consultas, tamaño y tiempo máximos de cada URL de alumnos/urls.py sobre datos sembrados"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.docente, cls.docente_chico = sembrar(2, 0)
+        Alumno.objects.bulk_create(
+            Alumno(usuario=cls.docente, **datos_alumno(random.Random(0), i)) for i in range(300)
+        )
+        Alumno.objects.bulk_create(
+            Alumno(usuario=cls.docente_chico, **datos_alumno(random.Random(1), i)) for i in range(5)
+        )
+        cls.alumno = Alumno.objects.filter(usuario=cls.docente).first()
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.docente)
+        # Usuario ya cacheado, como en una petición caliente: solo se cuentan las consultas de la vista
+        CachedModelBackend().get_user(self.docente.pk)
+
+    def _dashboard(self, docente, **parametros):
+        """Dashboard sin la tabla cacheada, para medir las consultas que la arman"""
+        invalidar_tabla(docente.pk)
+        return self.client.get(reverse('dashboard'), parametros)
+
+    def test_dashboard_constante_con_la_cantidad_de_alumnos(self):
+        self.assertPresupuesto(lambda: self._dashboard(self.docente), consultas=1, kb=80, ms=300, calentar=True)
+
+        # Otro docente con 5 alumnos: mismas consultas (un N+1 en la tabla rompería esta igualdad)
+        self.client.force_login(self.docente_chico)
+        CachedModelBackend().get_user(self.docente_chico.pk)
+        self.assertPresupuesto(lambda: self._dashboard(self.docente_chico), consultas=1, kb=20, ms=300)
+
+    def test_dashboard_cacheado_sin_consultas(self):
+        url = reverse('dashboard')
+        self.assertPresupuesto(lambda: self.client.get(url), consultas=0, kb=80, ms=100, calentar=True)
+
+    def test_dashboard_siguiente_pagina_y_busqueda(self):
+        cursor = codificar_cursor(Alumno.objects.filter(usuario=self.docente)[49])
+        response, _ = self.assertPresupuesto(lambda: self._dashboard(self.docente, cursor=cursor),
+                                             consultas=1, kb=80, ms=300, calentar=True)
+        self.assertEqual(len(response.context['alumnos']), 50)
+        self.assertPresupuesto(lambda: self._dashboard(self.docente, q='Ana Pér'),
+                               consultas=1, kb=40, ms=300, calentar=True)
+
+    def test_crear_alumno(self):
+        self.assertPresupuesto(lambda: self.client.get(reverse('crear_alumno')),
+                               consultas=0, kb=30, ms=200, calentar=True)
+        response, _ = self.assertPresupuesto(
+            lambda: self.client.post(reverse('crear_alumno'), datos_alumno(random.Random(2), 'nuevo')),
+            consultas=2, ms=200,
+        )
+        self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
+
+    def test_importar_alumnos(self):
+        self.assertPresupuesto(lambda: self.client.get(reverse('importar_alumnos')),
+                               consultas=0, kb=30, ms=200, calentar=True)
+        filas = '\n'.join(f'Alumno{i},Importado,alumno{i}@ejemplo.com' for i in range(1000))
+        archivo = SimpleUploadedFile('alumnos.csv', f'nombre,apellido,email\n{filas}\n'.encode(), 'text/csv')
+        # Los emails ya cargados (1 consulta) e INSERT por lotes (SQLite admite 999 parámetros por
+        # sentencia: ~124 alumnos), no uno por alumno
+        self.assertPresupuesto(lambda: self.client.post(reverse('importar_alumnos'), {'archivo': archivo}),
+                               consultas=13, kb=40, ms=1500)
+
+    def test_editar_y_eliminar_alumno(self):
+        editar = reverse('editar_alumno', args=[self.alumno.pk])
+        eliminar = reverse('eliminar_alumno', args=[self.alumno.pk])
+        self.assertPresupuesto(lambda: self.client.get(editar), consultas=1, kb=30, ms=200, calentar=True)
+        datos = datos_alumno(random.Random(3), 'editado')
+        self.assertPresupuesto(lambda: self.client.post(editar, datos), consultas=2, ms=200)
+        self.assertPresupuesto(lambda: self.client.get(eliminar), consultas=1, kb=30, ms=200, calentar=True)
+        self.assertPresupuesto(lambda: self.client.post(eliminar), consultas=2, ms=200)
+
+    def test_enviar_pdfs(self):
+        self.assertPresupuesto(lambda: self.client.get(reverse('enviar_pdf_alumno', args=[self.alumno.pk])),
+                               consultas=2, ms=200)
+        self.assertPresupuesto(lambda: self.client.post(reverse('enviar_pdfs_masivo'), {'accion': 'todos'}),
+                               consultas=2, ms=200)
+        seleccion = list(Alumno.objects.filter(usuario=self.docente).values_list('pk', flat=True)[:100])
+        self.assertPresupuesto(lambda: self.client.post(reverse('enviar_pdfs_masivo'), {'alumnos': seleccion}),
+                               consultas=2, ms=200)
+
+    def test_exportar(self):
+        # 300 alumnos: las consultas crecen por lotes (iterator/chunk_size), no por alumno
+        self.assertPresupuesto(lambda: self.client.get(reverse('exportar_alumnos_csv')),
+                               consultas=1, kb=40, ms=300)
+        self.assertPresupuesto(lambda: self.client.get(reverse('exportar_pdfs')),
+                               consultas=1, kb=400, ms=1000)
+        self.assertPresupuesto(lambda: self.client.get(reverse('exportar_pdfs'), {'formato': 'zip'}),
+                               consultas=1, kb=800, ms=2000)
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class PaginacionTests(TestCase):
+    """Paginación por cursor del dashboard sobre (fecha_creacion, id)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.docente, = sembrar(1, 0)
+        Alumno.objects.bulk_create(
+            Alumno(usuario=cls.docente, **datos_alumno(random.Random(4), i)) for i in range(23)
+        )
+        # Grupos de alumnos creados en el mismo instante: solo el id los desempata
+        ahora = timezone.now()
+        for indice, pk in enumerate(Alumno.objects.order_by('pk').values_list('pk', flat=True)):
+            Alumno.objects.filter(pk=pk).update(fecha_creacion=ahora - timedelta(seconds=indice // 5))
+
+    def test_recorre_todas_las_paginas_con_empates(self):
+        esperados = list(Alumno.objects.order_by('-fecha_creacion', '-id').values_list('pk', flat=True))
+        for tamano in (1, 4, 5, 7, 23, 30):
+            with self.subTest(tamano=tamano):
+                vistos = []
+                cursor = None
+                while True:
+                    filas, cursor = pagina_por_cursor(Alumno.objects.all(), cursor, tamano)
+                    self.assertLessEqual(len(filas), tamano)
+                    vistos += [alumno.pk for alumno in filas]
+                    if cursor is None:
+                        break
+                # Sin repetidos ni saltos, y la última página no deja un cursor hacia una vacía
+                self.assertEqual(vistos, esperados)
+                self.assertTrue(filas)
+
+    @override_settings(ALUMNOS_POR_PAGINA=5)
+    def test_cursor_alterado_vuelve_a_la_primera_pagina(self):
+        def b64(texto):
+            return base64.urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+        primera, _ = pagina_por_cursor(Alumno.objects.all(), None, 5)
+        fecha = timezone.now().isoformat()
+        cache.clear()
+        alterados = [
+            '!!!', 'ñ', b64('basura'), b64(f'{fecha}|abc'), b64(f'{fecha}|-3'), b64(f'{fecha}|{"9" * 30}'),
+            b64('2024-01-01T00:00:00|5'),  # sin zona horaria
+            base64.urlsafe_b64encode(b'\xff\xfe|1').decode(),
+        ]
+        self.client.force_login(self.docente)
+        for cursor in alterados:
+            with self.subTest(cursor=cursor):
+                self.assertIsNone(decodificar_cursor(cursor))
+                filas, _ = pagina_por_cursor(Alumno.objects.all(), cursor, 5)
+                self.assertEqual(filas, primera)
+                response = self.client.get(reverse('dashboard'), {'cursor': cursor})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(list(response.context['alumnos']), primera)
+
+
+class CorreoConFallas(locmem.EmailBackend):
+    """Backend de prueba: rechaza los correos de los alumnos de apellido "Rechazado" y
+    registra qué conexión envió cada correo y cuántas veces se abrió y cerró"""
+    registro = []
+
+    def open(self):
+        self.registro.append(('open', id(self)))
+        return True
+
+    def close(self):
+        self.registro.append(('close', id(self)))
+
+    def send_messages(self, messages):
+        for mensaje in messages:
+            if 'Rechazado' in mensaje.subject:
+                raise SMTPRecipientsRefused({mensaje.to[0]: (550, b'Mailbox unavailable')})
+            self.registro.append(('send', id(self)))
+        return super().send_messages(messages)
+
+
+@override_settings(
+    EMAIL_BACKEND='alumnos.tests.CorreoConFallas',
+    ALUMNOS_ENVIO_LOTE=2,
+    TAREAS_EN_LINEA=False,
+    TAREAS_LATIDO=0,
+)
+class EnvioMasivoTests(TestCase):
+    """enviar_pdfs_alumnos: una conexión SMTP por lote, detalle por alumno y un error no corta el envío"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.docente = User.objects.create_user(username='docente', email='docente@ejemplo.com', password='x')
+        cls.alumnos = [
+            Alumno.objects.create(usuario=cls.docente, nombre=f'Alumno{i}', apellido=apellido,
+                                  email=f'alumno{i}@ejemplo.com')
+            for i, apellido in enumerate(['Uno', 'Dos', 'Tres', 'Rechazado'])
+        ]
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.enterContext(override_settings(PDF_CACHE_DIR=directorio.name))
+        CorreoConFallas.registro = []
+
+    def _ejecutar_en_tarea(self):
+        """Corre el envío como lo haría el worker y anota fecha_actualizacion en cada latido"""
+        tarea = encolar('alumnos.tareas.enviar_pdfs_alumnos', 'Envío', usuario_id=self.docente.pk)
+        self.assertTrue(reclamar(tarea.pk))
+        antes = timezone.now() - timedelta(minutes=5)
+        Tarea.objects.filter(pk=tarea.pk).update(fecha_actualizacion=antes)
+
+        latidos = []
+
+        def latido_registrado():
+            latido()
+            latidos.append(Tarea.objects.values_list('fecha_actualizacion', flat=True).get(pk=tarea.pk))
+
+        with mock.patch('alumnos.tareas.latido', latido_registrado):
+            tarea = ejecutar(Tarea.objects.get(pk=tarea.pk))
+        return tarea, antes, latidos
+
+    def test_detalle_por_alumno_y_el_resto_se_envia(self):
+        tarea, antes, latidos = self._ejecutar_en_tarea()
+        self.assertEqual(tarea.estado, Tarea.COMPLETADA)
+        resultado = tarea.resultado
+        self.assertEqual(resultado['enviados'], 3)
+        self.assertEqual(resultado['fallidos'], 1)
+        self.assertEqual(resultado['destinatario'], 'docente@ejemplo.com')
+
+        detalle = {d['alumno_id']: d for d in resultado['detalle']}
+        self.assertEqual(set(detalle), {alumno.pk for alumno in self.alumnos})
+        rechazado = detalle[self.alumnos[3].pk]
+        self.assertFalse(rechazado['enviado'])
+        self.assertIn('550', rechazado['error'])
+        for alumno in self.alumnos[:3]:
+            self.assertEqual(detalle[alumno.pk], {'alumno_id': alumno.pk, 'alumno': str(alumno),
+                                                  'enviado': True, 'error': ''})
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertTrue(all(m.attachments[0][2] == 'application/pdf' for m in mail.outbox))
+
+        # Un latido por lote y uno por correo, y cada uno renovó la tarea
+        self.assertEqual(len(latidos), 2 + 4)
+        self.assertTrue(all(momento > antes for momento in latidos))
+        self.assertEqual(latidos, sorted(latidos))
+
+    def test_una_conexion_por_lote_y_se_reabre_tras_un_error(self):
+        self._ejecutar_en_tarea()
+        registro = CorreoConFallas.registro
+        # Todos los correos salen por la misma conexión (get_connection una sola vez)
+        self.assertEqual(len({conexion for _, conexion in registro}), 1)
+        eventos = [evento for evento, _ in registro]
+        # Dos lotes de 2: se abre una vez por lote y, tras el rechazo, se cierra y se vuelve a abrir
+        self.assertEqual(eventos.count('open'), 2 + 1)
+        self.assertEqual(eventos.count('close'), 2 + 1)
+        self.assertEqual(eventos.count('send'), 3)
+        # Ningún correo se envía con la conexión cerrada
+        abierta = False
+        for evento in eventos:
+            if evento == 'send':
+                self.assertTrue(abierta)
+            abierta = {'open': True, 'close': False}.get(evento, abierta)
+
+    def test_usuario_sin_correo(self):
+        sin_correo = User.objects.create_user(username='sin_correo', password='x')
+        resultado = enviar_pdfs_alumnos(sin_correo.pk)
+        self.assertEqual(resultado['enviados'], 0)
+        self.assertIn('error', resultado)
+        self.assertEqual(CorreoConFallas.registro, [])
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class ImportacionTests(TestCase):
+    """importar_csv: informe por fila, duplicados, separador, codificación y transacción única"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.docente = User.objects.create_user(username='docente', password='x')
+        cls.otro = User.objects.create_user(username='otro', password='x')
+        Alumno.objects.create(usuario=cls.docente, nombre='Ya', apellido='Cargado', email='cargado@ejemplo.com')
+        # El mismo email con otro docente no cuenta como duplicado
+        Alumno.objects.create(usuario=cls.otro, nombre='De', apellido='Otro', email='otro@ejemplo.com')
+
+    def _importar(self, contenido, tamano_lote=100):
+        if isinstance(contenido, str):
+            contenido = contenido.encode()
+        return importar_csv(BytesIO(contenido), self.docente, tamano_lote)
+
+    def _importados(self):
+        return list(Alumno.objects.filter(usuario=self.docente).exclude(apellido='Cargado')
+                    .order_by('pk').values_list('nombre', flat=True))
+
+    def test_informe_por_fila(self):
+        creados, filas, errores = self._importar(
+            'nombre,apellido,email,fecha_nacimiento\n'
+            'Ana,Pérez,ana@ejemplo.com,2010-05-01\n'
+            ',Gómez,sin-nombre@ejemplo.com,\n'
+            'Luis,Díaz,no-es-un-email,\n'
+            'Eva,Ruiz,eva@ejemplo.com,31/31/2010\n'
+            'Juan,Sosa,juan@ejemplo.com,\n'
+        )
+        self.assertEqual((creados, filas), (2, 5))
+        self.assertEqual([error['fila'] for error in errores], [3, 4, 5])
+        self.assertIn('Nombre:', errores[0]['errores'])
+        self.assertIn('Correo Electrónico:', errores[1]['errores'])
+        self.assertIn('Fecha de Nacimiento:', errores[2]['errores'])
+        self.assertEqual(self._importados(), ['Ana', 'Juan'])
+        ana = Alumno.objects.get(email='ana@ejemplo.com')
+        self.assertEqual((ana.apellido, str(ana.fecha_nacimiento), ana.usuario), ('Pérez', '2010-05-01', self.docente))
+
+    def test_duplicados(self):
+        creados, filas, errores = self._importar(
+            'nombre,apellido,email\n'
+            'Ana,Pérez,ana@ejemplo.com\n'
+            'Ya,Otra vez,CARGADO@ejemplo.com\n'
+            'Ana,Repetida,Ana@Ejemplo.com\n'
+            'Otro,Docente,otro@ejemplo.com\n'
+        )
+        self.assertEqual((creados, filas), (2, 4))
+        self.assertEqual(errores, [
+            {'fila': 3, 'errores': 'Correo Electrónico: ya existe un alumno con este correo'},
+            {'fila': 4, 'errores': 'Correo Electrónico: repetido (fila 2)'},
+        ])
+        self.assertEqual(self._importados(), ['Ana', 'Otro'])
+        # Subir de nuevo el mismo archivo no agrega nada
+        creados, _, errores = self._importar('nombre,apellido,email\nAna,Pérez,ana@ejemplo.com\n')
+        self.assertEqual((creados, len(errores)), (0, 1))
+
+    def test_detecta_el_separador(self):
+        for separador in (';', '\t'):
+            with self.subTest(separador=separador):
+                Alumno.objects.filter(apellido='Separador').delete()
+                filas = [['Nombre', ' Apellido', 'EMAIL', 'direccion'],
+                         ['Ana', 'Separador', 'ana@ejemplo.com', 'Calle 1, piso 2'],
+                         ['Luis', 'Separador', 'luis@ejemplo.com', '']]
+                creados, _, errores = self._importar('\n'.join(separador.join(fila) for fila in filas))
+                self.assertEqual((creados, errores), (2, []))
+                self.assertEqual(Alumno.objects.get(email='ana@ejemplo.com').direccion, 'Calle 1, piso 2')
+
+    def test_rechaza_archivos_invalidos(self):
+        casos = {
+            'El archivo está vacío.': b'',
+            'UTF-8': 'nombre,apellido,email\nJosé,Pérez,jose@ejemplo.com\n'.encode('latin-1'),
+            'Faltan las columnas: email.': b'nombre,apellido\nAna,Perez\n',
+        }
+        for mensaje, contenido in casos.items():
+            with self.subTest(mensaje=mensaje), self.assertRaisesMessage(ErrorImportacion, mensaje):
+                self._importar(contenido)
+        self.assertEqual(self._importados(), [])
+
+    def test_todo_o_nada(self):
+        # Los primeros lotes ya se insertaron cuando aparece el byte inválido: se deshacen
+        # (bien después de la muestra que lee el Sniffer, para que falle a mitad de la importación)
+        filas = ''.join(f'Alumno{i},Lote,alumno{i}@ejemplo.com\n' for i in range(2000))
+        contenido = ('nombre,apellido,email\n' + filas).encode() + b'Jos\xe9,P\xe9rez,jose@ejemplo.com\n'
+        with mock.patch.object(Alumno.objects, 'bulk_create', wraps=Alumno.objects.bulk_create) as bulk_create, \
+                self.assertRaisesMessage(ErrorImportacion, 'UTF-8'):
+            self._importar(contenido, tamano_lote=100)
+        self.assertGreater(bulk_create.call_count, 1)
+        self.assertEqual(self._importados(), [])
+
+    def test_vista_muestra_el_informe(self):
+        self.client.force_login(self.docente)
+        archivo = SimpleUploadedFile('alumnos.csv', b'nombre,apellido,email\nAna,Perez,ana@ejemplo.com\n,Sin,x\n')
+        response = self.client.post(reverse('importar_alumnos'), {'archivo': archivo})
+        self.assertEqual(response.context['resultado']['creados'], 1)
+        self.assertEqual(response.context['resultado']['con_error'], 1)
+        self.assertContains(response, 'Se importaron 1 de 2 alumnos')
+
+        archivo = SimpleUploadedFile('alumnos.csv', 'nombre,apellido,email\nJosé,P,j@e.com\n'.encode('latin-1'))
+        response = self.client.post(reverse('importar_alumnos'), {'archivo': archivo})
+        self.assertIsNone(response.context['resultado'])
+        self.assertContains(response, 'El archivo debe estar codificado en UTF-8.')
+
+
+@override_settings(CACHES=CACHE_LOCAL, ALUMNOS_POR_PAGINA=50)
+class TablaCacheadaTests(TestCase):
+    """La tabla del dashboard se cachea por usuario y se invalida con los cambios de sus alumnos"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.docente = User.objects.create_user(username='docente', password='x')
+        cls.otro = User.objects.create_user(username='otro', password='x')
+        cls.alumno = Alumno.objects.create(usuario=cls.docente, nombre='Clara', apellido='Vidal',
+                                           email='clara@ejemplo.com')
+        Alumno.objects.create(usuario=cls.otro, nombre='Bruno', apellido='Sosa', email='bruno@ejemplo.com')
+
+    def setUp(self):
+        cache.clear()
+
+    def _dashboard(self, usuario, **parametros):
+        self.client.force_login(usuario)
+        return self.client.get(reverse('dashboard'), parametros).content.decode()
+
+    def test_guardar_y_eliminar_renuevan_la_version(self):
+        version, otra = version_tabla(self.docente.pk), version_tabla(self.otro.pk)
+        alumno = Alumno.objects.get(pk=self.alumno.pk)
+        alumno.save()
+        guardado = version_tabla(self.docente.pk)
+        self.assertNotEqual(guardado, version)
+        alumno.delete()
+        self.assertNotIn(version_tabla(self.docente.pk), (version, guardado))
+        # Los cambios de un docente no invalidan la tabla de otro
+        self.assertEqual(version_tabla(self.otro.pk), otra)
+
+    def test_el_dashboard_no_sirve_la_tabla_vieja(self):
+        self.assertIn('Clara', self._dashboard(self.docente))
+        alumno = Alumno.objects.get(pk=self.alumno.pk)
+        alumno.nombre = 'Clarisa'
+        alumno.save()
+        html = self._dashboard(self.docente)
+        self.assertIn('<td>Clarisa</td>', html)
+        self.assertNotIn('<td>Clara</td>', html)
+
+        Alumno.objects.create(usuario=self.docente, nombre='Diego', apellido='Ruiz', email='diego@ejemplo.com')
+        self.assertIn('Diego', self._dashboard(self.docente))
+        alumno.delete()
+        html = self._dashboard(self.docente)
+        self.assertNotIn('Clarisa', html)
+        self.assertIn('Diego', html)
+
+    def test_el_token_csrf_queda_fuera_del_fragmento(self):
+        html = self._dashboard(self.docente)
+        fragmento = cache.get(clave_tabla(self.docente.pk, '', None, 50))
+        self.assertIn('Clara', fragmento)
+        self.assertNotIn('csrfmiddlewaretoken', fragmento)
+        self.assertIn(fragmento, html)
+        # El formulario sí lo lleva, fuera de la parte cacheada, y es el de esta sesión
+        token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', html).group(1)
+        self.assertNotIn(token, fragmento)
+
+    def test_cada_docente_ve_solo_sus_alumnos(self):
+        self.assertIn('Clara', self._dashboard(self.docente))
+        html = self._dashboard(self.otro)
+        self.assertIn('Bruno', html)
+        self.assertNotIn('Clara', html)
+        # También con la misma búsqueda y la tabla del primero ya cacheada
+        self.assertIn('Clara', self._dashboard(self.docente, q='ejemplo'))
+        html = self._dashboard(self.otro, q='ejemplo')
+        self.assertNotIn('Clara', html)
+        self.assertIn('Bruno', html)
+
+
+class BusquedaTests(TestCase):
+    """Índice FTS5 de alumnos: triggers al día, prefijos y orden por relevancia (bm25)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.docente = User.objects.create_user(username='docente', password='x')
+        cls.otro = User.objects.create_user(username='otro', password='x')
+        # La dirección pesa menos que el apellido: se crea primero para que el orden no sea por id
+        cls.vive_en_sol = Alumno.objects.create(usuario=cls.docente, nombre='Juan', apellido='Gómez',
+                                                email='juan@ejemplo.com', direccion='Calle Sol 123')
+        cls.sol = Alumno.objects.create(usuario=cls.docente, nombre='María', apellido='Sol',
+                                        email='maria@ejemplo.com')
+        cls.martinez = Alumno.objects.create(usuario=cls.docente, nombre='Ana', apellido='Martínez',
+                                             email='ana@ejemplo.com')
+        Alumno.objects.create(usuario=cls.otro, nombre='Ana', apellido='Martínez', email='ana@otro.com')
+
+    def _buscar(self, texto):
+        return buscar_alumnos(self.docente, texto, 10)
+
+    def _integridad(self):
+        # Con rank = 1 compara el índice con el contenido de alumnos_alumno (falla si se desfasaron)
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {TABLA_FTS}({TABLA_FTS}, rank) VALUES ('integrity-check', 1)")
+
+    def test_triggers_presentes(self):
+        # Si una migración reconstruye alumnos_alumno sin volver a crear los triggers, falla acá
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name, tbl_name FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+                           [f'{TABLA_FTS}_%'])
+            triggers = dict(cursor.fetchall())
+        self.assertEqual(triggers, {f'{TABLA_FTS}_{sufijo}': 'alumnos_alumno' for sufijo in ('ai', 'ad', 'au')})
+        self.assertTrue(indice_disponible())
+        self._integridad()
+
+    def test_prefijos_sin_acentos_y_solo_del_usuario(self):
+        self.assertEqual(set(self._buscar('mar')), {self.martinez, self.sol})  # Martínez y María
+        self.assertEqual(self._buscar('Ana Marti'), [self.martinez])
+        self.assertEqual(self._buscar('MARTÍN'), [self.martinez])
+        self.assertEqual(self._buscar('xyz'), [])
+        self.assertEqual(self._buscar('"*'), [])
+
+    def test_orden_por_relevancia(self):
+        self.assertEqual(self._buscar('sol'), [self.sol, self.vive_en_sol])
+
+    def test_editar_y_eliminar_actualizan_el_indice(self):
+        alumno = Alumno.objects.get(pk=self.martinez.pk)
+        alumno.apellido = 'Fernández'
+        alumno.save()
+        self.assertEqual(self._buscar('martinez'), [])
+        self.assertEqual(self._buscar('fern'), [alumno])
+
+        # update() y bulk_create no pasan por señales: los triggers también los cubren
+        Alumno.objects.filter(pk=alumno.pk).update(apellido='Quiroga')
+        self.assertEqual(self._buscar('fern'), [])
+        self.assertEqual(self._buscar('quiro'), [alumno])
+        nuevo, = Alumno.objects.bulk_create([Alumno(usuario=self.docente, nombre='Zoe', apellido='Quiroz',
+                                                    email='zoe@ejemplo.com')])
+        self.assertEqual({a.pk for a in self._buscar('quiro')}, {alumno.pk, nuevo.pk})
+
+        alumno.delete()
+        self.assertEqual([a.pk for a in self._buscar('quiro')], [nuevo.pk])
+        self._integridad()
+
+    def test_filtro_del_admin(self):
+        alumnos = filtrar_por_texto(Alumno.objects.all(), 'ana mart')
+        self.assertEqual(alumnos.count(), 2)
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class CachePdfTests(TestCase):
+    """Caché en disco de las fichas: aciertos, invalidación al editar o eliminar y recorte LRU"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.docente = User.objects.create_user(username='docente', password='x')
+        cls.alumnos = [
+            Alumno.objects.create(usuario=cls.docente, nombre=f'Alumno{i}', apellido='Cache',
+                                  email=f'alumno{i}@ejemplo.com')
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.directorio = Path(directorio.name)
+        self.enterContext(override_settings(PDF_CACHE_DIR=directorio.name))
+        self.renderizar = self.enterContext(mock.patch('alumnos.pdf.renderizar_ficha', wraps=pdf.renderizar_ficha))
+
+    def _archivos(self, alumno):
+        return sorted((self.directorio / str(alumno.pk)).glob('*.pdf'))
+
+    def test_segunda_vez_desde_la_cache(self):
+        alumno = self.alumnos[0]
+        primero = pdf.obtener_pdf_alumno(alumno)
+        segundo = pdf.obtener_pdf_alumno(alumno)
+        self.assertEqual(primero, segundo)
+        self.assertEqual(self.renderizar.call_count, 1)
+        self.assertEqual(len(self._archivos(alumno)), 1)
+        # El lote también la toma de la caché y solo renderiza las que faltan
+        lote = pdf.obtener_pdfs_lote(self.alumnos)
+        self.assertEqual(lote[0], primero)
+        self.assertEqual(self.renderizar.call_count, 1 + 2)
+
+    def test_editar_el_alumno_cambia_la_ficha(self):
+        alumno = Alumno.objects.get(pk=self.alumnos[0].pk)
+        anterior = pdf.obtener_pdf_alumno(alumno)
+        archivo_anterior, = self._archivos(alumno)
+
+        alumno.email = 'nuevo@ejemplo.com'
+        alumno.save()
+        self.assertEqual(self._archivos(alumno), [])  # post_save borró su carpeta
+
+        nueva = pdf.obtener_pdf_alumno(alumno)
+        self.assertNotEqual(nueva, anterior)
+        self.assertEqual(self.renderizar.call_count, 2)
+        self.assertIn('Email: nuevo@ejemplo.com', self.renderizar.call_args.args[0])
+        archivo_nuevo, = self._archivos(alumno)
+        self.assertNotEqual(archivo_nuevo.name, archivo_anterior.name)
+        self.assertEqual(archivo_nuevo.read_bytes(), nueva)
+
+    def test_eliminar_el_alumno_borra_sus_fichas(self):
+        alumno = Alumno.objects.get(pk=self.alumnos[0].pk)
+        pdf.obtener_pdf_alumno(alumno)
+        carpeta = self.directorio / str(alumno.pk)
+        self.assertTrue(carpeta.is_dir())
+        alumno.delete()
+        self.assertFalse(carpeta.exists())
+
+    def test_recorte_conserva_las_usadas_hace_menos(self):
+        for alumno in self.alumnos:
+            pdf.obtener_pdf_alumno(alumno)
+        archivos = [self._archivos(alumno)[0] for alumno in self.alumnos]
+        ahora = time.time()
+        for antiguedad, archivo in zip([300, 200, 100], archivos):
+            os.utime(archivo, (ahora - antiguedad, ahora - antiguedad))
+
+        # Leer la ficha más vieja la marca como recién usada
+        pdf.obtener_pdf_alumno(self.alumnos[0])
+        self.assertEqual(self.renderizar.call_count, 3)
+
+        total = sum(archivo.stat().st_size for archivo in archivos)
+        with override_settings(PDF_CACHE_MAX_BYTES=total - 1):
+            self.assertEqual(pdf.recortar_cache_pdf(), 1)
+            self.assertEqual(pdf.recortar_cache_pdf(), 0)  # ya está bajo el límite
+        self.assertEqual([archivo.exists() for archivo in archivos], [True, False, True])
+        # La carpeta vacía del alumno recortado también se elimina
+        self.assertFalse(archivos[1].parent.exists())
+
+
+@override_settings(CACHES=CACHE_LOCAL, ALUMNOS_EXPORTACION_LOTE=2)
+class ExportacionCsvTests(TestCase):
+    """El CSV exportado: columnas, valores escapados y solo los alumnos del usuario"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.docente = User.objects.create_user(username='docente', password='x')
+        cls.otro = User.objects.create_user(username='otro', password='x')
+        cls.completo = Alumno.objects.create(
+            usuario=cls.docente, nombre='Ana', apellido='O\'Neil, "la Tana"', email='ana@ejemplo.com',
+            fecha_nacimiento=date(2010, 5, 1), telefono='+54 11 1234-5678', direccion='Calle 1, piso 2\nDepto B',
+        )
+        for i in range(3):
+            Alumno.objects.create(usuario=cls.docente, nombre=f'Alumno{i}', apellido='Sin datos',
+                                  email=f'alumno{i}@ejemplo.com')
+        Alumno.objects.create(usuario=cls.otro, nombre='Bruno', apellido='Ajeno', email='bruno@ejemplo.com')
+
+    def _exportar(self, usuario):
+        self.client.force_login(usuario)
+        response = self.client.get(reverse('exportar_alumnos_csv'))
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="alumnos_{usuario.username}.csv"')
+        contenido = b''.join(response.streaming_content).decode('utf-8')
+        self.assertTrue(contenido.startswith('\ufeff'))
+        return contenido, list(csv.reader(StringIO(contenido[1:], newline='')))
+
+    def test_columnas_y_valores(self):
+        contenido, filas = self._exportar(self.docente)
+        self.assertEqual(filas[0], ['nombre', 'apellido', 'email', 'fecha_nacimiento', 'telefono',
+                                    'direccion', 'fecha_creacion'])
+        self.assertEqual(len(filas), 1 + 4)
+        fila = next(fila for fila in filas[1:] if fila[0] == 'Ana')
+        creado = timezone.localtime(self.completo.fecha_creacion).strftime('%Y-%m-%d %H:%M:%S')
+        self.assertEqual(fila, ['Ana', 'O\'Neil, "la Tana"', 'ana@ejemplo.com', '2010-05-01', '+54 11 1234-5678',
+                                'Calle 1, piso 2\nDepto B', creado])
+        # Comas, comillas y saltos de línea van entre comillas, con las comillas duplicadas
+        self.assertIn('"O\'Neil, ""la Tana"""', contenido)
+        self.assertIn('"Calle 1, piso 2\nDepto B"', contenido)
+        # Los campos opcionales vacíos quedan en blanco, no como "None"
+        self.assertEqual(next(fila for fila in filas[1:] if fila[0] == 'Alumno0')[3:6], ['', '', ''])
+        self.assertNotIn('None', contenido)
+
+    def test_solo_los_alumnos_del_usuario(self):
+        contenido, filas = self._exportar(self.docente)
+        self.assertNotIn('Bruno', contenido)
+        self.assertEqual({fila[2] for fila in filas[1:]},
+                         set(Alumno.objects.filter(usuario=self.docente).values_list('email', flat=True)))
+        _, filas = self._exportar(self.otro)
+        self.assertEqual([fila[0] for fila in filas[1:]], ['Bruno'])
+
+    def test_se_puede_volver_a_importar(self):
+        contenido, _ = self._exportar(self.docente)
+        creados, filas, errores = importar_csv(BytesIO(contenido.encode('utf-8')), self.otro, 100)
+        self.assertEqual((creados, filas, errores), (4, 4, []))
+        copia = Alumno.objects.get(usuario=self.otro, email='ana@ejemplo.com')
+        self.assertEqual((copia.apellido, copia.direccion, copia.fecha_nacimiento),
+                         (self.completo.apellido, self.completo.direccion, self.completo.fecha_nacimiento))
+
+
+@override_settings(CACHES=CACHE_LOCAL, ALUMNOS_EXPORTACION_LOTE=10)
+class ExportacionAsgiTests(TestCase):
+    """Bajo ASGI las exportaciones se envían de a partes y no se arman enteras en memoria"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.docente, = sembrar(1, 30)
+
+    async def _descargar(self, url, **parametros):
+        await self.async_client.aforce_login(self.docente)
+        with warnings.catch_warnings():
+            # Django avisa cuando tiene que consumir entero un iterador síncrono
+            warnings.filterwarnings('error', message='StreamingHttpResponse must consume')
+            response = await self.async_client.get(url, parametros)
+            self.assertTrue(response.is_async)
+            partes = [parte async for parte in response.streaming_content]
+        self.assertGreater(len(partes), 1)
+        return b''.join(parte if isinstance(parte, bytes) else parte.encode() for parte in partes)
+
+    async def test_csv(self):
+        contenido = await self._descargar(reverse('exportar_alumnos_csv'))
+        self.assertEqual(len(contenido.decode('utf-8-sig').splitlines()), 31)
+
+    async def test_pdf_y_zip(self):
+        contenido = await self._descargar(reverse('exportar_pdfs'))
+        self.assertTrue(contenido.startswith(b'%PDF-'))
+        self.assertIn(b'/Count 30', contenido)
+        contenido = await self._descargar(reverse('exportar_pdfs'), formato='zip')
+        self.assertTrue(contenido.startswith(b'PK'))
+
+
+@override_settings(PDF_PROCESOS=2, PDF_MINIMO_PARALELO=10)
+@mock.patch('alumnos.pdf.os.cpu_count', return_value=2)
+class RenderizadoEnLotesTests(SimpleTestCase):
+    """El pool de procesos se crea una vez y se reutiliza en cada lote del envío masivo"""
+
+    def setUp(self):
+        pdf.cerrar_pool()
+        self.addCleanup(pdf.cerrar_pool)
+        self.lineas = [[f'Nombre: Alumno{i}', f'Email: alumno{i}@ejemplo.com'] for i in range(12)]
+
+    def test_reutiliza_el_pool_entre_lotes(self, cpu_count):
+        primero = pdf.renderizar_fichas(self.lineas)
+        pool = pdf._pool_actual
+        self.assertIsNotNone(pool)
+        segundo = pdf.renderizar_fichas(self.lineas)
+        self.assertIs(pdf._pool_actual, pool)
+        self.assertEqual(len(primero), 12)
+        self.assertTrue(all(ficha.startswith(b'%PDF-') for ficha in primero + segundo))
+
+    def test_lotes_chicos_y_un_nucleo_sin_pool(self, cpu_count):
+        self.assertEqual(len(pdf.renderizar_fichas(self.lineas[:9])), 9)
+        self.assertIsNone(pdf._pool_actual)
+        cpu_count.return_value = 1
+        pdf.renderizar_fichas(self.lineas)
+        self.assertIsNone(pdf._pool_actual)
+
+
+class PdfEnStreamingTests(SimpleTestCase):
+    """El PDF escrito a mano por pdf_fichas_en_streaming es un documento válido
+
+    Se recorre como lo haría un lector: startxref -> tabla xref -> trailer -> catálogo ->
+    páginas -> contenido de cada página.
+    """
+
+    def _alumnos(self, cantidad):
+        return [
+            Alumno(pk=i, nombre=f'Ñandú{i}', apellido='Pérez (hijo) \\ 100%', email=f'a{i}@ejemplo.com',
+                   fecha_creacion=timezone.now())
+            for i in range(cantidad)
+        ]
+
+    def _objetos(self, datos):
+        self.assertTrue(datos.startswith(b'%PDF-1.'))
+        self.assertTrue(datos.endswith(b'%%EOF\n'))
+        inicio_xref = int(re.search(rb'startxref\n(\d+)\n%%EOF\n$', datos).group(1))
+        self.assertTrue(datos[inicio_xref:].startswith(b'xref\n0 '))
+
+        encabezado, _, resto = datos[inicio_xref + len(b'xref\n'):].partition(b'\n')
+        primero, cantidad = map(int, encabezado.split())
+        self.assertEqual(primero, 0)
+        # Cada entrada ocupa exactamente 20 bytes
+        entradas = [resto[i * 20:(i + 1) * 20] for i in range(cantidad)]
+        self.assertEqual(entradas[0], b'0000000000 65535 f \n')
+        trailer = resto[cantidad * 20:]
+        self.assertTrue(trailer.startswith(b'trailer\n'))
+        self.assertIn(b'/Size %d' % cantidad, trailer)
+        self.assertIn(b'/Root 1 0 R', trailer)
+
+        objetos = {}
+        for numero, entrada in enumerate(entradas[1:], start=1):
+            self.assertRegex(entrada, rb'^\d{10} 00000 n \n$')
+            offset = int(entrada[:10])
+            cabecera = b'%d 0 obj\n' % numero
+            self.assertEqual(datos[offset:offset + len(cabecera)], cabecera, f'xref del objeto {numero}')
+            fin = datos.index(b'\nendobj\n', offset)
+            objetos[numero] = datos[offset + len(cabecera):fin]
+        return objetos
+
+    def _contenido(self, objeto):
+        diccionario, _, resto = objeto.partition(b'\nstream\n')
+        largo = int(re.search(rb'/Length (\d+)', diccionario).group(1))
+        self.assertEqual(resto[largo:], b'\nendstream')
+        return zlib.decompress(resto[:largo])
+
+    def test_estructura(self):
+        alumnos = self._alumnos(3)
+        objetos = self._objetos(b''.join(pdf.pdf_fichas_en_streaming(alumnos)))
+
+        self.assertIn(b'/Type /Catalog', objetos[1])
+        self.assertIn(b'/Pages 2 0 R', objetos[1])
+        self.assertIn(b'/Type /Pages', objetos[2])
+        self.assertIn(b'/Count 3', objetos[2])
+        paginas = [int(n) for n in re.findall(rb'(\d+) 0 R', re.search(rb'/Kids \[(.*?)\]', objetos[2]).group(1))]
+        self.assertEqual(len(paginas), 3)
+
+        for alumno, numero in zip(alumnos, paginas):
+            pagina = objetos[numero]
+            self.assertIn(b'/Type /Page', pagina)
+            self.assertIn(b'/Parent 2 0 R', pagina)
+            for fuente in re.findall(rb'/F\d (\d+) 0 R', pagina):
+                self.assertIn(b'/Type /Font', objetos[int(fuente)])
+            texto = self._contenido(objetos[int(re.search(rb'/Contents (\d+) 0 R', pagina).group(1))])
+            # Texto en WinAnsi con los paréntesis y la barra invertida escapados
+            self.assertIn(pdf._texto_pdf(f'Nombre: {alumno.nombre} {alumno.apellido}'), texto)
+            self.assertIn(b'\\(hijo\\) \\\\', texto)
+
+    def test_sin_alumnos(self):
+        objetos = self._objetos(b''.join(pdf.pdf_fichas_en_streaming([])))
+        self.assertIn(b'/Count 0', objetos[2])
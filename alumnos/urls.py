@@ -4,8 +4,12 @@ from . import views
 urlpatterns = [
     path('dashboard/', views.dashboard, name='dashboard'),
     path('crear/', views.crear_alumno, name='crear_alumno'),
+    path('importar/', views.importar_alumnos, name='importar_alumnos'),
     path('editar/<int:pk>/', views.editar_alumno, name='editar_alumno'),
     path('eliminar/<int:pk>/', views.eliminar_alumno, name='eliminar_alumno'),
     path('enviar-pdf/<int:pk>/', views.enviar_pdf_alumno, name='enviar_pdf_alumno'),
+    path('enviar-pdfs/', views.enviar_pdfs_masivo, name='enviar_pdfs_masivo'),
+    path('exportar/', views.exportar_pdfs, name='exportar_pdfs'),
+    path('exportar/csv/', views.exportar_alumnos_csv, name='exportar_alumnos_csv'),
 ]
 
@@ -1,20 +1,52 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.core.mail import EmailMessage
 from django.conf import settings
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import inch
-from io import BytesIO
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from tareas.cola import encolar
 from .models import Alumno
-from .forms import AlumnoForm
+from .busqueda import buscar_alumnos
+from .forms import AlumnoForm, ImportarAlumnosForm
+from .fragmentos import clave_tabla
+from .exportacion import csv_alumnos_en_streaming, respuesta_en_streaming
+from .importacion import ErrorImportacion, importar_csv
+from .paginacion import pagina_por_cursor
+from .pdf import pdf_fichas_en_streaming, zip_fichas_en_streaming
 
 @login_required
 def dashboard(request):
     """Dashboard principal de alumnos"""
-    alumnos = Alumno.objects.filter(usuario=request.user)
-    return render(request, 'alumnos/dashboard.html', {'alumnos': alumnos})
+    busqueda = request.GET.get('q', '').strip()
+    cursor = request.GET.get('cursor')
+    
+    # La tabla renderizada se cachea por usuario; se invalida cuando cambian sus alumnos
+    clave = clave_tabla(request.user.pk, busqueda, cursor, settings.ALUMNOS_POR_PAGINA)
+    tabla = cache.get(clave)
+    if tabla is None:
+        if busqueda:
+            # Los resultados de búsqueda se ordenan por relevancia, sin paginar
+            alumnos = buscar_alumnos(request.user, busqueda, settings.ALUMNOS_POR_PAGINA)
+            siguiente = None
+        else:
+            alumnos, siguiente = pagina_por_cursor(
+                Alumno.objects.filter(usuario=request.user),
+                cursor,
+                settings.ALUMNOS_POR_PAGINA,
+            )
+        tabla = render_to_string('alumnos/_tabla_alumnos.html', {
+            'alumnos': alumnos,
+            'busqueda': busqueda,
+            'cursor': cursor,
+            'cursor_siguiente': siguiente,
+        })
+        cache.set(clave, tabla, settings.ALUMNOS_TABLA_CACHE_TIMEOUT)
+    
+    return render(request, 'alumnos/dashboard.html', {
+        'tabla': mark_safe(tabla),
+        'busqueda': busqueda,
+    })
 
 @login_required
 def crear_alumno(request):
@@ -26,89 +58,62 @@ def crear_alumno(request):
             alumno.usuario = request.user
             alumno.save()
             
-            # Enviar PDF automáticamente al crear el alumno
-            try:
-                # Validar que el usuario tenga email
-                if not request.user.email:
-                    messages.warning(request, f'Alumno {alumno.nombre} {alumno.apellido} creado exitosamente, pero no se pudo enviar el PDF porque no tienes correo registrado. Ve a /admin para agregarlo.')
-                    return redirect('dashboard')
-                
-                # Validar que esté configurado el correo (console está permitido para desarrollo)
-                if 'filebased' in str(settings.EMAIL_BACKEND):
-                    messages.warning(request, 
-                        f'Alumno {alumno.nombre} {alumno.apellido} creado exitosamente.\n'
-                        '⚠️ Para enviar PDFs automáticamente:\n'
-                        '1. Ejecuta: python configurar_correo.py\n'
-                        '2. O crea archivo .env con tus credenciales Gmail\n'
-                        '3. Reinicia el servidor')
-                    return redirect('dashboard')
-                
-                # Generar PDF
-                buffer = BytesIO()
-                p = canvas.Canvas(buffer, pagesize=letter)
-                width, height = letter
-                
-                # Título
-                p.setFont("Helvetica-Bold", 20)
-                p.drawString(100, height - 100, "Información del Alumno")
-                
-                # Datos del alumno
-                y = height - 150
-                p.setFont("Helvetica", 12)
-                datos = [
-                    f"Nombre: {alumno.nombre} {alumno.apellido}",
-                    f"Email: {alumno.email}",
-                    f"Teléfono: {alumno.telefono or 'No especificado'}",
-                    f"Fecha de Nacimiento: {alumno.fecha_nacimiento or 'No especificada'}",
-                    f"Dirección: {alumno.direccion or 'No especificada'}",
-                    f"Fecha de Registro: {alumno.fecha_creacion.strftime('%d/%m/%Y %H:%M')}",
-                ]
-                
-                for dato in datos:
-                    p.drawString(100, y, dato)
-                    y -= 30
-                
-                p.showPage()
-                p.save()
-                
-                # Obtener el PDF
-                buffer.seek(0)
-                pdf_data = buffer.getvalue()
-                buffer.close()
-                
-                # Validar que el usuario (admin/docente) tenga email
-                if not request.user.email:
-                    messages.warning(request, f'Alumno {alumno.nombre} {alumno.apellido} creado exitosamente, pero no se pudo enviar el PDF porque no tienes correo registrado. Ve a /admin para agregarlo.')
-                else:
-                    # Enviar por correo al ADMIN/DOCENTE (usuario logueado)
-                    from_email = settings.DEFAULT_FROM_EMAIL if settings.DEFAULT_FROM_EMAIL else settings.EMAIL_HOST_USER
-                    email = EmailMessage(
-                        f'Información del Alumno: {alumno.nombre} {alumno.apellido}',
-                        f'Hola {request.user.username},\n\n'
-                        f'Se ha registrado un nuevo alumno: {alumno.nombre} {alumno.apellido}.\n'
-                        f'Adjunto encontrarás la información completa del alumno.\n\n'
-                        'Saludos,\nSistema Educativo',
-                        from_email,
-                        [request.user.email],  # Se envía al correo del ADMIN/DOCENTE
-                    )
-                    email.attach(f'alumno_{alumno.id}_{alumno.nombre}_{alumno.apellido}.pdf', pdf_data, 'application/pdf')
-                    email.send()
-                    
-                    messages.success(request, f'✅ Alumno {alumno.nombre} {alumno.apellido} creado exitosamente. PDF enviado automáticamente a {request.user.email}')
-            except Exception as e:
-                error_msg = str(e)
-                if 'Authentication Required' in error_msg or '530' in error_msg:
-                    messages.warning(request, 
-                        f'Alumno {alumno.nombre} {alumno.apellido} creado exitosamente.\n'
-                        '❌ No se pudo enviar el PDF. Verifica EMAIL_HOST_USER y EMAIL_HOST_PASSWORD en settings.py')
-                else:
-                    messages.warning(request, f'Alumno creado exitosamente, pero hubo un error al enviar el PDF: {error_msg}')
+            # Validar que el usuario tenga email
+            if not request.user.email:
+                messages.warning(request, f'Alumno {alumno.nombre} {alumno.apellido} creado exitosamente, pero no se pudo enviar el PDF porque no tienes correo registrado. Ve a /admin para agregarlo.')
+                return redirect('dashboard')
+            
+            # Validar que esté configurado el correo (console está permitido para desarrollo)
+            if 'filebased' in str(settings.EMAIL_BACKEND):
+                messages.warning(request, 
+                    f'Alumno {alumno.nombre} {alumno.apellido} creado exitosamente.\n'
+                    '⚠️ Para enviar PDFs automáticamente:\n'
+                    '1. Ejecuta: python configurar_correo.py\n'
+                    '2. O crea archivo .env con tus credenciales Gmail\n'
+                    '3. Reinicia el servidor')
+                return redirect('dashboard')
+            
+            # El PDF se genera y envía en segundo plano (python manage.py procesar_tareas)
+            tarea = encolar(
+                'alumnos.tareas.enviar_pdf_alumno',
+                f'Enviar PDF de {alumno.nombre} {alumno.apellido}',
+                usuario=request.user,
+                alumno_id=alumno.id,
+                usuario_id=request.user.id,
+                nuevo=True,
+            )
+            messages.success(request, f'✅ Alumno {alumno.nombre} {alumno.apellido} creado exitosamente. El PDF se enviará automáticamente a {request.user.email} (tarea #{tarea.pk}).')
             
             return redirect('dashboard')
     else:
         form = AlumnoForm()
     return render(request, 'alumnos/crear_alumno.html', {'form': form})
 
+@login_required
+def importar_alumnos(request):
+    """Vista para cargar alumnos en forma masiva desde un CSV"""
+    resultado = None
+    if request.method == 'POST':
+        form = ImportarAlumnosForm(request.POST, request.FILES)
+        if form.is_valid():
+            try:
+                creados, filas, errores = importar_csv(
+                    request.FILES['archivo'],
+                    request.user,
+                    settings.ALUMNOS_IMPORTACION_LOTE,
+                )
+            except ErrorImportacion as e:
+                messages.error(request, f'❌ No se pudo importar el archivo: {e}')
+            else:
+                resultado = {'creados': creados, 'filas': filas, 'errores': errores, 'con_error': filas - creados}
+                if creados:
+                    messages.success(request, f'✅ Se importaron {creados} de {filas} alumnos.')
+                else:
+                    messages.warning(request, 'No se importó ningún alumno. Revisa los errores del archivo.')
+    else:
+        form = ImportarAlumnosForm()
+    return render(request, 'alumnos/importar_alumnos.html', {'form': form, 'resultado': resultado})
+
 @login_required
 def editar_alumno(request, pk):
     """Vista para editar un alumno existente"""
@@ -139,77 +144,85 @@ def enviar_pdf_alumno(request, pk):
     """Genera un PDF del alumno y lo envía por correo"""
     alumno = get_object_or_404(Alumno, pk=pk, usuario=request.user)
     
-    # Crear PDF en memoria
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
-    
-    # Título
-    p.setFont("Helvetica-Bold", 20)
-    p.drawString(100, height - 100, "Información del Alumno")
-    
-    # Datos del alumno
-    y = height - 150
-    p.setFont("Helvetica", 12)
-    datos = [
-        f"Nombre: {alumno.nombre} {alumno.apellido}",
-        f"Email: {alumno.email}",
-        f"Teléfono: {alumno.telefono or 'No especificado'}",
-        f"Fecha de Nacimiento: {alumno.fecha_nacimiento or 'No especificada'}",
-        f"Dirección: {alumno.direccion or 'No especificada'}",
-        f"Fecha de Registro: {alumno.fecha_creacion.strftime('%d/%m/%Y %H:%M')}",
-    ]
-    
-    for dato in datos:
-        p.drawString(100, y, dato)
-        y -= 30
+    # Validar que el usuario (admin/docente) tenga email
+    if not request.user.email:
+        messages.error(request, 'Error: No tienes un correo electrónico registrado. Ve a /admin y agrega tu correo en tu perfil de usuario.')
+        return redirect('dashboard')
     
-    p.showPage()
-    p.save()
+    # El PDF se genera y envía en segundo plano (python manage.py procesar_tareas)
+    tarea = encolar(
+        'alumnos.tareas.enviar_pdf_alumno',
+        f'Enviar PDF de {alumno.nombre} {alumno.apellido}',
+        usuario=request.user,
+        alumno_id=alumno.id,
+        usuario_id=request.user.id,
+    )
     
-    # Obtener el PDF
-    buffer.seek(0)
-    pdf_data = buffer.getvalue()
-    buffer.close()
+    # Verificar si está en modo console o SMTP real
+    if 'console' in str(settings.EMAIL_BACKEND):
+        messages.success(request, f'✅ PDF en cola (tarea #{tarea.pk}). El correo se mostrará en la consola del worker (destinatario: {request.user.email})')
+    else:
+        messages.success(request, f'✅ PDF en cola (tarea #{tarea.pk}). Se enviará en unos segundos a {request.user.email}')
     
-    # No bloquear si está en modo console (los correos se mostrarán en los logs)
+    return redirect('dashboard')
+
+@login_required
+def enviar_pdfs_masivo(request):
+    """Encola el envío de las fichas PDF de los alumnos seleccionados (o de todos)"""
+    if request.method != 'POST':
+        return redirect('dashboard')
     
-    # Validar que el usuario (admin/docente) tenga email
     if not request.user.email:
         messages.error(request, 'Error: No tienes un correo electrónico registrado. Ve a /admin y agrega tu correo en tu perfil de usuario.')
         return redirect('dashboard')
     
-    # Enviar por correo real al ADMIN/DOCENTE (usuario logueado)
-    try:
-        from_email = settings.DEFAULT_FROM_EMAIL if settings.DEFAULT_FROM_EMAIL else settings.EMAIL_HOST_USER
-        email = EmailMessage(
-            f'Información del Alumno: {alumno.nombre} {alumno.apellido}',
-            f'Hola {request.user.username},\n\n'
-            f'Adjunto encontrarás la información del alumno {alumno.nombre} {alumno.apellido}.\n\n'
-            'Saludos,\nSistema Educativo',
-            from_email,
-            [request.user.email],  # Se envía al correo del ADMIN/DOCENTE
+    if request.POST.get('accion') == 'todos':
+        alumno_ids = None
+        cantidad = Alumno.objects.filter(usuario=request.user).count()
+    else:
+        alumno_ids = list(
+            Alumno.objects.filter(usuario=request.user, pk__in=request.POST.getlist('alumnos'))
+            .values_list('pk', flat=True)
         )
-        email.attach(f'alumno_{alumno.id}_{alumno.nombre}_{alumno.apellido}.pdf', pdf_data, 'application/pdf')
-        email.send()
-        
-        # Verificar si está en modo console o SMTP real
-        if 'console' in str(settings.EMAIL_BACKEND):
-            messages.success(request, f'✅ PDF generado exitosamente. El correo se mostrará en la consola del servidor (destinatario: {request.user.email})')
-        else:
-            messages.success(request, f'✅ PDF enviado exitosamente a {request.user.email}')
-    except Exception as e:
-        error_msg = str(e)
-        if 'Authentication Required' in error_msg or '530' in error_msg:
-            messages.error(request, 
-                '❌ Error de autenticación Gmail.\n'
-                'Verifica en sistema_educativo/settings.py que EMAIL_HOST_USER y EMAIL_HOST_PASSWORD sean correctos.\n'
-                'Luego reinicia el servidor.')
-        elif '535' in error_msg or 'authentication failed' in error_msg.lower():
-            messages.error(request, 
-                '❌ Credenciales incorrectas de Gmail.\n'
-                'Verifica en sistema_educativo/settings.py que EMAIL_HOST_USER y EMAIL_HOST_PASSWORD sean correctos.')
-        else:
-            messages.error(request, f'❌ Error al enviar el correo: {error_msg}')
+        cantidad = len(alumno_ids)
     
-    return redirect('dashboard')
+    if not cantidad:
+        messages.warning(request, 'Selecciona al menos un alumno para enviar su PDF.')
+        return redirect('dashboard')
+    
+    tarea = encolar(
+        'alumnos.tareas.enviar_pdfs_alumnos',
+        f'Enviar PDFs de {cantidad} alumno(s)',
+        usuario=request.user,
+        max_intentos=1,
+        usuario_id=request.user.id,
+        alumno_ids=alumno_ids,
+    )
+    messages.success(request, f'✅ Envío de {cantidad} PDF(s) en cola (tarea #{tarea.pk}). El detalle por alumno estará en la página de la tarea.')
+    return redirect('estado_tarea', pk=tarea.pk)
+
+@login_required
+def exportar_pdfs(request):
+    """Descarga las fichas de todos los alumnos en un PDF (una página por alumno) o en un ZIP"""
+    formato = request.GET.get('formato', 'pdf')
+    # iterator() evita cargar todo el curso en memoria mientras se genera la respuesta
+    alumnos = Alumno.objects.filter(usuario=request.user).iterator(chunk_size=200)
+    
+    if formato == 'zip':
+        response = respuesta_en_streaming(request, zip_fichas_en_streaming(alumnos), content_type='application/zip')
+    else:
+        formato = 'pdf'
+        response = respuesta_en_streaming(request, pdf_fichas_en_streaming(alumnos), content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="alumnos_{request.user.username}.{formato}"'
+    return response
+
+@login_required
+def exportar_alumnos_csv(request):
+    """Descarga los alumnos del usuario en CSV, generado en streaming"""
+    response = respuesta_en_streaming(
+        request,
+        csv_alumnos_en_streaming(Alumno.objects.filter(usuario=request.user), settings.ALUMNOS_EXPORTACION_LOTE),
+        content_type='text/csv; charset=utf-8',
+    )
+    response['Content-Disposition'] = f'attachment; filename="alumnos_{request.user.username}.csv"'
+    return response
@@ -0,0 +1,89 @@
+"""Configuración de gunicorn: gunicorn -c gunicorn.conf.py
+
+Con preload_app la aplicación se carga una sola vez en el proceso maestro y los workers
+se crean con fork: arrancan sin volver a importar Django y comparten por copy-on-write la
+memoria de los módulos ya cargados. ReportLab, BeautifulSoup, requests y httpx se importan
+recién cuando se usan; GUNICORN_PRECARGAR los importa en el maestro para que también se
+compartan (más memoria en el maestro, menos por worker).
+
+Con GUNICORN_TAREAS=True o GUNICORN_CALENTAR_CADA=<segundos> el maestro también lanza
+`manage.py supervisar`, que mantiene corriendo procesar_tareas y lanza calentar_cache cada
+tantos segundos (sistema_educativo/supervisor.py).
+
+python manage.py informe_arranque muestra cuánto tiempo y memoria cuesta cada parte.
+"""
+import importlib
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+
+def _nucleos():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'uvicorn_worker.UvicornWorker')
+_asgi = 'uvicorn' in worker_class.lower()
+wsgi_app = 'sistema_educativo.asgi:application' if _asgi else 'sistema_educativo.wsgi:application'
+
+# Un worker async atiende muchas peticiones a la vez: alcanza con uno por núcleo (+1).
+# GUNICORN_MAX_WORKERS evita que un host con muchos núcleos visibles agote la memoria
+_workers_por_defecto = _nucleos() + 1 if _asgi else 2 * _nucleos() + 1
+workers = int(os.environ.get('WEB_CONCURRENCY')
+              or min(_workers_por_defecto, int(os.environ.get('GUNICORN_MAX_WORKERS', '4'))))
+threads = int(os.environ.get('GUNICORN_THREADS', '1'))  # solo con worker_class gthread
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True') == 'True'
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+keepalive = 5
+# Reciclar workers cada N peticiones acota la memoria que puedan ir acumulando (0 = nunca)
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+
+# Módulos a importar en el maestro antes de crear los workers, separados por coma
+# (por ejemplo: reportlab.pdfgen.canvas,bs4). Solo tiene efecto con preload_app
+precargar = [modulo.strip() for modulo in os.environ.get('GUNICORN_PRECARGAR', '').split(',') if modulo.strip()]
+
+# El maestro lanza `manage.py supervisar`, que vigila el worker de la cola de tareas...
+tareas = os.environ.get('GUNICORN_TAREAS', 'False') == 'True'
+# ... y una pasada de calentar_cache cada N segundos (0 = nunca)
+calentar_cada = int(os.environ.get('GUNICORN_CALENTAR_CADA', '0'))
+_supervisor = None
+
+
+def when_ready(server):
+    global _supervisor
+    if server.cfg.preload_app:
+        for modulo in precargar:
+            importlib.import_module(modulo)
+    if tareas or calentar_cada:
+        comando = [sys.executable, str(Path(__file__).resolve().parent / 'manage.py'), 'supervisar',
+                   '--tiempo-maximo', str(server.cfg.graceful_timeout)]
+        if tareas:
+            comando.append('--tareas')
+        if calentar_cada:
+            comando += ['--calentar-cada', str(calentar_cada)]
+        _supervisor = subprocess.Popen(comando)
+        server.log.info('supervisar iniciado (pid %s)', _supervisor.pid)
+
+
+def on_exit(server):
+    if _supervisor is not None:
+        # Su código de salida no importa: el árbitro de gunicorn puede haberlo recogido ya
+        _supervisor.terminate()
+        try:
+            _supervisor.wait(server.cfg.graceful_timeout + 5)
+        except subprocess.TimeoutExpired:
+            _supervisor.kill()
+
+
+def post_fork(server, worker):
+    # Las conexiones a la base que el maestro haya abierto no se comparten entre procesos
+    if server.cfg.preload_app:
+        from django.db import connections
+        connections.close_all()
@@ -0,0 +1 @@
+"""Utilidades compartidas por los tests de las apps; no se importan desde el código de producción"""
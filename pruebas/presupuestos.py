@@ -0,0 +1,50 @@
+"""Presupuestos de rendimiento por vista para los tests
+
+`assertPresupuesto` hace la petición y falla si supera la cantidad de consultas SQL, el
+tamaño de la respuesta o el tiempo indicados; así una regresión (un N+1 en una plantilla,
+una página que crece con la cantidad de alumnos) rompe la suite antes del deploy. Los
+tiempos se multiplican por PRESUPUESTO_FACTOR_TIEMPO (variable de entorno) para las
+máquinas lentas de CI, en lugar de dejar de exigirlos.
+"""
+import os
+import time
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+FACTOR_TIEMPO = float(os.environ.get('PRESUPUESTO_FACTOR_TIEMPO', '1'))
+
+
+class PresupuestoMixin:
+
+    def assertPresupuesto(self, peticion, consultas, kb=None, ms=None, calentar=False):
+        """Ejecuta peticion() y controla el presupuesto; devuelve (response, contenido)
+
+        Las respuestas en streaming se consumen dentro de la medición, porque sus consultas
+        y su tamaño ocurren al generarlas. Con calentar=True (peticiones sin efectos) se hace
+        una primera petición sin medir, para no contar la compilación de las plantillas.
+        """
+        if calentar:
+            self._consumir(peticion())
+        with CaptureQueriesContext(connection) as capturadas:
+            inicio = time.perf_counter()
+            response = peticion()
+            contenido = self._consumir(response)
+            duracion = (time.perf_counter() - inicio) * 1000
+
+        self.assertLessEqual(
+            len(capturadas), consultas,
+            f'{len(capturadas)} consultas SQL (presupuesto {consultas}):\n'
+            + '\n'.join(consulta['sql'] for consulta in capturadas.captured_queries),
+        )
+        if kb is not None:
+            self.assertLessEqual(len(contenido), kb * 1024,
+                                 f'Respuesta de {len(contenido) / 1024:.1f} KB (presupuesto {kb} KB)')
+        if ms is not None:
+            self.assertLessEqual(duracion, ms * FACTOR_TIEMPO,
+                                 f'{duracion:.0f} ms (presupuesto {ms * FACTOR_TIEMPO:.0f} ms)')
+        return response, contenido
+
+    def _consumir(self, response):
+        if response.streaming:
+            return b''.join(response.streaming_content)
+        return response.content
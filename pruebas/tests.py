@@ -0,0 +1,26 @@
+import time
+from unittest import mock
+from django.http import HttpResponse
+from django.test import TestCase
+from .presupuestos import PresupuestoMixin
+
+
+class PresupuestoTests(PresupuestoMixin, TestCase):
+    """Un presupuesto excedido hace fallar el test; PRESUPUESTO_FACTOR_TIEMPO solo escala el tiempo"""
+
+    def lenta(self):
+        time.sleep(0.02)
+        return HttpResponse(b'x' * 2048)
+
+    def test_tiempo_excedido_falla(self):
+        with self.assertRaisesMessage(AssertionError, 'presupuesto 1 ms'):
+            self.assertPresupuesto(self.lenta, consultas=0, ms=1)
+
+    @mock.patch('pruebas.presupuestos.FACTOR_TIEMPO', 1000)
+    def test_factor_escala_el_tiempo(self):
+        _, contenido = self.assertPresupuesto(self.lenta, consultas=0, kb=2, ms=1)
+        self.assertEqual(len(contenido), 2048)
+
+    def test_tamano(self):
+        with self.assertRaisesMessage(AssertionError, 'presupuesto 1 KB'):
+            self.assertPresupuesto(self.lenta, consultas=0, kb=1)
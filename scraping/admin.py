@@ -1,3 +1,22 @@
 from django.contrib import admin
+from .models import ArticuloCacheado, PalabraPopular, ResultadoBusqueda
 
-# Register your models here.
+@admin.register(ArticuloCacheado)
+class ArticuloCacheadoAdmin(admin.ModelAdmin):
+    list_display = ['titulo', 'palabra_clave', 'fecha_obtencion', 'fecha_ultimo_uso']
+    search_fields = ['clave', 'titulo']
+    readonly_fields = ['fecha_obtencion', 'fecha_ultimo_uso']
+
+@admin.register(ResultadoBusqueda)
+class ResultadoBusquedaAdmin(admin.ModelAdmin):
+    list_display = ['titulo', 'palabra_clave', 'usuario', 'fecha_creacion']
+    list_filter = ['fecha_creacion', 'usuario']
+    search_fields = ['palabra_clave', 'titulo']
+    readonly_fields = ['fecha_obtencion', 'fecha_creacion']
+
+@admin.register(PalabraPopular)
+class PalabraPopularAdmin(admin.ModelAdmin):
+    list_display = ['palabra_clave', 'busquedas', 'encontrada', 'ultima_busqueda']
+    list_filter = ['encontrada']
+    search_fields = ['clave']
+    readonly_fields = ['busquedas', 'ultima_busqueda']
@@ -0,0 +1,7 @@
+from django.urls import reverse
+from .views import vista_busqueda
+
+
+def busqueda(request):
+    """URL de la vista de búsqueda (sync o async) que enlaza la barra de navegación"""
+    return {'url_busqueda': reverse(vista_busqueda(request))}
@@ -0,0 +1,47 @@
+"""Artículos sintéticos con la estructura de las respuestas de Wikipedia
+
+Se usan en los benchmarks y en el servidor de prueba para no depender de la red.
+"""
+import json
+
+_PARRAFO = (
+    'El {titulo} es un tema de estudio que abarca la sección {seccion}, párrafo {numero}. '
+    'Su contenido incluye definiciones, historia y ejemplos que se suelen usar en clase '
+    'para introducir el tema a los estudiantes de distintos niveles educativos.'
+)
+
+
+def html_articulo(titulo, secciones=40, parrafos_por_seccion=6):
+    """HTML de un artículo con cabecera, infobox, secciones y navegación como en Wikipedia"""
+    partes = [
+        '<!DOCTYPE html><html class="client-nojs" lang="es" dir="ltr"><head><meta charset="UTF-8">',
+        f'<title>{titulo} - Wikipedia, la enciclopedia libre</title>',
+        '<style>' + '.mw-parser-output .hatnote{font-style:italic}' * 200 + '</style>',
+        '<script>' + 'var wgConfig={"wgPageName":"x"};' * 300 + '</script>',
+        '</head><body class="mediawiki ltr sitedir-ltr skin-vector">',
+        '<div id="mw-navigation">' + '<ul><li><a href="/wiki/Portada">Portada</a></li></ul>' * 100 + '</div>',
+        '<main id="content" class="mw-body">',
+        f'<h1 id="firstHeading" class="firstHeading mw-first-heading"><span class="mw-page-title-main">{titulo}</span></h1>',
+        '<div id="bodyContent" class="vector-body"><div id="mw-content-text" class="mw-body-content">',
+        '<div class="mw-content-ltr mw-parser-output" lang="es" dir="ltr">',
+        '<table class="infobox"><tr><td><p>Dato</p></td></tr>'
+        + '<tr><th>Campo</th><td>Valor de ejemplo para la ficha</td></tr>' * 30 + '</table>',
+    ]
+    for seccion in range(1, secciones + 1):
+        partes.append(f'<h2><span class="mw-headline" id="Seccion_{seccion}">Sección {seccion}</span></h2>')
+        for numero in range(1, parrafos_por_seccion + 1):
+            texto = _PARRAFO.format(titulo=titulo, seccion=seccion, numero=numero)
+            partes.append(f'<p>{texto} <a href="/wiki/Enlace_{numero}">enlace</a><sup class="reference">[{numero}]</sup></p>')
+    partes.append('</div></div></div>')
+    partes.append('<div class="navbox">' + '<a href="/wiki/Otro">Otro artículo</a> ' * 2000 + '</div>')
+    partes.append('</main></body></html>')
+    return ''.join(partes).encode('utf-8')
+
+
+def json_extracto(titulo, parrafos=3):
+    """Respuesta de la API de MediaWiki (prop=extracts) con la introducción del mismo artículo"""
+    extracto = '\n'.join(_PARRAFO.format(titulo=titulo, seccion=1, numero=numero) for numero in range(1, parrafos + 1))
+    return json.dumps({
+        'batchcomplete': True,
+        'query': {'pages': [{'pageid': 1, 'ns': 0, 'title': titulo, 'extract': extracto}]},
+    }, ensure_ascii=False).encode('utf-8')
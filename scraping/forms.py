@@ -1,4 +1,5 @@
 from django import forms
+from django.conf import settings
 
 class BusquedaForm(forms.Form):
     """Formulario para búsqueda de scraping"""
@@ -7,8 +8,35 @@ class BusquedaForm(forms.Form):
         required=True,
         widget=forms.TextInput(attrs={
             'class': 'form-control',
-            'placeholder': 'Ingrese una palabra clave para buscar'
+            'placeholder': 'Ingrese una palabra clave para buscar',
+            'list': 'sugerencias-palabras',
+            'autocomplete': 'off',
         }),
         label='Palabra Clave'
     )
 
+class BusquedaMultipleForm(forms.Form):
+    """Formulario para buscar varias palabras clave a la vez"""
+    palabras_clave = forms.CharField(
+        required=True,
+        widget=forms.Textarea(attrs={
+            'class': 'form-control',
+            'rows': 4,
+            'placeholder': 'Una palabra clave por línea (o separadas por comas)'
+        }),
+        label='Palabras Clave'
+    )
+
+    def clean_palabras_clave(self):
+        palabras = []
+        vistas = set()
+        for palabra in self.cleaned_data['palabras_clave'].replace(',', '\n').splitlines():
+            palabra = ' '.join(palabra.split())
+            if palabra and palabra.casefold() not in vistas:
+                vistas.add(palabra.casefold())
+                palabras.append(palabra[:200])
+        if not palabras:
+            raise forms.ValidationError('Ingresa al menos una palabra clave.')
+        if len(palabras) > settings.SCRAPING_MAX_PALABRAS:
+            raise forms.ValidationError(f'Puedes buscar hasta {settings.SCRAPING_MAX_PALABRAS} palabras clave a la vez.')
+        return palabras
@@ -0,0 +1,141 @@
+"""Fuentes de las que se obtiene el contenido de un artículo de Wikipedia
+
+Cada fuente sabe qué URL pedir y cómo convertir la respuesta en (título, url, párrafos).
+La descarga, la caché y los reintentos quedan en wikipedia.py, así todas las fuentes
+comparten la caché de artículos y la búsqueda concurrente. La revalidación condicional
+(If-None-Match / If-Modified-Since) solo se aprovecha con las fuentes que envían ETag o
+Last-Modified, como la página HTML; la API de MediaWiki no los envía, así que una entrada
+vencida de FuenteApi se vuelve a descargar (son unos pocos KB). SCRAPING_FUENTES define
+el orden: si una fuente falla (error de red o 5xx) o no encuentra el artículo se usa la
+siguiente.
+"""
+import json
+import re
+from urllib.parse import urlencode
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+PARRAFOS_A_REVISAR = 5
+PARRAFOS = 3
+LARGO_MINIMO_PARRAFO = 50
+
+_RE_TITULO = re.compile(rb'<h1\b[^>]*class="[^"]*\bfirstHeading\b[^"]*"[^>]*>.*?</h1>', re.S)
+_RE_CONTENIDO = re.compile(rb'<div\b[^>]*class="[^"]*\bmw-parser-output\b')
+
+_parser = None
+_fuentes = {}
+
+
+def _html_parser():
+    """lxml si está instalado (varias veces más rápido), si no el parser de Python"""
+    global _parser
+    if _parser is None:
+        try:
+            import lxml  # noqa: F401
+            _parser = 'lxml'
+        except ImportError:
+            _parser = 'html.parser'
+    return _parser
+
+
+def normalizar(palabra_clave):
+    """Quita espacios sobrantes de la palabra clave"""
+    return ' '.join(palabra_clave.split())
+
+
+def url_articulo(palabra_clave):
+    return f"{settings.WIKIPEDIA_URL}{normalizar(palabra_clave).replace(' ', '_')}"
+
+
+def extraer_contenido(html):
+    """Extrae el título y los párrafos principales de la página de un artículo
+
+    Solo se parsea lo necesario: el <h1> del título y el comienzo del contenido hasta
+    el quinto </p>, en lugar del artículo completo (que suele pesar cientos de KB).
+    """
+    # Importado acá: con FuenteApi (la fuente por defecto) BeautifulSoup no se carga
+    from bs4 import BeautifulSoup
+
+    parser = _html_parser()
+
+    # Extraer título
+    titulo_texto = 'No encontrado'
+    coincidencia = _RE_TITULO.search(html)
+    if coincidencia:
+        titulo = BeautifulSoup(coincidencia.group().decode('utf-8', 'replace'), parser).h1
+        titulo_texto = titulo.text if titulo else titulo_texto
+
+    # Extraer párrafos principales
+    parrafos = []
+    coincidencia = _RE_CONTENIDO.search(html)
+    if coincidencia:
+        fin = coincidencia.start()
+        for _ in range(PARRAFOS_A_REVISAR):
+            fin = html.find(b'</p>', fin)
+            if fin == -1:
+                break
+            fin += len(b'</p>')
+        fragmento = html[coincidencia.start():fin if fin != -1 else len(html)]
+
+        soup = BeautifulSoup(fragmento.decode('utf-8', 'replace'), parser)
+        contenido = soup.find('div', class_='mw-parser-output')
+        if contenido:
+            for p in contenido.find_all('p', limit=PARRAFOS_A_REVISAR):
+                texto = p.get_text().strip()
+                if texto and len(texto) > LARGO_MINIMO_PARRAFO:
+                    parrafos.append(texto)
+
+    return titulo_texto, parrafos[:PARRAFOS]
+
+
+class FuenteHtml:
+    """Página completa del artículo (la que ve el navegador), procesada con BeautifulSoup"""
+
+    def url_descarga(self, palabra_clave):
+        return url_articulo(palabra_clave)
+
+    def extraer(self, contenido, palabra_clave):
+        titulo, parrafos = extraer_contenido(contenido)
+        # El <h1> es el título al que llevó la redirección ("sistema solar" -> "Sistema solar")
+        return titulo, url_articulo(titulo if titulo != 'No encontrado' else palabra_clave), parrafos
+
+
+class FuenteApi:
+    """Introducción del artículo en texto plano desde la API de MediaWiki (TextExtracts)
+
+    Devuelve los mismos párrafos que la página completa en unos pocos KB de JSON, ya sin
+    HTML, notas ni navegación. Sigue las redirecciones como el sitio web: la URL del
+    artículo se arma con el título ya resuelto que devuelve la API.
+    """
+
+    def url_descarga(self, palabra_clave):
+        return settings.WIKIPEDIA_API_URL + '?' + urlencode({
+            'action': 'query',
+            'prop': 'extracts',
+            'exintro': 1,
+            'explaintext': 1,
+            'redirects': 1,
+            'format': 'json',
+            'formatversion': 2,
+            'titles': normalizar(palabra_clave),
+        })
+
+    def extraer(self, contenido, palabra_clave):
+        paginas = json.loads(contenido).get('query', {}).get('pages', [])
+        if not paginas or paginas[0].get('missing') or paginas[0].get('invalid'):
+            return None
+
+        pagina = paginas[0]
+        parrafos = [
+            parrafo.strip() for parrafo in pagina.get('extract', '').split('\n')
+            if len(parrafo.strip()) > LARGO_MINIMO_PARRAFO
+        ]
+        return pagina['title'], url_articulo(pagina['title']), parrafos[:PARRAFOS]
+
+
+def fuentes():
+    """Fuentes configuradas en SCRAPING_FUENTES, en orden de preferencia: [(ruta, fuente)]"""
+    for ruta in settings.SCRAPING_FUENTES:
+        if ruta not in _fuentes:
+            _fuentes[ruta] = import_string(ruta)()
+    return [(ruta, _fuentes[ruta]) for ruta in settings.SCRAPING_FUENTES]
@@ -0,0 +1,65 @@
+import time
+from pathlib import Path
+from bs4 import BeautifulSoup
+from django.core.management.base import BaseCommand
+from scraping.ejemplos import html_articulo, json_extracto
+from scraping.fuentes import FuenteApi, extraer_contenido
+
+
+def extraer_contenido_completo(html):
+    """Extracción original: parsea el artículo completo (referencia para comparar)"""
+    soup = BeautifulSoup(html, 'html.parser')
+    titulo = soup.find('h1', class_='firstHeading')
+    titulo_texto = titulo.text if titulo else 'No encontrado'
+    contenido = soup.find('div', class_='mw-parser-output')
+    parrafos = []
+    if contenido:
+        for p in contenido.find_all('p', limit=5):
+            texto = p.get_text().strip()
+            if texto and len(texto) > 50:
+                parrafos.append(texto)
+    return titulo_texto, parrafos[:3]
+
+
+class Command(BaseCommand):
+    help = ('Compara el tiempo de extracción completa vs. la extracción parcial sobre artículos guardados '
+            '(y, con el artículo sintético, contra la respuesta de la API de MediaWiki)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivos', nargs='*',
+                            help='Páginas de Wikipedia guardadas (.html). Sin archivos se usa un artículo sintético')
+        parser.add_argument('--repeticiones', type=int, default=20,
+                            help='Cantidad de veces que se procesa cada artículo (default: 20)')
+
+    def handle(self, *args, **options):
+        if options['archivos']:
+            articulos = [(Path(ruta).name, Path(ruta).read_bytes()) for ruta in options['archivos']]
+        else:
+            articulos = [('sintético', html_articulo('Sistema solar'))]
+
+        for nombre, html in articulos:
+            esperado = extraer_contenido_completo(html)
+            obtenido = extraer_contenido(html)
+            if obtenido != esperado:
+                self.stdout.write(self.style.ERROR(f'{nombre}: la extracción parcial no coincide con la completa'))
+
+            tiempos = {}
+            for etiqueta, funcion in (('completa', extraer_contenido_completo), ('parcial', extraer_contenido)):
+                inicio = time.perf_counter()
+                for _ in range(options['repeticiones']):
+                    funcion(html)
+                tiempos[etiqueta] = (time.perf_counter() - inicio) / options['repeticiones'] * 1000
+
+            self.stdout.write(
+                f"{nombre} ({len(html) / 1024:.0f} KB): completa {tiempos['completa']:.1f} ms, "
+                f"parcial {tiempos['parcial']:.1f} ms (x{tiempos['completa'] / tiempos['parcial']:.0f})"
+            )
+
+        if not options['archivos']:
+            respuesta = json_extracto('Sistema solar')
+            fuente = FuenteApi()
+            inicio = time.perf_counter()
+            for _ in range(options['repeticiones']):
+                fuente.extraer(respuesta, 'Sistema solar')
+            tiempo = (time.perf_counter() - inicio) / options['repeticiones'] * 1000
+            self.stdout.write(f'API de MediaWiki ({len(respuesta) / 1024:.1f} KB): {tiempo:.2f} ms')
@@ -0,0 +1,79 @@
+import signal
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+from scraping.models import ArticuloCacheado, PalabraPopular
+from scraping.wikipedia import recortar_resultados, refrescar_articulo
+
+
+class Command(BaseCommand):
+    help = ('Revalida en la caché los artículos de las palabras más buscadas antes de que venzan, '
+            'para que las búsquedas en clase no esperen a Wikipedia, y elimina los resultados de '
+            'búsqueda vencidos')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cantidad', type=int, default=100,
+                            help='Cantidad de palabras más buscadas a mantener al día (default: 100)')
+        parser.add_argument('--dias', type=int, default=180,
+                            help='Solo palabras buscadas en los últimos N días (default: 180, un cuatrimestre largo)')
+        parser.add_argument('--margen', type=int, default=3600,
+                            help='Revalida los artículos que vencen dentro de estos segundos (default: 3600)')
+        parser.add_argument('--intervalo', type=float, default=0,
+                            help='Repite cada N segundos en lugar de terminar (0 = una sola pasada)')
+
+    def handle(self, *args, **options):
+        self.detener = False
+        signal.signal(signal.SIGTERM, self._detener)
+        signal.signal(signal.SIGINT, self._detener)
+
+        while not self.detener:
+            close_old_connections()
+            self._calentar(options)
+            if not options['intervalo']:
+                break
+            fin = time.monotonic() + options['intervalo']
+            while not self.detener and time.monotonic() < fin:
+                time.sleep(1)
+
+    def _calentar(self, options):
+        ahora = timezone.now()
+        palabras = list(
+            PalabraPopular.objects
+            .filter(encontrada=True, ultima_busqueda__gte=ahora - timedelta(days=options['dias']))
+            .order_by('-busquedas', '-ultima_busqueda')
+            .values_list('clave', 'palabra_clave')[:options['cantidad']]
+        )
+        # Entradas que siguen vigentes más allá del margen: no hace falta tocarlas
+        limite = ahora - timedelta(seconds=settings.SCRAPING_CACHE_TTL - options['margen'])
+        al_dia = set(
+            ArticuloCacheado.objects
+            .filter(clave__in=[clave for clave, _ in palabras], fecha_obtencion__gt=limite)
+            .values_list('clave', flat=True)
+        )
+
+        refrescadas = fallidas = 0
+        for clave, palabra_clave in palabras:
+            if self.detener:
+                break
+            if clave in al_dia:
+                continue
+            try:
+                refrescar_articulo(palabra_clave)
+                refrescadas += 1
+            except Exception as e:
+                fallidas += 1
+                self.stdout.write(self.style.WARNING(f'{palabra_clave}: {e}'))
+
+        self.stdout.write(
+            f'{len(palabras)} palabras populares: {refrescadas} revalidadas, '
+            f'{len(palabras) - refrescadas - fallidas} al día, {fallidas} con error'
+        )
+        eliminados = recortar_resultados()
+        if eliminados:
+            self.stdout.write(f'{eliminados} resultados de búsqueda vencidos eliminados')
+
+    def _detener(self, signum, frame):
+        self.detener = True
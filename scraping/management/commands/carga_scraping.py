@@ -0,0 +1,109 @@
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import AsyncClient, Client, override_settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from scraping.stub import iniciar_stub
+from scraping.wikipedia import cerrar_cliente_async
+
+
+class Command(BaseCommand):
+    help = ('Prueba de carga de la búsqueda contra un Wikipedia local con latencia: '
+            'compara la vista síncrona (workers bloqueantes) con la asíncrona (un solo event loop)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--peticiones', type=int, default=200,
+                            help='Búsquedas por modo, cada una de un artículo distinto (default: 200)')
+        parser.add_argument('--latencia', type=float, default=0.2,
+                            help='Segundos que tarda el servidor stub en responder (default: 0.2)')
+        parser.add_argument('--trabajadores', type=int, default=4,
+                            help='Peticiones simultáneas en el modo síncrono, como workers sync de gunicorn (default: 4)')
+        parser.add_argument('--concurrencia', type=int, default=100,
+                            help='Peticiones simultáneas en el modo asíncrono (default: 100)')
+
+    def handle(self, *args, **options):
+        # Base de prueba en archivo (no en memoria) para que los hilos compartan los datos
+        directorio = tempfile.mkdtemp(prefix='carga_scraping_')
+        settings.DATABASES['default'].setdefault('TEST', {})['NAME'] = os.path.join(directorio, 'carga.sqlite3')
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0)
+        bases = runner.setup_databases()
+        servidor = iniciar_stub(options['latencia'])
+        try:
+            with override_settings(WIKIPEDIA_URL=servidor.url_wiki, WIKIPEDIA_API_URL=servidor.url_api,
+                                   TAREAS_EN_LINEA=True):
+                cliente = Client()
+                cliente.force_login(User.objects.create_user('carga', 'carga@example.com'))
+                sesion = cliente.cookies[settings.SESSION_COOKIE_NAME].value
+
+                n = options['peticiones']
+                self.stdout.write(
+                    f"{n} búsquedas por modo, latencia del stub {options['latencia'] * 1000:.0f} ms"
+                )
+                self._informar(f"síncrona ({options['trabajadores']} workers)",
+                               *self._carga_sincronica(sesion, n, options['trabajadores']))
+                self._informar(f"asíncrona (concurrencia {options['concurrencia']})",
+                               *asyncio.run(self._carga_asincronica(sesion, n, options['concurrencia'])))
+        finally:
+            servidor.shutdown()
+            runner.teardown_databases(bases)
+            teardown_test_environment()
+
+    def _carga_sincronica(self, sesion, n, trabajadores):
+        url = reverse('buscar_contenido')
+
+        def peticion(i):
+            cliente = Client()
+            cliente.cookies[settings.SESSION_COOKIE_NAME] = sesion
+            inicio = time.perf_counter()
+            try:
+                response = cliente.post(url, {'palabra_clave': f'Tema sync {i}'})
+            finally:
+                connections.close_all()
+            return time.perf_counter() - inicio, b'resultado_id' in response.content
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=trabajadores) as executor:
+            mediciones = list(executor.map(peticion, range(n)))
+        return time.perf_counter() - inicio, mediciones
+
+    async def _carga_asincronica(self, sesion, n, concurrencia):
+        url = reverse('buscar_contenido_async')
+        semaforo = asyncio.Semaphore(concurrencia)
+
+        async def peticion(i):
+            cliente = AsyncClient()
+            cliente.cookies[settings.SESSION_COOKIE_NAME] = sesion
+            async with semaforo:
+                inicio = time.perf_counter()
+                response = await cliente.post(url, {'palabra_clave': f'Tema async {i}'})
+                return time.perf_counter() - inicio, b'resultado_id' in response.content
+
+        inicio = time.perf_counter()
+        try:
+            mediciones = await asyncio.gather(*(peticion(i) for i in range(n)))
+        finally:
+            await cerrar_cliente_async()
+        return time.perf_counter() - inicio, mediciones
+
+    def _informar(self, modo, total, mediciones):
+        tiempos = sorted(tiempo for tiempo, _ in mediciones)
+        fallidas = sum(1 for _, ok in mediciones if not ok)
+        p95 = tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))]
+        linea = (
+            f'{modo}: {len(mediciones) / total:.1f} búsquedas/s, '
+            f'p50 {statistics.median(tiempos) * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms'
+        )
+        if fallidas:
+            self.stdout.write(self.style.ERROR(f'{linea} ({fallidas} sin resultado)'))
+        else:
+            self.stdout.write(linea)
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticuloCacheado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=200, unique=True, verbose_name='Clave')),
+                ('palabra_clave', models.CharField(max_length=200, verbose_name='Palabra Clave')),
+                ('titulo', models.CharField(max_length=300, verbose_name='Título')),
+                ('url', models.URLField(max_length=500, verbose_name='URL')),
+                ('parrafos', models.JSONField(default=list, verbose_name='Párrafos')),
+                ('etag', models.CharField(blank=True, max_length=200, verbose_name='ETag')),
+                ('ultima_modificacion', models.CharField(blank=True, max_length=100, verbose_name='Last-Modified')),
+                ('fecha_obtencion', models.DateTimeField(verbose_name='Fecha de Obtención')),
+                ('fecha_ultimo_uso', models.DateTimeField(db_index=True, verbose_name='Fecha de Último Uso')),
+            ],
+            options={
+                'verbose_name': 'Artículo Cacheado',
+                'verbose_name_plural': 'Artículos Cacheados',
+                'ordering': ['-fecha_ultimo_uso'],
+            },
+        ),
+    ]
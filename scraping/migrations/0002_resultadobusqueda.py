@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraping', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResultadoBusqueda',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('palabra_clave', models.CharField(max_length=200, verbose_name='Palabra Clave')),
+                ('titulo', models.CharField(max_length=300, verbose_name='Título')),
+                ('url', models.URLField(max_length=500, verbose_name='URL')),
+                ('parrafos', models.JSONField(default=list, verbose_name='Párrafos')),
+                ('fecha_obtencion', models.DateTimeField(verbose_name='Fecha de Obtención')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Resultado de Búsqueda',
+                'verbose_name_plural': 'Resultados de Búsqueda',
+                'ordering': ['-fecha_creacion', '-id'],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraping', '0002_resultadobusqueda'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PalabraPopular',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=200, unique=True, verbose_name='Clave')),
+                ('palabra_clave', models.CharField(max_length=200, verbose_name='Palabra Clave')),
+                ('busquedas', models.PositiveIntegerField(default=0, verbose_name='Búsquedas')),
+                ('ultima_busqueda', models.DateTimeField(verbose_name='Última Búsqueda')),
+            ],
+            options={
+                'verbose_name': 'Palabra Popular',
+                'verbose_name_plural': 'Palabras Populares',
+                'ordering': ['-busquedas'],
+                'indexes': [models.Index(fields=['-busquedas'], name='palabra_busquedas_idx')],
+            },
+        ),
+    ]
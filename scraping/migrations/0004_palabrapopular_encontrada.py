@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:10
+
+from django.db import migrations, models
+
+
+def marcar_encontradas(apps, schema_editor):
+    # Las palabras que ya tienen su artículo en la caché se encontraron en Wikipedia
+    PalabraPopular = apps.get_model('scraping', 'PalabraPopular')
+    ArticuloCacheado = apps.get_model('scraping', 'ArticuloCacheado')
+    PalabraPopular.objects.filter(
+        clave__in=ArticuloCacheado.objects.values('clave')
+    ).update(encontrada=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraping', '0003_palabrapopular'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='palabrapopular',
+            name='encontrada',
+            field=models.BooleanField(default=False, verbose_name='Encontrada en Wikipedia'),
+        ),
+        migrations.RunPython(marcar_encontradas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraping', '0004_palabrapopular_encontrada'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='articulocacheado',
+            name='fuente',
+            field=models.CharField(blank=True, max_length=200, verbose_name='Fuente'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraping', '0005_articulocacheado_fuente'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='resultadobusqueda',
+            index=models.Index(fields=['fecha_creacion'], name='resultado_fecha_idx'),
+        ),
+    ]
@@ -1,3 +1,66 @@
 from django.db import models
+from django.contrib.auth.models import User
 
-# Create your models here.
+class ArticuloCacheado(models.Model):
+    """Artículo de Wikipedia ya procesado, con los validadores HTTP para revalidarlo"""
+    clave = models.CharField(max_length=200, unique=True, verbose_name='Clave')
+    palabra_clave = models.CharField(max_length=200, verbose_name='Palabra Clave')
+    titulo = models.CharField(max_length=300, verbose_name='Título')
+    url = models.URLField(max_length=500, verbose_name='URL')
+    parrafos = models.JSONField(default=list, verbose_name='Párrafos')
+    # Fuente (ruta de SCRAPING_FUENTES) que produjo la entrada: los validadores solo valen para ella
+    fuente = models.CharField(max_length=200, blank=True, verbose_name='Fuente')
+    etag = models.CharField(max_length=200, blank=True, verbose_name='ETag')
+    ultima_modificacion = models.CharField(max_length=100, blank=True, verbose_name='Last-Modified')
+    fecha_obtencion = models.DateTimeField(verbose_name='Fecha de Obtención')
+    fecha_ultimo_uso = models.DateTimeField(db_index=True, verbose_name='Fecha de Último Uso')
+
+    class Meta:
+        verbose_name = 'Artículo Cacheado'
+        verbose_name_plural = 'Artículos Cacheados'
+        ordering = ['-fecha_ultimo_uso']
+
+    def __str__(self):
+        return self.titulo
+
+
+class ResultadoBusqueda(models.Model):
+    """Resultado de una búsqueda mostrado a un usuario; se envía por correo a partir de su id"""
+    palabra_clave = models.CharField(max_length=200, verbose_name='Palabra Clave')
+    titulo = models.CharField(max_length=300, verbose_name='Título')
+    url = models.URLField(max_length=500, verbose_name='URL')
+    parrafos = models.JSONField(default=list, verbose_name='Párrafos')
+    fecha_obtencion = models.DateTimeField(verbose_name='Fecha de Obtención')
+    fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name='Usuario')
+
+    class Meta:
+        verbose_name = 'Resultado de Búsqueda'
+        verbose_name_plural = 'Resultados de Búsqueda'
+        ordering = ['-fecha_creacion', '-id']
+        indexes = [
+            models.Index(fields=['fecha_creacion'], name='resultado_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.palabra_clave}: {self.titulo}"
+
+
+class PalabraPopular(models.Model):
+    """Cantidad de búsquedas de cada palabra clave, para calentar la caché de artículos"""
+    clave = models.CharField(max_length=200, unique=True, verbose_name='Clave')
+    palabra_clave = models.CharField(max_length=200, verbose_name='Palabra Clave')
+    busquedas = models.PositiveIntegerField(default=0, verbose_name='Búsquedas')
+    encontrada = models.BooleanField(default=False, verbose_name='Encontrada en Wikipedia')
+    ultima_busqueda = models.DateTimeField(verbose_name='Última Búsqueda')
+
+    class Meta:
+        verbose_name = 'Palabra Popular'
+        verbose_name_plural = 'Palabras Populares'
+        ordering = ['-busquedas']
+        indexes = [
+            models.Index(fields=['-busquedas'], name='palabra_busquedas_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.palabra_clave} ({self.busquedas})"
@@ -0,0 +1,95 @@
+"""Contador de búsquedas por palabra clave
+
+Cada búsqueda suma en memoria (y, si encontró artículo, en el índice de sugerencias) y
+el proceso vuelca los totales a PalabraPopular cada SCRAPING_POPULARIDAD_LOTE búsquedas o
+SCRAPING_POPULARIDAD_INTERVALO segundos, con un único INSERT ... ON CONFLICT por lote en
+lugar de una escritura por petición.
+"""
+import atexit
+import threading
+import time
+from collections import Counter
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+from .fuentes import normalizar
+from .models import PalabraPopular
+from .sugerencias import indice
+from .wikipedia import clave_cache
+
+_pendientes = Counter()
+_palabras = {}
+_encontradas = set()
+_lock = threading.Lock()
+_ultimo_volcado = time.monotonic()
+
+_SQL_SUMAR = (
+    'INSERT INTO {tabla} (clave, palabra_clave, busquedas, encontrada, ultima_busqueda) '
+    'VALUES (%s, %s, %s, %s, %s) '
+    'ON CONFLICT (clave) DO UPDATE SET '
+    'busquedas = {tabla}.busquedas + excluded.busquedas, '
+    'encontrada = {tabla}.encontrada OR excluded.encontrada, '
+    'palabra_clave = excluded.palabra_clave, '
+    'ultima_busqueda = excluded.ultima_busqueda'
+)
+
+
+def registrar_busqueda(palabra_clave, encontrada=False):
+    """Suma una búsqueda de la palabra; vuelca los contadores si ya toca"""
+    clave = clave_cache(palabra_clave)
+    if not clave:
+        return
+    palabra_clave = normalizar(palabra_clave)[:200]
+    if encontrada:
+        indice.sumar(clave, palabra_clave)
+    with _lock:
+        _pendientes[clave] += 1
+        _palabras[clave] = palabra_clave
+        if encontrada:
+            _encontradas.add(clave)
+        toca = (
+            sum(_pendientes.values()) >= settings.SCRAPING_POPULARIDAD_LOTE
+            or time.monotonic() - _ultimo_volcado >= settings.SCRAPING_POPULARIDAD_INTERVALO
+        )
+    if toca:
+        try:
+            volcar_busquedas()
+        except DatabaseError:
+            pass  # los contadores quedan en memoria para el próximo volcado
+
+
+def volcar_busquedas():
+    """Guarda en la base los contadores acumulados en memoria. Devuelve cuántas palabras escribió"""
+    global _pendientes, _palabras, _encontradas, _ultimo_volcado
+    with _lock:
+        pendientes, palabras, encontradas = _pendientes, _palabras, _encontradas
+        _pendientes, _palabras, _encontradas = Counter(), {}, set()
+        _ultimo_volcado = time.monotonic()
+    if not pendientes:
+        return 0
+
+    ahora = connection.ops.adapt_datetimefield_value(timezone.now())
+    filas = [
+        (clave[:200], palabras[clave], cantidad, clave in encontradas, ahora)
+        for clave, cantidad in pendientes.items()
+    ]
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(_SQL_SUMAR.format(tabla=PalabraPopular._meta.db_table), filas)
+    except DatabaseError:
+        # Si la base no está disponible se devuelven los contadores para el próximo volcado
+        with _lock:
+            _pendientes.update(pendientes)
+            _encontradas.update(encontradas)
+            for clave, palabra in palabras.items():
+                _palabras.setdefault(clave, palabra)
+        raise
+    return len(filas)
+
+
+@atexit.register
+def _volcar_al_salir():
+    try:
+        volcar_busquedas()
+    except DatabaseError:
+        pass
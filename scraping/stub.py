@@ -0,0 +1,133 @@
+"""Servidor HTTP local que imita a Wikipedia, para pruebas sin depender de la red
+
+    servidor = iniciar_stub(latencia=0.2)
+    settings.WIKIPEDIA_URL = servidor.url_wiki
+    settings.WIKIPEDIA_API_URL = servidor.url_api
+    ...
+    servidor.shutdown()
+
+Sirve la página del artículo (/wiki/<título>) y la API (/w/api.php). Sin grabaciones
+genera un artículo sintético para cualquier título; con grabaciones=<directorio> responde
+con los archivos grabados (<Título>.html y <Título>.json) y 404 / "missing" para el resto.
+Las rutas que empiezan con /error/ responden 503, para probar las fuentes de respaldo.
+Como en Wikipedia, la página del artículo lleva ETag (y responde 304 a If-None-Match) y la
+API no envía validadores.
+"""
+import hashlib
+import json
+import sys
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlsplit
+from .ejemplos import html_articulo, json_extracto
+
+GRABACIONES = Path(__file__).resolve().parent / 'grabaciones'
+
+
+@lru_cache(maxsize=256)
+def _pagina(titulo):
+    html = html_articulo(titulo)
+    return html, '"%s"' % hashlib.md5(html).hexdigest()
+
+
+def _titulo_mediawiki(titulo):
+    # MediaWiki pone en mayúscula la primera letra: "fotosíntesis" es "Fotosíntesis"
+    titulo = ' '.join(titulo.replace('_', ' ').split())
+    return titulo[:1].upper() + titulo[1:]
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, como Wikipedia
+
+    def do_GET(self):
+        time.sleep(self.server.latencia)
+        url = urlsplit(self.path)
+        if url.path.startswith('/error/'):
+            self._responder(503, b'', 'text/plain')
+        elif url.path.startswith('/wiki/'):
+            self._articulo(_titulo_mediawiki(unquote(url.path[len('/wiki/'):])))
+        elif url.path == '/w/api.php':
+            self._api(_titulo_mediawiki(parse_qs(url.query).get('titles', [''])[0]))
+        else:
+            self._responder(404, b'', 'text/plain')
+
+    def _articulo(self, titulo):
+        if self.server.grabaciones is None:
+            cuerpo, etag = _pagina(titulo)
+            self._responder(200, cuerpo, 'text/html; charset=UTF-8', etag)
+            return
+        archivo = self.server.grabaciones / f"{titulo.replace(' ', '_')}.html"
+        if archivo.is_file():
+            cuerpo = archivo.read_bytes()
+            self._responder(200, cuerpo, 'text/html; charset=UTF-8', '"%s"' % hashlib.md5(cuerpo).hexdigest())
+        else:
+            self._responder(404, b'', 'text/html; charset=UTF-8')
+
+    def _api(self, titulo):
+        if self.server.grabaciones is None:
+            cuerpo = json_extracto(titulo)
+        else:
+            archivo = self.server.grabaciones / f"{titulo.replace(' ', '_')}.json"
+            if archivo.is_file():
+                cuerpo = archivo.read_bytes()
+            else:
+                cuerpo = json.dumps({
+                    'batchcomplete': True,
+                    'query': {'pages': [{'ns': 0, 'title': titulo, 'missing': True}]},
+                }).encode()
+        self._responder(200, cuerpo, 'application/json; charset=utf-8')
+
+    def _responder(self, estado, cuerpo, tipo, etag=None):
+        if etag and estado == 200 and self.headers.get('If-None-Match') == etag:
+            estado, cuerpo = 304, b''
+        self.send_response(estado)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(cuerpo)))
+        if etag and estado in (200, 304):
+            self.send_header('ETag', etag)
+        if tipo.startswith('application/json'):
+            # Lo que envía api.php: sin ETag ni Last-Modified
+            self.send_header('Cache-Control', 'private, must-revalidate, max-age=0')
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ServidorStub(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, direccion, latencia, grabaciones):
+        super().__init__(direccion, _Manejador)
+        self.latencia = latencia
+        self.grabaciones = Path(grabaciones) if grabaciones else None
+
+    def handle_error(self, request, client_address):
+        # Un cliente que se cansó de esperar (timeout) no es un error del servidor
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    @property
+    def url_base(self):
+        host, puerto = self.server_address[:2]
+        return f'http://{host}:{puerto}'
+
+    @property
+    def url_wiki(self):
+        return f'{self.url_base}/wiki/'
+
+    @property
+    def url_api(self):
+        return f'{self.url_base}/w/api.php'
+
+
+def iniciar_stub(latencia=0.2, puerto=0, grabaciones=None):
+    """Levanta el servidor en un hilo; con puerto=0 se elige uno libre"""
+    servidor = ServidorStub(('127.0.0.1', puerto), latencia, grabaciones)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
@@ -0,0 +1,95 @@
+"""Autocompletado de palabras clave a partir de las búsquedas que encontraron artículo
+
+Cada proceso guarda en memoria una lista ordenada de claves (las SCRAPING_SUGERENCIAS_MAX
+más buscadas) y resuelve los prefijos con bisect, sin ir a la base. Las búsquedas nuevas
+se agregan al momento y la lista se recarga cada SCRAPING_SUGERENCIAS_RECARGA segundos
+para incorporar lo que registraron los otros procesos. Si la lista no tiene todas las
+palabras y no alcanza para completar las sugerencias, se consulta la base por rango.
+"""
+import bisect
+import heapq
+import threading
+import time
+from operator import itemgetter
+from django.conf import settings
+from .models import PalabraPopular
+from .wikipedia import clave_cache
+
+LARGO_MINIMO = 2
+_FIN_PREFIJO = '\U0010ffff'  # mayor que cualquier carácter: [prefijo, prefijo + _FIN_PREFIJO) es el rango
+
+
+class IndicePalabras:
+    """Lista ordenada de claves con su palabra clave y cantidad de búsquedas"""
+
+    def __init__(self):
+        self._claves = []
+        self._datos = {}
+        self._lock = threading.Lock()
+        self._carga_lock = threading.Lock()
+        self._cargado = None
+        self.completo = True
+
+    def cargar_si_hace_falta(self):
+        if self._cargado is not None and time.monotonic() - self._cargado < settings.SCRAPING_SUGERENCIAS_RECARGA:
+            return
+        with self._carga_lock:
+            if self._cargado is None or time.monotonic() - self._cargado >= settings.SCRAPING_SUGERENCIAS_RECARGA:
+                self.cargar()
+
+    def cargar(self):
+        maximo = settings.SCRAPING_SUGERENCIAS_MAX
+        filas = list(
+            PalabraPopular.objects.filter(encontrada=True)
+            .order_by('-busquedas')
+            .values_list('clave', 'palabra_clave', 'busquedas')[:maximo + 1]
+        )
+        datos = {clave: [palabra_clave, busquedas] for clave, palabra_clave, busquedas in filas[:maximo]}
+        claves = sorted(datos)
+        with self._lock:
+            self._claves, self._datos = claves, datos
+            self.completo = len(filas) <= maximo
+            self._cargado = time.monotonic()
+
+    def sumar(self, clave, palabra_clave, busquedas=1):
+        """Registra una búsqueda que encontró artículo (antes de la primera carga no hace nada)"""
+        if self._cargado is None:
+            return
+        with self._lock:
+            datos = self._datos.get(clave)
+            if datos is not None:
+                datos[1] += busquedas
+            else:
+                self._datos[clave] = [palabra_clave, busquedas]
+                bisect.insort(self._claves, clave)
+
+    def buscar(self, prefijo, limite):
+        """Las `limite` palabras más buscadas que empiezan con el prefijo"""
+        with self._lock:
+            inicio = bisect.bisect_left(self._claves, prefijo)
+            fin = bisect.bisect_left(self._claves, prefijo + _FIN_PREFIJO, inicio)
+            candidatos = [tuple(self._datos[clave]) for clave in self._claves[inicio:fin]]
+        return [palabra_clave for palabra_clave, _ in heapq.nlargest(limite, candidatos, key=itemgetter(1))]
+
+
+indice = IndicePalabras()
+
+
+def sugerir(texto, limite):
+    """Palabras clave ya encontradas en Wikipedia que empiezan con el texto"""
+    prefijo = clave_cache(texto)
+    if len(prefijo) < LARGO_MINIMO:
+        return []
+
+    if settings.SCRAPING_SUGERENCIAS_EN_MEMORIA:
+        indice.cargar_si_hace_falta()
+        sugerencias = indice.buscar(prefijo, limite)
+        if len(sugerencias) >= limite or indice.completo:
+            return sugerencias
+
+    # Rango sobre el índice único de clave (en SQLite, LIKE 'texto%' no usa el índice)
+    return list(
+        PalabraPopular.objects.filter(encontrada=True, clave__gte=prefijo, clave__lt=prefijo + _FIN_PREFIJO)
+        .order_by('-busquedas')
+        .values_list('palabra_clave', flat=True)[:limite]
+    )
@@ -1,3 +1,677 @@
-from django.test import TestCase
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from datetime import timedelta
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import call_command
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from pruebas.presupuestos import PresupuestoMixin
+from usuarios.backends import CachedModelBackend
+from .fuentes import FuenteApi, FuenteHtml
+from .models import ArticuloCacheado, PalabraPopular, ResultadoBusqueda
+from .popularidad import registrar_busqueda, volcar_busquedas
+from .sugerencias import indice, sugerir
+from .stub import GRABACIONES, iniciar_stub
+from .wikipedia import (
+    _BloqueoArchivo, _BloqueoCache, _bloqueo, _cabeceras_condicionales, _clientes_async, buscar_articulo,
+    buscar_articulo_async, buscar_articulos, buscar_articulos_async, cerrar_cliente_async, cliente_async,
+    recortar_resultados,
+)
 
-# Create your tests here.
+API = 'scraping.fuentes.FuenteApi'
+HTML = 'scraping.fuentes.FuenteHtml'
+CACHE_LOCAL = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+LENTA = 'scraping.tests.FuenteLenta'
+
+
+class FuenteLenta(FuenteApi):
+    """FuenteApi que pide las palabras que empiezan con "Lenta" a un Wikipedia lento"""
+    url_lenta = None
+
+    def url_descarga(self, palabra_clave):
+        url = super().url_descarga(palabra_clave)
+        if palabra_clave.startswith('Lenta'):
+            return url.replace(settings.WIKIPEDIA_API_URL, self.url_lenta, 1)
+        return url
+
+
+class FuentesTests(TestCase):
+    """Extracción sobre respuestas grabadas de Wikipedia"""
+
+    def test_html_y_api_extraen_el_mismo_articulo(self):
+        html = FuenteHtml().extraer((GRABACIONES / 'Sistema_solar.html').read_bytes(), 'sistema solar')
+        api = FuenteApi().extraer((GRABACIONES / 'Sistema_solar.json').read_bytes(), 'sistema solar')
+
+        self.assertEqual(html[0], 'Sistema solar')
+        self.assertEqual(len(html[2]), 3)
+        self.assertEqual(api, html)
+
+    def test_api_articulo_inexistente(self):
+        respuesta = b'{"batchcomplete":true,"query":{"pages":[{"ns":0,"title":"Xyzzy","missing":true}]}}'
+        self.assertIsNone(FuenteApi().extraer(respuesta, 'xyzzy'))
+
+
+class BuscarArticuloTests(TestCase):
+    """buscar_articulo contra un Wikipedia local que responde con las grabaciones"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.servidor = iniciar_stub(latencia=0, grabaciones=GRABACIONES)
+        cls.addClassCleanup(cls.servidor.shutdown)
+
+    def buscar(self, palabra_clave, fuentes, **opciones):
+        opciones.setdefault('WIKIPEDIA_API_URL', self.servidor.url_api)
+        with override_settings(WIKIPEDIA_URL=self.servidor.url_wiki, SCRAPING_FUENTES=fuentes, **opciones):
+            return buscar_articulo(palabra_clave)
+
+    def test_misma_forma_con_cualquier_fuente(self):
+        por_api = self.buscar('sistema solar', [API])
+        ArticuloCacheado.objects.all().delete()
+        por_html = self.buscar('sistema solar', [HTML])
+
+        self.assertEqual(por_api.keys(), por_html.keys())
+        for campo in ('titulo', 'url', 'parrafos', 'palabra_clave'):
+            self.assertEqual(por_api[campo], por_html[campo])
+
+    def test_guarda_el_articulo_en_la_cache(self):
+        resultado = self.buscar('Sistema  solar', [API])
+
+        entrada = ArticuloCacheado.objects.get(clave='sistema solar')
+        self.assertEqual(entrada.parrafos, resultado['parrafos'])
+        self.assertEqual(entrada.fuente, API)
+        # api.php no envía validadores: la entrada vencida se vuelve a descargar
+        self.assertEqual((entrada.etag, entrada.ultima_modificacion), ('', ''))
+
+    def _vencer(self):
+        ArticuloCacheado.objects.update(fecha_obtencion=timezone.now() - timedelta(days=30))
+
+    def test_revalida_con_etag_la_pagina_html(self):
+        self.buscar('sistema solar', [HTML])
+        entrada = ArticuloCacheado.objects.get()
+        self.assertEqual(entrada.fuente, HTML)
+        self.assertTrue(entrada.etag)
+
+        self._vencer()
+        with mock.patch('scraping.fuentes.FuenteHtml.extraer') as extraer:
+            resultado = self.buscar('sistema solar', [HTML])
+        # 304: no hubo que procesar la página de nuevo
+        extraer.assert_not_called()
+        self.assertEqual(resultado['parrafos'], entrada.parrafos)
+        self.assertGreater(ArticuloCacheado.objects.get().fecha_obtencion, timezone.now() - timedelta(minutes=1))
+
+    def test_validadores_solo_para_la_fuente_que_los_envio(self):
+        self.buscar('sistema solar', [HTML])
+        entrada = ArticuloCacheado.objects.get()
+        self.assertIn('If-None-Match', _cabeceras_condicionales(entrada, HTML))
+        self.assertEqual(_cabeceras_condicionales(entrada, API), {})
+
+        self._vencer()
+        self.buscar('sistema solar', [API, HTML])
+        entrada = ArticuloCacheado.objects.get()
+        self.assertEqual((entrada.fuente, entrada.etag), (API, ''))
+
+    def test_articulo_inexistente(self):
+        self.assertIsNone(self.buscar('Xyzzy', [API, HTML]))
+        self.assertIsNone(self.buscar('Xyzzy', [HTML]))
+        self.assertFalse(ArticuloCacheado.objects.exists())
+
+    def test_usa_la_fuente_de_respaldo_si_la_api_falla(self):
+        resultado = self.buscar(
+            'sistema solar', [API, HTML],
+            WIKIPEDIA_API_URL=self.servidor.url_base + '/error/api.php',
+        )
+        self.assertEqual(resultado['titulo'], 'Sistema solar')
+        self.assertEqual(len(resultado['parrafos']), 3)
+
+    def _api_sin_articulos(self):
+        # Otra "Wikipedia" cuya API responde "missing" para todo
+        vacia = iniciar_stub(latencia=0, grabaciones=self.enterContext(tempfile.TemporaryDirectory()))
+        self.addCleanup(vacia.shutdown)
+        return vacia.url_api
+
+    def test_usa_la_fuente_de_respaldo_si_la_api_no_lo_encuentra(self):
+        resultado = self.buscar('sistema solar', [API, HTML], WIKIPEDIA_API_URL=self._api_sin_articulos())
+
+        self.assertEqual(resultado['titulo'], 'Sistema solar')
+        self.assertEqual(ArticuloCacheado.objects.get().fuente, HTML)
+
+    def test_async_usa_la_fuente_de_respaldo_si_la_api_no_lo_encuentra(self):
+        async def buscar():
+            try:
+                return await buscar_articulo_async('sistema solar')
+            finally:
+                await cerrar_cliente_async()
+
+        with override_settings(WIKIPEDIA_URL=self.servidor.url_wiki, WIKIPEDIA_API_URL=self._api_sin_articulos(),
+                               SCRAPING_FUENTES=[API, HTML]):
+            resultado = async_to_sync(buscar)()
+
+        self.assertEqual(resultado['titulo'], 'Sistema solar')
+        self.assertEqual(ArticuloCacheado.objects.get().fuente, HTML)
+
+    def test_url_con_el_titulo_resuelto(self):
+        # MediaWiki normaliza "sistema  solar" a "Sistema solar": la URL es la del artículo
+        for fuente in (API, HTML):
+            with self.subTest(fuente=fuente):
+                ArticuloCacheado.objects.all().delete()
+                resultado = self.buscar('sistema  solar', [fuente])
+                self.assertEqual(resultado['url'], self.servidor.url_wiki + 'Sistema_solar')
+
+    def test_async_extrae_fuera_del_event_loop(self):
+        hilos = []
+        extraer = FuenteHtml.extraer
+
+        def extraer_registrando(fuente, contenido, palabra_clave):
+            hilos.append(threading.get_ident())
+            return extraer(fuente, contenido, palabra_clave)
+
+        async def buscar():
+            resultado = await buscar_articulo_async('sistema solar')
+            await cerrar_cliente_async()
+            return resultado, threading.get_ident()
+
+        with override_settings(WIKIPEDIA_URL=self.servidor.url_wiki, SCRAPING_FUENTES=[HTML]), \
+                mock.patch.object(FuenteHtml, 'extraer', extraer_registrando):
+            resultado, hilo_loop = async_to_sync(buscar)()
+
+        self.assertEqual(resultado['titulo'], 'Sistema solar')
+        self.assertEqual(len(hilos), 1)
+        self.assertNotEqual(hilos[0], hilo_loop)
+
+
+@override_settings(CACHES=CACHE_LOCAL, SCRAPING_FUENTES=[LENTA], SCRAPING_HILOS=2, SCRAPING_TIMEOUT=0.2,
+                   SCRAPING_TIMEOUT_TOTAL=5)
+class BuscarVariasTests(TransactionTestCase):
+    """Una palabra que supera su SCRAPING_TIMEOUT no impide devolver las demás
+
+    TransactionTestCase: cada hilo de buscar_articulos usa su propia conexión a la base.
+    Con dos hilos "Luna" empieza cuando termina "Sol" mientras "Lenta" sigue esperando: la
+    base en memoria de los tests (shared cache) no espera busy_timeout entre escrituras.
+    """
+
+    PALABRAS = ['Sol', 'Lenta', 'Luna']
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.servidor = iniciar_stub(latencia=0)
+        cls.lento = iniciar_stub(latencia=1)
+        cls.addClassCleanup(cls.servidor.shutdown)
+        cls.addClassCleanup(cls.lento.shutdown)
+
+    def setUp(self):
+        self.enterContext(override_settings(WIKIPEDIA_URL=self.servidor.url_wiki,
+                                            WIKIPEDIA_API_URL=self.servidor.url_api))
+        self.enterContext(mock.patch.object(FuenteLenta, 'url_lenta', self.lento.url_api))
+
+    def assertParciales(self, busquedas, inicio):
+        # Se espera a la lenta solo lo que dura su timeout (con reintentos), no la latencia entera
+        self.assertLess(time.monotonic() - inicio, 5)
+        self.assertEqual([palabra for palabra, _, _ in busquedas], self.PALABRAS)
+        (_, sol, sin_error_sol), (_, lenta, error), (_, luna, sin_error_luna) = busquedas
+        self.assertEqual((sol['titulo'], luna['titulo']), ('Sol', 'Luna'))
+        self.assertEqual((sin_error_sol, sin_error_luna), (None, None))
+        self.assertIsNone(lenta)
+        self.assertTrue(error)
+
+    def test_hilos(self):
+        inicio = time.monotonic()
+        self.assertParciales(buscar_articulos(self.PALABRAS), inicio)
+
+    def test_async(self):
+        async def buscar():
+            try:
+                return await buscar_articulos_async(self.PALABRAS)
+            finally:
+                await cerrar_cliente_async()
+
+        inicio = time.monotonic()
+        self.assertParciales(async_to_sync(buscar)(), inicio)
+
+
+class RecortarResultadosTests(TestCase):
+    """Los resultados guardados para enviar por correo se eliminan pasados SCRAPING_RESULTADOS_DIAS"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.docente = User.objects.create_user(username='docente', password='x')
+
+    def crear(self, palabra_clave, dias):
+        resultado = ResultadoBusqueda.objects.create(
+            usuario=self.docente, palabra_clave=palabra_clave, titulo=palabra_clave, url=f'https://es.wikipedia.org/wiki/{palabra_clave}',
+            parrafos=[], fecha_obtencion=timezone.now(),
+        )
+        # fecha_creacion es auto_now_add: se retrocede con update
+        ResultadoBusqueda.objects.filter(pk=resultado.pk).update(fecha_creacion=timezone.now() - timedelta(days=dias))
+        return resultado
+
+    @override_settings(SCRAPING_RESULTADOS_DIAS=7)
+    def test_elimina_solo_los_vencidos(self):
+        self.crear('Sol', 10)
+        self.crear('Luna', 8)
+        reciente = self.crear('Marte', 1)
+        self.assertEqual(recortar_resultados(), 2)
+        self.assertEqual(list(ResultadoBusqueda.objects.values_list('pk', flat=True)), [reciente.pk])
+
+    @override_settings(SCRAPING_RESULTADOS_DIAS=7)
+    def test_calentar_cache_recorta(self):
+        self.crear('Sol', 10)
+        salida = StringIO()
+        call_command('calentar_cache', stdout=salida)
+        self.assertFalse(ResultadoBusqueda.objects.exists())
+        self.assertIn('1 resultados de búsqueda vencidos eliminados', salida.getvalue())
+
+
+class BloqueoCompartidoTests(SimpleTestCase):
+    """El bloqueo entre workers solo usa la caché si su add es atómico"""
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = override_settings(SCRAPING_BLOQUEO_DIR=os.path.join(directorio.name, 'bloqueos'), SCRAPING_TIMEOUT=10)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def test_backend_segun_la_cache(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                                                   'LOCATION': tempfile.gettempdir()}}):
+            self.assertIsInstance(_bloqueo('sol'), _BloqueoArchivo)
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                                                   'LOCATION': 'redis://127.0.0.1:6379/0'}}):
+            self.assertIsInstance(_bloqueo('sol'), _BloqueoCache)
+
+    def test_archivo_excluyente(self):
+        # Dos workers: el segundo no lo obtiene hasta que el primero lo suelta
+        primero, segundo = _BloqueoArchivo('scraping:descarga:sol'), _BloqueoArchivo('scraping:descarga:sol')
+        self.assertTrue(primero.tomar())
+        self.assertFalse(segundo.tomar())
+        self.assertTrue(segundo.ocupado())
+        primero.soltar()
+        self.assertFalse(segundo.ocupado())
+        self.assertTrue(segundo.tomar())
+
+    def _vencer(self, bloqueo):
+        viejo = time.time() - 21
+        os.utime(bloqueo.ruta, (viejo, viejo))
+
+    def test_archivo_vencido(self):
+        # Un worker que murió con el bloqueo tomado no lo retiene más que SCRAPING_TIMEOUT * 2
+        abandonado = _BloqueoArchivo('scraping:descarga:sol')
+        self.assertTrue(abandonado.tomar())
+        self._vencer(abandonado)
+        self.assertTrue(_BloqueoArchivo('scraping:descarga:sol').tomar())
+
+    def test_archivo_solo_lo_suelta_su_dueno(self):
+        # La descarga de "lento" tardó más que el vencimiento y otro worker tomó el bloqueo
+        lento, nuevo = _BloqueoArchivo('scraping:descarga:sol'), _BloqueoArchivo('scraping:descarga:sol')
+        self.assertTrue(lento.tomar())
+        self._vencer(lento)
+        self.assertTrue(nuevo.tomar())
+        lento.soltar()
+        self.assertTrue(nuevo.ocupado())
+        self.assertFalse(_BloqueoArchivo('scraping:descarga:sol').tomar())
+        nuevo.soltar()
+        self.assertFalse(nuevo.ocupado())
+        self.assertEqual(os.listdir(settings.SCRAPING_BLOQUEO_DIR), [])
+
+    def test_romper_un_vencido_no_borra_el_que_se_tomo_despues(self):
+        # Dos workers ven vencido el mismo bloqueo: el segundo lee el token viejo, pero
+        # cuando llega a quitarlo el primero ya lo rompió y tomó uno nuevo
+        abandonado = _BloqueoArchivo('scraping:descarga:sol')
+        abandonado.tomar()
+        self._vencer(abandonado)
+        primero = _BloqueoArchivo('scraping:descarga:sol')
+        self.assertTrue(primero.tomar())
+        _BloqueoArchivo('scraping:descarga:sol')._quitar(abandonado.token)
+        self.assertTrue(primero.ocupado())
+        self.assertFalse(_BloqueoArchivo('scraping:descarga:sol').tomar())
+        self.assertEqual(os.listdir(settings.SCRAPING_BLOQUEO_DIR), [os.path.basename(primero.ruta)])
+
+    @override_settings(CACHES=CACHE_LOCAL)
+    def test_cache_solo_lo_suelta_su_dueno(self):
+        lento, nuevo = _BloqueoCache('scraping:descarga:sol'), _BloqueoCache('scraping:descarga:sol')
+        self.assertTrue(lento.tomar())
+        cache.delete(lento.llave)  # venció
+        self.assertTrue(nuevo.tomar())
+        lento.soltar()
+        self.assertTrue(nuevo.ocupado())
+        self.assertFalse(_BloqueoCache('scraping:descarga:sol').tomar())
+        nuevo.soltar()
+        self.assertFalse(nuevo.ocupado())
+
+    @override_settings(CACHES=CACHE_LOCAL)
+    def test_cache_solo_lo_suelta_su_dueno_async(self):
+        async def probar():
+            lento, nuevo = _BloqueoCache('scraping:descarga:sol'), _BloqueoCache('scraping:descarga:sol')
+            self.assertTrue(await lento.atomar())
+            await cache.adelete(lento.llave)
+            self.assertTrue(await nuevo.atomar())
+            await lento.asoltar()
+            self.assertTrue(await nuevo.aocupado())
+            await nuevo.asoltar()
+            self.assertFalse(await nuevo.aocupado())
+        async_to_sync(probar)()
+
+
+class BusquedasSimultaneasTests(SimpleTestCase):
+    """Las búsquedas simultáneas de la misma palabra en un proceso hacen una sola descarga"""
+
+    PALABRAS = ['Sistema solar', 'sistema solar', '  SISTEMA  solar '] * 4
+
+    def test_hilos(self):
+        descargas = []
+        barrera = threading.Barrier(len(self.PALABRAS))
+
+        def buscar_lento(palabra_clave):
+            descargas.append(palabra_clave)
+            time.sleep(0.2)
+            return {'titulo': 'Sistema solar', 'palabra_clave': palabra_clave}
+
+        def buscar(palabra_clave):
+            barrera.wait()
+            return buscar_articulo(palabra_clave)
+
+        with mock.patch('scraping.wikipedia._buscar_articulo', side_effect=buscar_lento), \
+                ThreadPoolExecutor(len(self.PALABRAS)) as executor:
+            resultados = list(executor.map(buscar, self.PALABRAS))
+
+        self.assertEqual(len(descargas), 1)
+        # Cada petición recibe el resultado compartido con la palabra tal como la escribió
+        self.assertEqual([r['palabra_clave'] for r in resultados], self.PALABRAS)
+        self.assertEqual({r['titulo'] for r in resultados}, {'Sistema solar'})
+
+    def test_hilos_comparten_el_error(self):
+        descargas = []
+        barrera = threading.Barrier(4)
+
+        def falla(palabra_clave):
+            descargas.append(palabra_clave)
+            time.sleep(0.2)
+            raise ConnectionError('Wikipedia no responde')
+
+        def buscar(palabra_clave):
+            barrera.wait()
+            try:
+                return buscar_articulo(palabra_clave)
+            except ConnectionError as e:
+                return e
+
+        with mock.patch('scraping.wikipedia._buscar_articulo', side_effect=falla), ThreadPoolExecutor(4) as executor:
+            errores = list(executor.map(buscar, ['Sol'] * 4))
+        self.assertEqual(len(descargas), 1)
+        self.assertTrue(all(isinstance(error, ConnectionError) for error in errores))
+
+    def test_async(self):
+        descargas = []
+
+        async def buscar_lento(palabra_clave):
+            descargas.append(palabra_clave)
+            await asyncio.sleep(0.2)
+            return {'titulo': 'Sistema solar', 'palabra_clave': palabra_clave}
+
+        async def buscar_todas():
+            return await asyncio.gather(*(buscar_articulo_async(palabra) for palabra in self.PALABRAS))
+
+        with mock.patch('scraping.wikipedia._buscar_articulo_async', side_effect=buscar_lento):
+            resultados = async_to_sync(buscar_todas)()
+
+        self.assertEqual(len(descargas), 1)
+        self.assertEqual([r['palabra_clave'] for r in resultados], self.PALABRAS)
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class VistaBusquedaTests(TestCase):
+    """La barra y los redireccionamientos llevan a la búsqueda que corresponde al servidor"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.docente = User.objects.create_user('docente', 'docente@example.com')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.docente)
+
+    def test_wsgi_usa_la_sincrona(self):
+        response = self.client.get(reverse('dashboard'))
+        self.assertContains(response, f'href="{reverse("buscar_contenido")}"')
+
+        response = self.client.post(reverse('enviar_resultados'), {'resultado_id': ''})
+        self.assertRedirects(response, reverse('buscar_contenido'), fetch_redirect_response=False)
+
+    async def test_asgi_usa_la_async(self):
+        await self.async_client.aforce_login(self.docente)
+
+        response = await self.async_client.get(reverse('buscar_contenido_async'))
+        self.assertContains(response, f'href="{reverse("buscar_contenido_async")}"')
+
+        response = await self.async_client.post(reverse('enviar_resultados'), {'resultado_id': ''})
+        self.assertRedirects(response, reverse('buscar_contenido_async'), fetch_redirect_response=False)
+
+    def test_async_servida_por_wsgi_cierra_su_cliente(self):
+        with mock.patch('scraping.views.cerrar_cliente_async', side_effect=cerrar_cliente_async) as cerrar:
+            self.client.get(reverse('buscar_contenido_async'))
+        cerrar.assert_awaited_once()
+
+    async def test_async_servida_por_asgi_conserva_su_cliente(self):
+        await self.async_client.aforce_login(self.docente)
+        with mock.patch('scraping.views.cerrar_cliente_async') as cerrar:
+            await self.async_client.get(reverse('buscar_contenido_async'))
+        cerrar.assert_not_awaited()
+
+    def test_cerrar_cliente_async(self):
+        async def abrir_y_cerrar():
+            cliente = cliente_async()
+            await cerrar_cliente_async()
+            return cliente, asyncio.get_running_loop() in _clientes_async
+
+        cliente, sigue = async_to_sync(abrir_y_cerrar)()
+        self.assertTrue(cliente.is_closed)
+        self.assertFalse(sigue)
+
+
+@override_settings(CACHES=CACHE_LOCAL, EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class EnviarResultadosTests(TestCase):
+    """enviar_resultados solo acepta el id de un resultado propio"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.docente = User.objects.create_user('docente', 'docente@example.com')
+
+    def setUp(self):
+        self.client.force_login(self.docente)
+
+    def test_id_invalido(self):
+        # '²' e '¹' pasan str.isdigit() pero int() los rechaza
+        for resultado_id in ['', 'abc', '²', '1²', '-1']:
+            with self.subTest(resultado_id=resultado_id):
+                response = self.client.post(reverse('enviar_resultados'), {'resultado_id': resultado_id})
+                self.assertRedirects(response, reverse('buscar_contenido'), fetch_redirect_response=False)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_resultado_de_otro_usuario(self):
+        otro = User.objects.create_user('otro', 'otro@example.com')
+        resultado = ResultadoBusqueda.objects.create(
+            usuario=otro, palabra_clave='Sol', titulo='Sol', url='https://es.wikipedia.org/wiki/Sol',
+            parrafos=[], fecha_obtencion=timezone.now(),
+        )
+        response = self.client.post(reverse('enviar_resultados'), {'resultado_id': resultado.pk})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(len(mail.outbox), 0)
+
+
+class SugerenciasTests(TestCase):
+    """Autocompletado de palabras clave desde memoria y desde la base"""
+
+    def setUp(self):
+        for palabra, busquedas, encontrada in [
+            ('Sistema solar', 40, True), ('Sistema nervioso', 90, True),
+            ('Sistema métrico', 5, True), ('Sistemaa', 100, False), ('Sol', 70, True),
+        ]:
+            PalabraPopular.objects.create(
+                clave=palabra.casefold(), palabra_clave=palabra, busquedas=busquedas,
+                encontrada=encontrada, ultima_busqueda=timezone.now(),
+            )
+        indice.cargar()
+
+    def test_prefijo_ordenado_por_popularidad(self):
+        self.assertEqual(sugerir('  SISTEMA ', 2), ['Sistema nervioso', 'Sistema solar'])
+        self.assertEqual(sugerir('s', 8), [])
+
+    def test_base_y_memoria_coinciden(self):
+        en_memoria = sugerir('sis', 8)
+        with override_settings(SCRAPING_SUGERENCIAS_EN_MEMORIA=False):
+            self.assertEqual(sugerir('sis', 8), en_memoria)
+        self.assertNotIn('Sistemaa', en_memoria)
+
+    def test_endpoint_json(self):
+        self.client.force_login(User.objects.create_user('docente', 'docente@example.com'))
+        response = self.client.get(reverse('sugerencias'), {'q': 'so'})
+        self.assertEqual(response.json(), {'sugerencias': ['Sol']})
+
+
+@override_settings(SCRAPING_POPULARIDAD_LOTE=1000, SCRAPING_POPULARIDAD_INTERVALO=3600)
+class PopularidadTests(TestCase):
+    """Los contadores en memoria se suman a PalabraPopular de a lotes"""
+
+    def setUp(self):
+        # Lo que hayan dejado pendiente otros tests no cuenta
+        volcar_busquedas()
+        PalabraPopular.objects.all().delete()
+
+    def test_los_volcados_se_suman(self):
+        registrar_busqueda('Sol')
+        registrar_busqueda('sol', encontrada=True)
+        registrar_busqueda('Luna')
+        with self.assertNumQueries(1 + 2):  # un único INSERT ... ON CONFLICT, en su transacción
+            self.assertEqual(volcar_busquedas(), 2)
+
+        registrar_busqueda('  SOL ')
+        registrar_busqueda('Sol')
+        registrar_busqueda('Sol')
+        self.assertEqual(volcar_busquedas(), 1)
+
+        sol = PalabraPopular.objects.get(clave='sol')
+        self.assertEqual((sol.busquedas, sol.encontrada, sol.palabra_clave), (5, True, 'Sol'))
+        luna = PalabraPopular.objects.get(clave='luna')
+        self.assertEqual((luna.busquedas, luna.encontrada), (1, False))
+        self.assertEqual(volcar_busquedas(), 0)
+
+    @override_settings(SCRAPING_POPULARIDAD_LOTE=3)
+    def test_vuelca_al_completar_el_lote(self):
+        registrar_busqueda('Sol')
+        registrar_busqueda('Sol')
+        self.assertFalse(PalabraPopular.objects.exists())
+        registrar_busqueda('Luna')
+        self.assertEqual(dict(PalabraPopular.objects.values_list('clave', 'busquedas')), {'sol': 2, 'luna': 1})
+
+
+class CalentarCacheTests(TestCase):
+    """calentar_cache revalida solo los artículos populares que están por vencer"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.servidor = iniciar_stub(latencia=0)
+        cls.addClassCleanup(cls.servidor.shutdown)
+
+    def setUp(self):
+        self.enterContext(override_settings(WIKIPEDIA_URL=self.servidor.url_wiki,
+                                            WIKIPEDIA_API_URL=self.servidor.url_api))
+        for palabra, busquedas in [('Sol', 10), ('Luna', 5)]:
+            buscar_articulo(palabra)
+            PalabraPopular.objects.create(clave=palabra.casefold(), palabra_clave=palabra, busquedas=busquedas,
+                                          encontrada=True, ultima_busqueda=timezone.now())
+
+    def test_refresca_los_vencidos(self):
+        vencida = timezone.now() - timedelta(seconds=settings.SCRAPING_CACHE_TTL + 60)
+        ArticuloCacheado.objects.filter(clave='sol').update(fecha_obtencion=vencida)
+        al_dia = ArticuloCacheado.objects.get(clave='luna').fecha_obtencion
+
+        salida = StringIO()
+        call_command('calentar_cache', stdout=salida)
+
+        self.assertGreater(ArticuloCacheado.objects.get(clave='sol').fecha_obtencion,
+                           timezone.now() - timedelta(minutes=1))
+        self.assertEqual(ArticuloCacheado.objects.get(clave='luna').fecha_obtencion, al_dia)
+        self.assertIn('2 palabras populares: 1 revalidadas, 1 al día, 0 con error', salida.getvalue())
+
+    def test_margen_adelanta_los_que_estan_por_vencer(self):
+        por_vencer = timezone.now() - timedelta(seconds=settings.SCRAPING_CACHE_TTL - 60)
+        ArticuloCacheado.objects.update(fecha_obtencion=por_vencer)
+
+        salida = StringIO()
+        call_command('calentar_cache', '--cantidad', '1', '--margen', '120', stdout=salida)
+
+        # Solo la más buscada, aunque la otra también esté por vencer
+        self.assertGreater(ArticuloCacheado.objects.get(clave='sol').fecha_obtencion, por_vencer)
+        self.assertEqual(ArticuloCacheado.objects.get(clave='luna').fecha_obtencion, por_vencer)
+        self.assertIn('1 palabras populares: 1 revalidadas', salida.getvalue())
+
+
+@override_settings(
+    CACHES=CACHE_LOCAL,
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    SCRAPING_POPULARIDAD_LOTE=1000,
+    SCRAPING_POPULARIDAD_INTERVALO=3600,
+)
+class PresupuestoScrapingTests(PresupuestoMixin, TestCase):
+    """Consultas, tamaño y tiempo máximos de cada URL de scraping/urls.py (Wikipedia local)"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.servidor = iniciar_stub(latencia=0)
+        cls.addClassCleanup(cls.servidor.shutdown)
+
+    def setUp(self):
+        cache.clear()
+        self.docente = User.objects.create_user('docente', 'docente@example.com')
+        self.client.force_login(self.docente)
+        CachedModelBackend().get_user(self.docente.pk)
+        self.enterContext(override_settings(WIKIPEDIA_URL=self.servidor.url_wiki,
+                                            WIKIPEDIA_API_URL=self.servidor.url_api))
+
+    def test_buscar_contenido(self):
+        url = reverse('buscar_contenido')
+        self.assertPresupuesto(lambda: self.client.get(url), consultas=0, kb=30, ms=200, calentar=True)
+        # Artículo nuevo: consulta la caché, lo guarda, controla su tamaño y guarda el resultado del usuario
+        self.assertPresupuesto(lambda: self.client.post(url, {'palabra_clave': 'Fotosíntesis'}),
+                               consultas=9, kb=40, ms=500)
+        # Ya cacheado: no sale a Wikipedia
+        self.assertPresupuesto(lambda: self.client.post(url, {'palabra_clave': 'Fotosíntesis'}),
+                               consultas=2, kb=40, ms=200)
+
+    def test_buscar_contenido_async_varias_palabras(self):
+        url = reverse('buscar_contenido_async')
+        self.assertPresupuesto(lambda: self.client.get(url), consultas=0, kb=30, ms=200, calentar=True)
+        palabras = ', '.join(f'Tema {i}' for i in range(5))
+        # 8 consultas por palabra nueva y un único INSERT para todos los resultados
+        self.assertPresupuesto(lambda: self.client.post(url, {'palabras_clave': palabras}),
+                               consultas=5 * 8 + 1, kb=80, ms=1500)
+
+    def test_sugerencias(self):
+        url = reverse('sugerencias')
+        self.assertPresupuesto(lambda: self.client.get(url, {'q': 'fo'}), consultas=0, kb=2, ms=50, calentar=True)
+
+    def test_enviar_resultados(self):
+        resultado = ResultadoBusqueda.objects.create(
+            usuario=self.docente, palabra_clave='Sol', titulo='Sol', url='https://es.wikipedia.org/wiki/Sol',
+            parrafos=['El Sol es una estrella.'], fecha_obtencion=timezone.now(),
+        )
+        response, _ = self.assertPresupuesto(
+            lambda: self.client.post(reverse('enviar_resultados'), {'resultado_id': resultado.pk}),
+            consultas=1, ms=200,
+        )
+        self.assertEqual(len(mail.outbox), 1)
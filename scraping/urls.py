@@ -3,6 +3,8 @@ from . import views
 
 urlpatterns = [
     path('buscar/', views.buscar_contenido, name='buscar_contenido'),
+    path('buscar/async/', views.buscar_contenido_async, name='buscar_contenido_async'),
+    path('sugerencias/', views.sugerencias, name='sugerencias'),
     path('enviar-resultados/', views.enviar_resultados, name='enviar_resultados'),
 ]
 
@@ -1,89 +1,191 @@
-from django.shortcuts import render, redirect
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.shortcuts import render, redirect, get_object_or_404
+from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.mail import EmailMessage
 from django.conf import settings
-from bs4 import BeautifulSoup
-import requests
-from .forms import BusquedaForm
+from .forms import BusquedaForm, BusquedaMultipleForm
+from .models import ResultadoBusqueda
+from .popularidad import registrar_busqueda
+from .sugerencias import sugerir
+from .wikipedia import (
+    buscar_articulo, buscar_articulos, buscar_articulo_async, buscar_articulos_async, cerrar_cliente_async,
+)
+
+def vista_busqueda(request):
+    """Nombre de la vista de búsqueda que corresponde al servidor que atiende la petición
+
+    Bajo WSGI cada petición a una vista async corre en un event loop propio: no hay
+    nada que compartir con otras peticiones, así que ahí se usa la versión síncrona.
+    """
+    return 'buscar_contenido_async' if isinstance(request, ASGIRequest) else 'buscar_contenido'
+
+def _resultados_multiples(request, busquedas):
+    """Junta los resultados de una búsqueda múltiple e informa lo que no se encontró o falló"""
+    resultados = []
+    no_encontradas = []
+    errores = []
+    for palabra_clave, resultado, error in busquedas:
+        if resultado:
+            resultados.append(resultado)
+        elif error:
+            errores.append(f'{palabra_clave} ({error})')
+        else:
+            no_encontradas.append(palabra_clave)
+    
+    if resultados:
+        messages.success(request, f'Búsqueda realizada exitosamente para {len(resultados)} palabra(s) clave.')
+    if no_encontradas:
+        messages.warning(request, f'No se encontraron resultados en Wikipedia para: {", ".join(no_encontradas)}')
+    if errores:
+        messages.error(request, f'Error al realizar la búsqueda de: {", ".join(errores)}')
+    return resultados
+
+def _registrar_busquedas(busquedas):
+    """Suma cada (palabra_clave, resultado) al contador de popularidad y a las sugerencias"""
+    for palabra_clave, resultado in busquedas:
+        registrar_busqueda(palabra_clave, encontrada=resultado is not None)
 
 @login_required
 def buscar_contenido(request):
     """Vista para realizar scraping educativo"""
     resultados = []
     
-    if request.method == 'POST':
+    form = BusquedaForm()
+    form_multiple = BusquedaMultipleForm()
+    
+    if request.method == 'POST' and 'palabras_clave' in request.POST:
+        form_multiple = BusquedaMultipleForm(request.POST)
+        if form_multiple.is_valid():
+            # Las palabras se buscan en paralelo; lo que no llega a tiempo se informa aparte
+            busquedas = buscar_articulos(form_multiple.cleaned_data['palabras_clave'])
+            _registrar_busquedas((palabra_clave, resultado) for palabra_clave, resultado, _ in busquedas)
+            resultados = _resultados_multiples(request, busquedas)
+    elif request.method == 'POST':
         form = BusquedaForm(request.POST)
         if form.is_valid():
             palabra_clave = form.cleaned_data['palabra_clave']
+            resultado = None
             
-            # Realizar scraping en Wikipedia (ejemplo educativo)
+            # Realizar scraping en Wikipedia (ejemplo educativo), pasando por la caché
             try:
-                url = f"https://es.wikipedia.org/wiki/{palabra_clave.replace(' ', '_')}"
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                }
-                response = requests.get(url, headers=headers, timeout=10)
+                resultado = buscar_articulo(palabra_clave)
                 
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    
-                    # Extraer título
-                    titulo = soup.find('h1', class_='firstHeading')
-                    titulo_texto = titulo.text if titulo else 'No encontrado'
-                    
-                    # Extraer párrafos principales
-                    contenido = soup.find('div', class_='mw-parser-output')
-                    parrafos = []
-                    if contenido:
-                        for p in contenido.find_all('p', limit=5):
-                            texto = p.get_text().strip()
-                            if texto and len(texto) > 50:
-                                parrafos.append(texto)
-                    
-                    resultados.append({
-                        'titulo': titulo_texto,
-                        'url': url,
-                        'parrafos': parrafos[:3],  # Primeros 3 párrafos
-                        'palabra_clave': palabra_clave
-                    })
-                    
+                if resultado:
+                    resultados.append(resultado)
                     messages.success(request, f'Búsqueda realizada exitosamente para: {palabra_clave}')
                 else:
                     messages.warning(request, 'No se encontraron resultados en Wikipedia. Intenta con otra palabra clave.')
                     
             except Exception as e:
                 messages.error(request, f'Error al realizar la búsqueda: {str(e)}')
-    else:
-        form = BusquedaForm()
+            _registrar_busquedas([(palabra_clave, resultado)])
+    
+    # Los resultados quedan guardados: el formulario de envío solo manda su id
+    resultados = ResultadoBusqueda.objects.bulk_create(
+        [ResultadoBusqueda(usuario=request.user, **resultado) for resultado in resultados]
+    )
     
     return render(request, 'scraping/buscar.html', {
         'form': form,
+        'form_multiple': form_multiple,
         'resultados': resultados
     })
 
+@login_required
+async def buscar_contenido_async(request):
+    """Versión asíncrona de buscar_contenido
+
+    Servida por ASGI (uvicorn), mientras espera a Wikipedia el worker sigue atendiendo
+    otras peticiones en lugar de quedar bloqueado hasta SCRAPING_TIMEOUT.
+    """
+    try:
+        return await _buscar_contenido_async(request)
+    finally:
+        if not isinstance(request, ASGIRequest):
+            # Servida por WSGI el loop termina con la petición: su cliente httpx también
+            await cerrar_cliente_async()
+
+async def _buscar_contenido_async(request):
+    usuario = await request.auser()
+    resultados = []
+    
+    form = BusquedaForm()
+    form_multiple = BusquedaMultipleForm()
+    
+    if request.method == 'POST' and 'palabras_clave' in request.POST:
+        form_multiple = BusquedaMultipleForm(request.POST)
+        if form_multiple.is_valid():
+            busquedas = await buscar_articulos_async(form_multiple.cleaned_data['palabras_clave'])
+            await sync_to_async(_registrar_busquedas)(
+                [(palabra_clave, resultado) for palabra_clave, resultado, _ in busquedas]
+            )
+            resultados = _resultados_multiples(request, busquedas)
+    elif request.method == 'POST':
+        form = BusquedaForm(request.POST)
+        if form.is_valid():
+            palabra_clave = form.cleaned_data['palabra_clave']
+            resultado = None
+            
+            try:
+                resultado = await buscar_articulo_async(palabra_clave)
+                
+                if resultado:
+                    resultados.append(resultado)
+                    messages.success(request, f'Búsqueda realizada exitosamente para: {palabra_clave}')
+                else:
+                    messages.warning(request, 'No se encontraron resultados en Wikipedia. Intenta con otra palabra clave.')
+                    
+            except Exception as e:
+                messages.error(request, f'Error al realizar la búsqueda: {str(e)}')
+            await sync_to_async(_registrar_busquedas)([(palabra_clave, resultado)])
+    
+    resultados = await ResultadoBusqueda.objects.abulk_create(
+        [ResultadoBusqueda(usuario=usuario, **resultado) for resultado in resultados]
+    )
+    
+    # render() usa los context processors (request.user, mensajes): es código síncrono
+    return await sync_to_async(render)(request, 'scraping/buscar.html', {
+        'form': form,
+        'form_multiple': form_multiple,
+        'resultados': resultados
+    })
+
+@login_required
+def sugerencias(request):
+    """Palabras clave que ya se encontraron en Wikipedia y empiezan con ?q= (autocompletado)"""
+    response = JsonResponse({
+        'sugerencias': sugerir(request.GET.get('q', ''), settings.SCRAPING_SUGERENCIAS_LIMITE),
+    })
+    response['Cache-Control'] = 'private, max-age=60'
+    return response
+
 @login_required
 def enviar_resultados(request):
     """Envía los resultados del scraping por correo"""
     if request.method == 'POST':
-        palabra_clave = request.POST.get('palabra_clave')
-        titulo = request.POST.get('titulo')
-        url = request.POST.get('url')
-        parrafos = request.POST.getlist('parrafos')
+        resultado_id = request.POST.get('resultado_id', '')
+        if not resultado_id.isdecimal():
+            messages.error(request, 'No se indicó qué resultado enviar.')
+            return redirect(vista_busqueda(request))
+        resultado = get_object_or_404(ResultadoBusqueda, pk=resultado_id, usuario=request.user)
+        palabra_clave = resultado.palabra_clave
         
         # Construir contenido del correo
         contenido = f"Resultados de búsqueda para: {palabra_clave}\n\n"
-        contenido += f"Título: {titulo}\n"
-        contenido += f"URL: {url}\n\n"
+        contenido += f"Título: {resultado.titulo}\n"
+        contenido += f"URL: {resultado.url}\n\n"
         contenido += "Contenido encontrado:\n"
         contenido += "-" * 50 + "\n"
-        for i, parrafo in enumerate(parrafos, 1):
+        for i, parrafo in enumerate(resultado.parrafos, 1):
             contenido += f"\n{i}. {parrafo}\n"
         
         # Validar que el usuario tenga email
         if not request.user.email:
             messages.error(request, 'Error: No tienes un correo electrónico registrado. Ve a /admin y agrega tu correo en tu perfil de usuario.')
-            return redirect('buscar_contenido')
+            return redirect(vista_busqueda(request))
         
         # Validar que esté configurado el correo (console está permitido para desarrollo)
         if 'filebased' in str(settings.EMAIL_BACKEND):
@@ -92,7 +194,7 @@ def enviar_resultados(request):
                 '1. Abre sistema_educativo/settings.py\n'
                 '2. Configura EMAIL_BACKEND (puede ser console para desarrollo o smtp para producción)\n'
                 '3. Reinicia el servidor')
-            return redirect('buscar_contenido')
+            return redirect(vista_busqueda(request))
         
         try:
             from_email = settings.DEFAULT_FROM_EMAIL if settings.DEFAULT_FROM_EMAIL else settings.EMAIL_HOST_USER
@@ -117,4 +219,4 @@ def enviar_resultados(request):
             else:
                 messages.error(request, f'❌ Error al enviar el correo: {error_msg}')
     
-    return redirect('buscar_contenido')
+    return redirect(vista_busqueda(request))
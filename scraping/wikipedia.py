@@ -0,0 +1,626 @@
+import asyncio
+import contextvars
+import hashlib
+import os
+import threading
+import time
+import uuid
+import weakref
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from contextlib import asynccontextmanager, contextmanager
+from datetime import timedelta
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.db import DatabaseCache
+from django.core.cache.backends.memcached import BaseMemcachedCache
+from django.core.cache.backends.redis import RedisCache
+from django.db import connections
+from django.utils import timezone
+from sistema_educativo.metricas import medir
+from .fuentes import fuentes, normalizar
+from .models import ArticuloCacheado, ResultadoBusqueda
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+# requests y httpx se importan al crear la sesión o el cliente: cada worker carga solo
+# el que usa (sync o ASGI) y ninguno si nunca busca en Wikipedia
+_sesion = None
+_sesion_lock = threading.Lock()
+_clientes_async = weakref.WeakKeyDictionary()
+
+# Búsquedas en curso por clave: las concurrentes de la misma palabra esperan a la primera
+_en_curso = {}
+_en_curso_lock = threading.Lock()
+_en_curso_async = weakref.WeakKeyDictionary()
+
+ESPERA_BLOQUEO = 0.05  # segundos entre consultas al bloqueo compartido
+
+
+def sesion():
+    """Sesión HTTP compartida por todo el proceso
+
+    Reutiliza las conexiones keep-alive (y el handshake TLS) entre búsquedas y reintenta
+    los errores transitorios. No guarda cookies, así que compartirla entre hilos no
+    mezcla estado: el pool de conexiones de urllib3 es seguro entre hilos.
+    """
+    global _sesion
+    if _sesion is None:
+        with _sesion_lock:
+            if _sesion is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+
+                reintentos = Retry(
+                    total=settings.SCRAPING_REINTENTOS,
+                    backoff_factor=0.3,
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods=['GET'],
+                )
+                adaptador = HTTPAdapter(
+                    pool_connections=4,
+                    pool_maxsize=settings.SCRAPING_CONEXIONES,
+                    max_retries=reintentos,
+                )
+                nueva = requests.Session()
+                nueva.headers.update(HEADERS)
+                nueva.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                nueva.mount('https://', adaptador)
+                nueva.mount('http://', adaptador)
+                _sesion = nueva
+    return _sesion
+
+
+def cliente_async():
+    """Cliente HTTP asíncrono compartido por las vistas que corren en el mismo event loop
+
+    Es el equivalente de sesión() para el camino ASGI: mantiene hasta
+    SCRAPING_CONEXIONES_ASYNC conexiones abiertas, así un solo proceso puede tener
+    cientos de descargas en curso. httpx ata el cliente al loop, por eso hay uno por loop.
+    """
+    loop = asyncio.get_running_loop()
+    cliente = _clientes_async.get(loop)
+    if cliente is None:
+        import httpx
+
+        cliente = httpx.AsyncClient(
+            headers=HEADERS,
+            timeout=settings.SCRAPING_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.SCRAPING_CONEXIONES_ASYNC,
+                max_keepalive_connections=settings.SCRAPING_CONEXIONES,
+            ),
+            # httpx solo reintenta los errores de conexión (no los 5xx como urllib3)
+            transport=httpx.AsyncHTTPTransport(retries=settings.SCRAPING_REINTENTOS),
+            cookies=CookieJar(DefaultCookiePolicy(allowed_domains=[])),
+        )
+        _clientes_async[loop] = cliente
+    return cliente
+
+
+async def cerrar_cliente_async():
+    """Cierra el cliente del event loop actual, si lo hay
+
+    Bajo ASGI el loop vive lo que el worker y el cliente se reutiliza; fuera de él (una
+    vista async servida por WSGI, un comando) cada loop termina con su tarea y hay que
+    cerrar el cliente para no dejar sus conexiones abiertas.
+    """
+    cliente = _clientes_async.pop(asyncio.get_running_loop(), None)
+    if cliente is not None:
+        await cliente.aclose()
+
+
+def clave_cache(palabra_clave):
+    """Clave con la que se cachea una búsqueda ("  Sistema  solar" == "sistema solar")"""
+    return normalizar(palabra_clave).casefold()
+
+
+def _resultado(entrada, palabra_clave):
+    return {
+        'titulo': entrada.titulo,
+        'url': entrada.url,
+        'parrafos': entrada.parrafos,
+        'palabra_clave': palabra_clave,
+        'fecha_obtencion': entrada.fecha_obtencion,
+    }
+
+
+def _vigente(entrada, ahora):
+    return entrada is not None and entrada.fecha_obtencion > ahora - timedelta(seconds=settings.SCRAPING_CACHE_TTL)
+
+
+def _cabeceras_condicionales(entrada, ruta):
+    """Validadores de la entrada, solo si los envió la misma fuente a la que se va a pedir"""
+    headers = {}
+    if entrada is None or entrada.fuente != ruta:
+        return headers
+    if entrada.etag:
+        headers['If-None-Match'] = entrada.etag
+    if entrada.ultima_modificacion:
+        headers['If-Modified-Since'] = entrada.ultima_modificacion
+    return headers
+
+
+def _datos_articulo(palabra_clave, ruta, extraido, headers, ahora):
+    """Campos de ArticuloCacheado a partir de lo extraído de una respuesta 200"""
+    titulo, url, parrafos = extraido
+    return {
+        'palabra_clave': normalizar(palabra_clave),
+        'fuente': ruta,
+        'titulo': titulo[:300],
+        'url': url,
+        'parrafos': parrafos,
+        'etag': headers.get('ETag', '')[:200],
+        'ultima_modificacion': headers.get('Last-Modified', '')[:100],
+        'fecha_obtencion': ahora,
+        'fecha_ultimo_uso': ahora,
+    }
+
+
+def _descargar(palabra_clave, entrada):
+    """Pide el artículo a las fuentes en orden hasta que una lo tenga
+
+    Devuelve (ruta, respuesta, extraído), donde extraído es (título, url, párrafos) o None
+    (304, o el artículo no existe). Un error de red, un 5xx o un artículo inexistente pasan
+    a la siguiente fuente; lo que responda la última se devuelve (o se lanza) tal cual.
+    """
+    import requests
+
+    disponibles = fuentes()
+    for ruta, fuente in disponibles:
+        ultima = ruta == disponibles[-1][0]
+        try:
+            with medir('http'):
+                response = sesion().get(
+                    fuente.url_descarga(palabra_clave),
+                    headers=_cabeceras_condicionales(entrada, ruta),
+                    timeout=settings.SCRAPING_TIMEOUT,
+                )
+        except requests.RequestException:
+            if ultima:
+                raise
+            continue
+        extraido = fuente.extraer(response.content, palabra_clave) if response.status_code == 200 else None
+        if extraido is not None or response.status_code == 304 or ultima:
+            return ruta, response, extraido
+
+
+async def _descargar_async(palabra_clave, entrada):
+    import httpx
+
+    disponibles = fuentes()
+    for ruta, fuente in disponibles:
+        ultima = ruta == disponibles[-1][0]
+        try:
+            with medir('http'):
+                response = await cliente_async().get(
+                    fuente.url_descarga(palabra_clave),
+                    headers=_cabeceras_condicionales(entrada, ruta),
+                )
+        except httpx.HTTPError:
+            if ultima:
+                raise
+            continue
+        extraido = None
+        if response.status_code == 200:
+            # BeautifulSoup es CPU puro: en un hilo para no frenar el resto del event loop
+            extraido = await sync_to_async(fuente.extraer, thread_sensitive=False)(
+                response.content, palabra_clave,
+            )
+        if extraido is not None or response.status_code == 304 or ultima:
+            return ruta, response, extraido
+
+
+class _Vuelo:
+    """Una búsqueda en curso a la que se suman las peticiones iguales"""
+
+    def __init__(self):
+        self.listo = threading.Event()
+        self.resultado = None
+        self.error = None
+
+
+def _para(resultado, palabra_clave):
+    # Cada petición ve la palabra clave tal como la escribió
+    return dict(resultado, palabra_clave=palabra_clave) if resultado else resultado
+
+
+def buscar_articulo(palabra_clave):
+    """Busca el artículo en Wikipedia pasando por la caché persistente
+
+    Dentro de SCRAPING_CACHE_TTL se responde desde la base sin ir a Wikipedia. Una
+    entrada vencida se revalida con If-None-Match / If-Modified-Since si la fuente que la
+    produjo envió esos validadores: si el artículo no cambió, Wikipedia responde 304 sin
+    cuerpo y no hay que descargarlo ni procesarlo.
+    Las búsquedas simultáneas de la misma palabra (toda una clase buscando el mismo
+    tema) esperan a la primera y comparten su resultado.
+    Devuelve None si el artículo no existe.
+    """
+    clave = clave_cache(palabra_clave)
+    with _en_curso_lock:
+        vuelo = _en_curso.get(clave)
+        primera = vuelo is None
+        if primera:
+            vuelo = _en_curso[clave] = _Vuelo()
+
+    if not primera:
+        if not vuelo.listo.wait(settings.SCRAPING_TIMEOUT_TOTAL):
+            return _buscar_articulo(palabra_clave)
+        if vuelo.error is not None:
+            raise vuelo.error
+        return _para(vuelo.resultado, palabra_clave)
+
+    try:
+        vuelo.resultado = _buscar_articulo(palabra_clave)
+        return vuelo.resultado
+    except Exception as e:
+        vuelo.error = e
+        raise
+    finally:
+        with _en_curso_lock:
+            del _en_curso[clave]
+        vuelo.listo.set()
+
+
+def _llave_bloqueo(clave):
+    return 'scraping:descarga:' + hashlib.md5(clave.encode()).hexdigest()
+
+
+class _BloqueoCache:
+    """Bloqueo en la caché de Django: cache.add es atómico en Redis, Memcached y la base
+
+    El valor es un token propio: si la descarga tarda más que el vencimiento y otro
+    proceso toma el bloqueo, soltar() no le borra el suyo.
+    """
+
+    def __init__(self, llave):
+        self.llave = llave
+        self.token = uuid.uuid4().hex
+
+    def tomar(self):
+        return cache.add(self.llave, self.token, settings.SCRAPING_TIMEOUT * 2)
+
+    def ocupado(self):
+        return cache.get(self.llave) is not None
+
+    def soltar(self):
+        # Entre el get y el delete queda una ventana de microsegundos, frente a los segundos
+        # que dura el bloqueo: alcanza para no borrar el de otro proceso
+        if cache.get(self.llave) == self.token:
+            cache.delete(self.llave)
+
+    async def atomar(self):
+        return await cache.aadd(self.llave, self.token, settings.SCRAPING_TIMEOUT * 2)
+
+    async def aocupado(self):
+        return await cache.aget(self.llave) is not None
+
+    async def asoltar(self):
+        if await cache.aget(self.llave) == self.token:
+            await cache.adelete(self.llave)
+
+
+class _BloqueoArchivo:
+    """Bloqueo entre los procesos de la máquina: un archivo creado con O_EXCL
+
+    Con la caché en archivos cache.add es un get seguido de un set, y dos workers pueden
+    tomar el bloqueo a la vez; crear el archivo con O_CREAT | O_EXCL sí es atómico. El
+    archivo guarda el token de quien lo tomó. Si ese proceso muere sin soltarlo, vence
+    igual que la entrada de la caché.
+    """
+
+    def __init__(self, llave):
+        self.ruta = os.path.join(settings.SCRAPING_BLOQUEO_DIR, llave.replace(':', '_'))
+        self.token = uuid.uuid4().hex
+
+    def tomar(self, reintentar=True):
+        try:
+            descriptor = os.open(self.ruta, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileNotFoundError:
+            os.makedirs(settings.SCRAPING_BLOQUEO_DIR, exist_ok=True)
+        except FileExistsError:
+            if not self._romper_vencido():
+                return False
+        else:
+            with os.fdopen(descriptor, 'w') as archivo:
+                archivo.write(self.token)
+            return True
+        return reintentar and self.tomar(reintentar=False)
+
+    def ocupado(self):
+        return os.path.exists(self.ruta)
+
+    def soltar(self):
+        self._quitar(self.token)
+
+    def _romper_vencido(self):
+        """Quita el bloqueo de un proceso que murió sin soltarlo; True si estaba vencido"""
+        try:
+            if time.time() - os.stat(self.ruta).st_mtime < settings.SCRAPING_TIMEOUT * 2:
+                return False
+            token = self._leer(self.ruta)
+        except FileNotFoundError:
+            return True
+        # Si entre el stat y ahora otro proceso lo rompió y lo volvió a tomar, el token
+        # ya no coincide y _quitar lo deja como está
+        self._quitar(token)
+        return True
+
+    def _quitar(self, token):
+        """Elimina el archivo del bloqueo solo si todavía tiene `token`
+
+        Se aparta primero con rename, que es atómico: si resulta ser el de otro proceso
+        (tomado después de leer el token) se lo devuelve con link, que no pisa a un
+        tercero que lo haya creado en el medio.
+        """
+        apartado = f'{self.ruta}.{uuid.uuid4().hex}'
+        try:
+            os.rename(self.ruta, apartado)
+        except FileNotFoundError:
+            return
+        try:
+            if self._leer(apartado) != token:
+                try:
+                    os.link(apartado, self.ruta)
+                except FileExistsError:
+                    pass
+        finally:
+            os.remove(apartado)
+
+    @staticmethod
+    def _leer(ruta):
+        with open(ruta) as archivo:
+            return archivo.read()
+
+    # Son llamadas al sistema de archivos de microsegundos: no hace falta un hilo
+    async def atomar(self):
+        return self.tomar()
+
+    async def aocupado(self):
+        return self.ocupado()
+
+    async def asoltar(self):
+        self.soltar()
+
+
+def _bloqueo(clave):
+    llave = _llave_bloqueo(clave)
+    if isinstance(caches['default'], (RedisCache, BaseMemcachedCache, DatabaseCache)):
+        return _BloqueoCache(llave)
+    return _BloqueoArchivo(llave)
+
+
+@contextmanager
+def _bloqueo_compartido(clave):
+    """Bloqueo entre procesos para la descarga de una palabra (SCRAPING_BLOQUEO_COMPARTIDO)
+
+    Devuelve True si este proceso hace la descarga. Si otro ya la está haciendo, espera a
+    que termine (como mucho SCRAPING_TIMEOUT) y devuelve False.
+    """
+    if not settings.SCRAPING_BLOQUEO_COMPARTIDO:
+        yield True
+        return
+    bloqueo = _bloqueo(clave)
+    if bloqueo.tomar():
+        try:
+            yield True
+        finally:
+            bloqueo.soltar()
+        return
+    limite = time.monotonic() + settings.SCRAPING_TIMEOUT
+    while bloqueo.ocupado() and time.monotonic() < limite:
+        time.sleep(ESPERA_BLOQUEO)
+    yield False
+
+
+@asynccontextmanager
+async def _bloqueo_compartido_async(clave):
+    if not settings.SCRAPING_BLOQUEO_COMPARTIDO:
+        yield True
+        return
+    bloqueo = _bloqueo(clave)
+    if await bloqueo.atomar():
+        try:
+            yield True
+        finally:
+            await bloqueo.asoltar()
+        return
+    limite = time.monotonic() + settings.SCRAPING_TIMEOUT
+    while await bloqueo.aocupado() and time.monotonic() < limite:
+        await asyncio.sleep(ESPERA_BLOQUEO)
+    yield False
+
+
+def refrescar_articulo(palabra_clave):
+    """Revalida el artículo aunque su entrada en la caché siga vigente (calentar_cache)"""
+    return _buscar_articulo(palabra_clave, refrescar=True)
+
+
+def _buscar_articulo(palabra_clave, refrescar=False):
+    ahora = timezone.now()
+    clave = clave_cache(palabra_clave)
+    entrada = ArticuloCacheado.objects.filter(clave=clave).first()
+
+    if not refrescar and _vigente(entrada, ahora):
+        _registrar_uso(entrada, ahora)
+        return _resultado(entrada, palabra_clave)
+
+    with _bloqueo_compartido(clave) as propio:
+        if not propio:
+            # Otro proceso acaba de descargarlo: normalmente ya está en la caché
+            ahora = timezone.now()
+            entrada = ArticuloCacheado.objects.filter(clave=clave).first()
+            if _vigente(entrada, ahora):
+                return _resultado(entrada, palabra_clave)
+
+        ruta, response, extraido = _descargar(palabra_clave, entrada)
+
+        if response.status_code == 304 and entrada:
+            entrada.fecha_obtencion = ahora
+            entrada.fecha_ultimo_uso = ahora
+            entrada.save(update_fields=['fecha_obtencion', 'fecha_ultimo_uso'])
+            return _resultado(entrada, palabra_clave)
+
+        if extraido is None:
+            return None
+
+        entrada, creada = ArticuloCacheado.objects.update_or_create(
+            clave=clave,
+            defaults=_datos_articulo(palabra_clave, ruta, extraido, response.headers, ahora),
+        )
+    if creada:
+        recortar_cache()
+    return _resultado(entrada, palabra_clave)
+
+
+def _olvidar_vuelo(vuelos, clave):
+    def callback(tarea):
+        vuelos.pop(clave, None)
+        # Si todas las peticiones que esperaban se cancelaron, nadie lee el error
+        if not tarea.cancelled():
+            tarea.exception()
+    return callback
+
+
+async def buscar_articulo_async(palabra_clave):
+    """Igual que buscar_articulo, pero sin bloquear el event loop mientras se descarga"""
+    clave = clave_cache(palabra_clave)
+    vuelos = _en_curso_async.setdefault(asyncio.get_running_loop(), {})
+    tarea = vuelos.get(clave)
+    if tarea is None:
+        tarea = vuelos[clave] = asyncio.ensure_future(_buscar_articulo_async(palabra_clave))
+        tarea.add_done_callback(_olvidar_vuelo(vuelos, clave))
+    # shield: si una petición se cancela (por tiempo), la descarga sigue para las demás
+    return _para(await asyncio.shield(tarea), palabra_clave)
+
+
+async def _buscar_articulo_async(palabra_clave):
+    ahora = timezone.now()
+    clave = clave_cache(palabra_clave)
+    entrada = await ArticuloCacheado.objects.filter(clave=clave).afirst()
+
+    if _vigente(entrada, ahora):
+        await sync_to_async(_registrar_uso)(entrada, ahora)
+        return _resultado(entrada, palabra_clave)
+
+    async with _bloqueo_compartido_async(clave) as propio:
+        if not propio:
+            ahora = timezone.now()
+            entrada = await ArticuloCacheado.objects.filter(clave=clave).afirst()
+            if _vigente(entrada, ahora):
+                return _resultado(entrada, palabra_clave)
+
+        ruta, response, extraido = await _descargar_async(palabra_clave, entrada)
+
+        if response.status_code == 304 and entrada:
+            entrada.fecha_obtencion = ahora
+            entrada.fecha_ultimo_uso = ahora
+            await entrada.asave(update_fields=['fecha_obtencion', 'fecha_ultimo_uso'])
+            return _resultado(entrada, palabra_clave)
+
+        if extraido is None:
+            return None
+
+        entrada, creada = await ArticuloCacheado.objects.aupdate_or_create(
+            clave=clave,
+            defaults=_datos_articulo(palabra_clave, ruta, extraido, response.headers, ahora),
+        )
+    if creada:
+        await sync_to_async(recortar_cache)()
+    return _resultado(entrada, palabra_clave)
+
+
+def _buscar_en_hilo(palabra_clave):
+    try:
+        return buscar_articulo(palabra_clave)
+    finally:
+        # Cada hilo abre su propia conexión a la base: se cierra al terminar
+        connections.close_all()
+
+
+def buscar_articulos(palabras_clave):
+    """Busca varios artículos a la vez en un pool de SCRAPING_HILOS hilos
+
+    La espera total está acotada por SCRAPING_TIMEOUT_TOTAL: lo que no terminó a tiempo
+    se informa como error y se devuelven los resultados parciales (las búsquedas que
+    siguen en curso terminan en segundo plano y quedan en la caché para la próxima vez).
+    Devuelve una lista de (palabra_clave, resultado o None, error o None) en el mismo orden.
+    """
+    executor = ThreadPoolExecutor(
+        max_workers=min(settings.SCRAPING_HILOS, len(palabras_clave)),
+        thread_name_prefix='scraping',
+    )
+    # Cada hilo corre en una copia del contexto para sumar sus descargas a las métricas de la petición
+    futuros = [
+        (palabra, executor.submit(contextvars.copy_context().run, _buscar_en_hilo, palabra))
+        for palabra in palabras_clave
+    ]
+    limite = time.monotonic() + settings.SCRAPING_TIMEOUT_TOTAL
+
+    resultados = []
+    try:
+        for palabra, futuro in futuros:
+            try:
+                resultado = futuro.result(timeout=max(0, limite - time.monotonic()))
+            except TimeoutError:
+                resultados.append((palabra, None, 'Tiempo de espera agotado'))
+            except Exception as e:
+                resultados.append((palabra, None, str(e)))
+            else:
+                resultados.append((palabra, resultado, None))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return resultados
+
+
+async def buscar_articulos_async(palabras_clave):
+    """Versión asíncrona de buscar_articulos: todas las descargas en curso a la vez
+
+    Lo que no terminó dentro de SCRAPING_TIMEOUT_TOTAL se cancela y se informa como error.
+    """
+    tareas = [asyncio.ensure_future(buscar_articulo_async(palabra)) for palabra in palabras_clave]
+    _, pendientes = await asyncio.wait(tareas, timeout=settings.SCRAPING_TIMEOUT_TOTAL)
+    for tarea in pendientes:
+        tarea.cancel()
+
+    resultados = []
+    for palabra, tarea in zip(palabras_clave, tareas):
+        if tarea in pendientes:
+            resultados.append((palabra, None, 'Tiempo de espera agotado'))
+        elif tarea.exception() is not None:
+            # Los timeouts de httpx no tienen mensaje: al menos se informa cuál fue
+            error = tarea.exception()
+            resultados.append((palabra, None, str(error) or type(error).__name__))
+        else:
+            resultados.append((palabra, tarea.result(), None))
+    return resultados
+
+
+def _registrar_uso(entrada, ahora):
+    # Para el LRU alcanza con precisión de un minuto: se evita una escritura por cada acierto
+    if entrada.fecha_ultimo_uso < ahora - timedelta(minutes=1):
+        ArticuloCacheado.objects.filter(pk=entrada.pk).update(fecha_ultimo_uso=ahora)
+
+
+def recortar_cache():
+    """Elimina los artículos usados hace más tiempo si se supera SCRAPING_CACHE_MAX_ENTRADAS"""
+    exceso = ArticuloCacheado.objects.count() - settings.SCRAPING_CACHE_MAX_ENTRADAS
+    if exceso > 0:
+        viejos = list(ArticuloCacheado.objects.order_by('fecha_ultimo_uso').values_list('pk', flat=True)[:exceso])
+        ArticuloCacheado.objects.filter(pk__in=viejos).delete()
+
+
+def recortar_resultados():
+    """Elimina los resultados mostrados hace más de SCRAPING_RESULTADOS_DIAS; devuelve cuántos
+
+    Cada búsqueda guarda sus resultados para poder enviarlos por correo a partir del id;
+    pasado ese plazo ya nadie los va a enviar. Lo ejecuta calentar_cache en cada pasada,
+    fuera de las búsquedas, para no sumarles consultas.
+    """
+    limite = timezone.now() - timedelta(days=settings.SCRAPING_RESULTADOS_DIAS)
+    eliminados, _ = ResultadoBusqueda.objects.filter(fecha_creacion__lt=limite).delete()
+    return eliminados
@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class SistemaEducativoConfig(AppConfig):
+    name = 'sistema_educativo'
+    verbose_name = 'Sistema Educativo'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from .metricas import instalar_en_conexion
+        from .sqlite import configurar_conexion
+        connection_created.connect(configurar_conexion, dispatch_uid='sistema_educativo_sqlite')
+        connection_created.connect(instalar_en_conexion, dispatch_uid='sistema_educativo_metricas')
@@ -0,0 +1,142 @@
+"""Benchmark reproducible de las vistas principales (python manage.py bench)
+
+`sembrar` carga usuarios y alumnos sintéticos con una semilla fija y `medir_vistas` hace
+peticiones con el cliente de pruebas de Django, devolviendo por vista las peticiones por
+segundo, los percentiles de latencia y las consultas SQL promedio. Se usa desde el
+comando (sobre una base de prueba en archivo) y desde los tests con volúmenes chicos.
+"""
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.text import slugify
+from alumnos.models import Alumno
+
+NOMBRES = ['Ana', 'Bruno', 'Carla', 'Diego', 'Elena', 'Facundo', 'Gabriela', 'Hernán', 'Inés', 'Julián',
+           'Lucía', 'Martín', 'Noelia', 'Óscar', 'Paula', 'Ramiro', 'Sofía', 'Tomás', 'Valentina', 'Zoe']
+APELLIDOS = ['Pérez', 'González', 'Rodríguez', 'Fernández', 'López', 'Martínez', 'García', 'Sánchez',
+             'Romero', 'Díaz', 'Álvarez', 'Torres', 'Ruiz', 'Ramírez', 'Flores', 'Benítez', 'Acosta', 'Medina']
+PERCENTILES = (50, 90, 95, 99)
+
+
+def datos_alumno(aleatorio, i):
+    """Campos de un alumno sintético (también sirve como POST de crear_alumno)"""
+    nombre = aleatorio.choice(NOMBRES)
+    apellido = aleatorio.choice(APELLIDOS)
+    return {
+        'nombre': nombre,
+        'apellido': apellido,
+        'email': f'{slugify(nombre)}.{i}@ejemplo.com',
+        'fecha_nacimiento': (date(2005, 1, 1) + timedelta(days=aleatorio.randrange(3650))).isoformat(),
+        'telefono': f'+54 9 11 {aleatorio.randrange(10000000):08d}',
+        'direccion': f'Calle {aleatorio.choice(APELLIDOS)} {aleatorio.randrange(1, 5000)}',
+    }
+
+
+def sembrar(usuarios, alumnos_por_usuario, semilla=0, lote=2000):
+    """Crea los docentes bench_N con sus alumnos; devuelve la lista de usuarios"""
+    aleatorio = random.Random(semilla)
+    clave = make_password('bench')  # un solo hash para todos: hashear es lo más lento
+    docentes = User.objects.bulk_create(
+        User(username=f'bench_{n}', email=f'bench_{n}@ejemplo.com', password=clave)
+        for n in range(usuarios)
+    )
+    for docente in docentes:
+        for inicio in range(0, alumnos_por_usuario, lote):
+            Alumno.objects.bulk_create(
+                [
+                    Alumno(usuario=docente, **datos_alumno(aleatorio, i))
+                    for i in range(inicio, min(inicio + lote, alumnos_por_usuario))
+                ],
+                batch_size=lote,
+            )
+    return docentes
+
+
+def escenarios(docentes, semilla=0):
+    """Peticiones a medir: {nombre: función(i) -> (usuario, método, url, datos)}
+
+    Cada vista sortea con su propio generador, así medir solo algunas no cambia las
+    peticiones que reciben las demás.
+    """
+    con_alumnos = [
+        (docente, list(Alumno.objects.filter(usuario=docente).values_list('pk', flat=True)[:1000]))
+        for docente in docentes
+    ]
+    con_alumnos = [(docente, pks) for docente, pks in con_alumnos if pks]
+
+    def dashboard(i, aleatorio=random.Random(f'{semilla}:dashboard')):
+        return aleatorio.choice(docentes), 'get', reverse('dashboard'), None
+
+    def dashboard_busqueda(i, aleatorio=random.Random(f'{semilla}:dashboard_busqueda')):
+        return (aleatorio.choice(docentes), 'get', reverse('dashboard'),
+                {'q': f'{aleatorio.choice(NOMBRES)} {aleatorio.choice(APELLIDOS)[:3]}'})
+
+    def crear_alumno(i, aleatorio=random.Random(f'{semilla}:crear_alumno')):
+        return aleatorio.choice(docentes), 'post', reverse('crear_alumno'), datos_alumno(aleatorio, f'bench{i}')
+
+    def enviar_pdf_alumno(i, aleatorio=random.Random(f'{semilla}:enviar_pdf_alumno')):
+        docente, pks = aleatorio.choice(con_alumnos)
+        return docente, 'get', reverse('enviar_pdf_alumno', args=[aleatorio.choice(pks)]), None
+
+    def buscar_contenido(i, aleatorio=random.Random(f'{semilla}:buscar_contenido')):
+        # Una palabra distinta cada vez: siempre se descarga del stub
+        return aleatorio.choice(docentes), 'post', reverse('buscar_contenido'), {'palabra_clave': f'Tema bench {i}'}
+
+    return {
+        'dashboard': dashboard,
+        'dashboard_busqueda': dashboard_busqueda,
+        'crear_alumno': crear_alumno,
+        'enviar_pdf_alumno': enviar_pdf_alumno if con_alumnos else None,
+        'buscar_contenido': buscar_contenido,
+    }
+
+
+def percentil(ordenados, p):
+    """Percentil por rango más cercano de una lista ya ordenada"""
+    return ordenados[min(len(ordenados) - 1, max(0, round(p / 100 * len(ordenados)) - 1))]
+
+
+def medir_vistas(docentes, iteraciones, semilla=0, vistas=None):
+    """Hace `iteraciones` peticiones por vista; devuelve {vista: estadísticas}"""
+    clientes = {}
+    resultados = {}
+    for nombre, escenario in escenarios(docentes, semilla).items():
+        if escenario is None or (vistas and nombre not in vistas):
+            continue
+        tiempos = []
+        consultas = []
+        errores = 0
+        inicio_vista = time.perf_counter()
+        for i in range(iteraciones):
+            usuario, metodo, url, datos = escenario(i)
+            cliente = clientes.get(usuario.pk)
+            if cliente is None:
+                cliente = clientes[usuario.pk] = Client()
+                cliente.force_login(usuario)
+            with CaptureQueriesContext(connection) as capturadas:
+                inicio = time.perf_counter()
+                response = getattr(cliente, metodo)(url, datos)
+                tiempos.append(time.perf_counter() - inicio)
+            consultas.append(len(capturadas))
+            if response.status_code >= 400:
+                errores += 1
+        duracion = time.perf_counter() - inicio_vista
+
+        ordenados = sorted(tiempos)
+        resultados[nombre] = {
+            'peticiones': iteraciones,
+            'errores': errores,
+            'por_segundo': round(iteraciones / duracion, 1),
+            **{f'p{p}_ms': round(percentil(ordenados, p) * 1000, 2) for p in PERCENTILES},
+            'max_ms': round(ordenados[-1] * 1000, 2),
+            'media_ms': round(statistics.fmean(ordenados) * 1000, 2),
+            'consultas_promedio': round(statistics.fmean(consultas), 1),
+        }
+    return resultados
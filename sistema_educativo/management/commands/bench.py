@@ -0,0 +1,94 @@
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from scraping.stub import iniciar_stub
+from sistema_educativo.bench import medir_vistas, sembrar
+
+
+class Command(BaseCommand):
+    help = ('Siembra una base de prueba con usuarios y alumnos sintéticos y mide las vistas principales '
+            'con el cliente de pruebas (Wikipedia local, correo en memoria). Imprime JSON para comparar versiones')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=10,
+                            help='Docentes a crear (default: 10)')
+        parser.add_argument('--alumnos', type=int, default=1000,
+                            help='Alumnos por docente (default: 1000)')
+        parser.add_argument('--iteraciones', type=int, default=50,
+                            help='Peticiones por vista (default: 50)')
+        parser.add_argument('--vistas', nargs='*',
+                            help='Solo estas vistas (dashboard, dashboard_busqueda, crear_alumno, '
+                                 'enviar_pdf_alumno, buscar_contenido)')
+        parser.add_argument('--latencia', type=float, default=0.05,
+                            help='Segundos que tarda el Wikipedia local en responder (default: 0.05)')
+        parser.add_argument('--semilla', type=int, default=0,
+                            help='Semilla de los datos y de la elección de peticiones (default: 0)')
+        parser.add_argument('--en-cola', action='store_true',
+                            help='Solo encolar los PDF y correos (por defecto se ejecutan dentro del request)')
+        parser.add_argument('--salida',
+                            help='Archivo donde guardar el JSON (por defecto, la salida estándar)')
+
+    def handle(self, *args, **options):
+        # Base de prueba en archivo y cachés vacías: cada corrida empieza desde el mismo estado
+        directorio = tempfile.mkdtemp(prefix='bench_')
+        settings.DATABASES['default'].setdefault('TEST', {})['NAME'] = os.path.join(directorio, 'bench.sqlite3')
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0)
+        bases = runner.setup_databases()
+        servidor = iniciar_stub(options['latencia'])
+        try:
+            with override_settings(
+                CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+                EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+                PDF_CACHE_DIR=os.path.join(directorio, 'pdfs'),
+                TAREAS_EN_LINEA=not options['en_cola'],
+                WIKIPEDIA_URL=servidor.url_wiki,
+                WIKIPEDIA_API_URL=servidor.url_api,
+                METRICAS_SERVER_TIMING=False,
+                METRICAS_MUESTREO=0,
+            ):
+                inicio = time.perf_counter()
+                docentes = sembrar(options['usuarios'], options['alumnos'], options['semilla'])
+                siembra = time.perf_counter() - inicio
+                self.stderr.write(
+                    f"{options['usuarios']} docentes x {options['alumnos']} alumnos sembrados en {siembra:.1f}s"
+                )
+                vistas = medir_vistas(docentes, options['iteraciones'], options['semilla'], options['vistas'])
+        finally:
+            servidor.shutdown()
+            runner.teardown_databases(bases)
+            teardown_test_environment()
+            shutil.rmtree(directorio, ignore_errors=True)
+
+        informe = {
+            'fecha': timezone.now().isoformat(timespec='seconds'),
+            'entorno': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'plataforma': platform.platform(),
+                'nucleos': os.cpu_count(),
+            },
+            'configuracion': {
+                clave: options[clave]
+                for clave in ('usuarios', 'alumnos', 'iteraciones', 'latencia', 'semilla', 'en_cola')
+            },
+            'siembra_s': round(siembra, 2),
+            'vistas': vistas,
+        }
+        salida = json.dumps(informe, indent=2, sort_keys=True, ensure_ascii=False)
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                archivo.write(salida + '\n')
+            self.stderr.write(f"Resultados guardados en {options['salida']}")
+        else:
+            self.stdout.write(salida)
@@ -0,0 +1,132 @@
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+from alumnos.models import Alumno
+
+# Configuración por defecto de SQLite y de Django, antes de los ajustes
+SIN_AJUSTES = {
+    'pragmas': {'journal_mode': 'DELETE', 'synchronous': 'FULL'},
+    'transaction_mode': None,
+}
+
+
+def _trabajador(argumentos):
+    """Lecturas y escrituras contra la base durante `duracion` segundos (en un proceso aparte)"""
+    ruta, config, duracion, proporcion_escrituras, semilla = argumentos
+    conexion = connections['default']
+    conexion.close()
+    conexion.settings_dict['NAME'] = ruta
+    conexion.settings_dict['OPTIONS'] = {'transaction_mode': config['transaction_mode']}
+    settings.SQLITE_PRAGMAS = config['pragmas']
+
+    aleatorio = random.Random(semilla)
+    usuario = User.objects.get(username='benchmark')
+    lecturas = escrituras = bloqueos = 0
+    tiempos_escritura = []
+    fin = time.monotonic() + duracion
+    while time.monotonic() < fin:
+        try:
+            if aleatorio.random() < proporcion_escrituras:
+                inicio = time.perf_counter()
+                # Lee y después escribe, como guardar una sesión o crear un alumno
+                with transaction.atomic():
+                    cantidad = Alumno.objects.filter(usuario=usuario).count()
+                    Alumno.objects.create(
+                        nombre=f'Alumno {cantidad}', apellido='Benchmark',
+                        email=f'alumno{cantidad}@example.com', usuario=usuario,
+                    )
+                tiempos_escritura.append(time.perf_counter() - inicio)
+                escrituras += 1
+            else:
+                list(Alumno.objects.filter(usuario=usuario)[:50])
+                lecturas += 1
+        except OperationalError as e:
+            if 'locked' not in str(e):
+                raise
+            bloqueos += 1
+    conexion.close()
+    return lecturas, escrituras, bloqueos, tiempos_escritura
+
+
+class Command(BaseCommand):
+    help = ('Mide lecturas/escrituras por segundo y errores "database is locked" con varios procesos '
+            'sobre una copia temporal de la base, sin y con los ajustes de SQLite')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--procesos', type=int, default=4,
+                            help='Procesos simultáneos, como workers de gunicorn (default: 4)')
+        parser.add_argument('--duracion', type=float, default=5.0,
+                            help='Segundos de carga por configuración (default: 5)')
+        parser.add_argument('--escrituras', type=float, default=0.2,
+                            help='Proporción de operaciones que escriben (default: 0.2)')
+        parser.add_argument('--alumnos', type=int, default=2000,
+                            help='Alumnos en la base antes de empezar (default: 2000)')
+
+    def handle(self, *args, **options):
+        directorio = tempfile.mkdtemp(prefix='benchmark_sqlite_')
+        try:
+            plantilla = self._preparar_base(directorio, options['alumnos'])
+            configuraciones = [
+                ('sin ajustes', SIN_AJUSTES),
+                ('con ajustes', {
+                    'pragmas': settings.SQLITE_PRAGMAS,
+                    'transaction_mode': settings.DATABASES['default'].get('OPTIONS', {}).get('transaction_mode'),
+                }),
+            ]
+            self.stdout.write(
+                f"{options['procesos']} procesos, {options['duracion']:.0f}s por configuración, "
+                f"{options['escrituras']:.0%} escrituras"
+            )
+            for nombre, config in configuraciones:
+                ruta = os.path.join(directorio, f"{nombre.replace(' ', '_')}.sqlite3")
+                shutil.copy(plantilla, ruta)
+                self._informar(nombre, options['duracion'], self._medir(ruta, config, options))
+        finally:
+            shutil.rmtree(directorio, ignore_errors=True)
+
+    def _preparar_base(self, directorio, cantidad):
+        ruta = os.path.join(directorio, 'plantilla.sqlite3')
+        connections.close_all()
+        settings.DATABASES['default']['NAME'] = ruta
+        call_command('migrate', verbosity=0)
+        usuario = User.objects.create_user('benchmark', 'benchmark@example.com')
+        Alumno.objects.bulk_create(
+            Alumno(nombre=f'Alumno {i}', apellido='Benchmark', email=f'alumno{i}@example.com', usuario=usuario)
+            for i in range(cantidad)
+        )
+        # Vuelve a modo rollback para que la copia no dependa de un archivo -wal
+        with connections['default'].cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode = DELETE')
+        connections.close_all()
+        return ruta
+
+    def _medir(self, ruta, config, options):
+        connections.close_all()
+        argumentos = [
+            (ruta, config, options['duracion'], options['escrituras'], semilla)
+            for semilla in range(options['procesos'])
+        ]
+        with multiprocessing.get_context('fork').Pool(options['procesos']) as pool:
+            return pool.map(_trabajador, argumentos)
+
+    def _informar(self, nombre, duracion, resultados):
+        lecturas = sum(r[0] for r in resultados)
+        escrituras = sum(r[1] for r in resultados)
+        bloqueos = sum(r[2] for r in resultados)
+        tiempos = sorted(t for r in resultados for t in r[3])
+        p95 = tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))] * 1000 if tiempos else 0
+        linea = (
+            f'{nombre}: {lecturas / duracion:.0f} lecturas/s, {escrituras / duracion:.0f} escrituras/s, '
+            f'escritura p50 {statistics.median(tiempos) * 1000 if tiempos else 0:.1f} ms / p95 {p95:.1f} ms, '
+            f'{bloqueos} errores "database is locked"'
+        )
+        self.stdout.write(self.style.ERROR(linea) if bloqueos else self.style.SUCCESS(linea))
@@ -0,0 +1,89 @@
+import json
+import os
+import subprocess
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Pasos en el orden en que los recorre un worker: primero el arranque, después las
+# dependencias que se cargan recién cuando una vista las usa
+PASOS = [
+    ('django.setup()', 'import django; django.setup()'),
+    ('aplicación ASGI (middleware)', 'import sistema_educativo.asgi'),
+    ('URLs y vistas', 'from django.urls import get_resolver; get_resolver().url_patterns'),
+    ('ReportLab (primer PDF)', 'import reportlab.pdfgen.canvas'),
+    ('BeautifulSoup (FuenteHtml)', 'import bs4'),
+    ('requests (búsqueda síncrona)', 'import requests'),
+    ('httpx (búsqueda asíncrona)', 'import httpx'),
+]
+PASOS_ARRANQUE = 3
+
+# Se ejecuta en un intérprete nuevo, así cada medición empieza sin nada importado
+_MEDIR = r'''
+import json, os, sys, time
+
+def rss():
+    try:
+        with open('/proc/self/statm') as archivo:
+            return int(archivo.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+resultados = [['intérprete', 0.0, rss()]]
+for nombre, codigo in json.loads(sys.argv[1]):
+    antes = rss()
+    inicio = time.perf_counter()
+    exec(codigo, {})
+    resultados.append([nombre, time.perf_counter() - inicio, rss() - antes])
+print(json.dumps(resultados))
+'''
+
+
+class Command(BaseCommand):
+    help = ('Mide en un intérprete nuevo el tiempo de importación y la memoria (RSS) de cada etapa '
+            'del arranque de un worker y de las dependencias pesadas que se cargan a demanda')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=3,
+                            help='Mediciones a hacer; se informa la más rápida de cada paso (default: 3)')
+        parser.add_argument('--json', action='store_true',
+                            help='Imprime los resultados en JSON')
+
+    def handle(self, *args, **options):
+        entorno = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE',
+                                                                           'sistema_educativo.settings')}
+        mediciones = []
+        for _ in range(max(1, options['repeticiones'])):
+            salida = subprocess.run(
+                [sys.executable, '-c', _MEDIR, json.dumps(PASOS)],
+                cwd=settings.BASE_DIR, env=entorno, capture_output=True, text=True, check=True,
+            )
+            mediciones.append(json.loads(salida.stdout.strip().splitlines()[-1]))
+
+        # El tiempo más bajo es el menos afectado por el resto de la máquina; la memoria no varía
+        pasos = []
+        for i, (nombre, _, rss) in enumerate(mediciones[0]):
+            pasos.append({
+                'paso': nombre,
+                'ms': round(min(medicion[i][1] for medicion in mediciones) * 1000, 1),
+                'rss_mb': round(rss / 2 ** 20, 1),
+            })
+        arranque = pasos[:PASOS_ARRANQUE + 1]
+        informe = {
+            'pasos': pasos,
+            'arranque_ms': round(sum(paso['ms'] for paso in arranque), 1),
+            'arranque_rss_mb': round(sum(paso['rss_mb'] for paso in arranque), 1),
+            'total_rss_mb': round(sum(paso['rss_mb'] for paso in pasos), 1),
+        }
+
+        if options['json']:
+            self.stdout.write(json.dumps(informe, indent=2, ensure_ascii=False))
+            return
+        for paso in pasos:
+            signo = '' if paso['paso'] == 'intérprete' else '+'
+            self.stdout.write(f"{paso['paso']:<32} {paso['ms']:>8.1f} ms  {signo}{paso['rss_mb']:>6.1f} MB")
+        self.stdout.write(
+            f"Worker listo para atender: {informe['arranque_ms']:.0f} ms, {informe['arranque_rss_mb']:.1f} MB de RSS "
+            f"({informe['total_rss_mb']:.1f} MB con todas las dependencias cargadas)"
+        )
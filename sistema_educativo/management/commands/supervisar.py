@@ -0,0 +1,36 @@
+import os
+import signal
+import threading
+from django.core.management.base import BaseCommand
+from sistema_educativo.supervisor import Supervisor
+
+
+class Command(BaseCommand):
+    help = ('Mantiene corriendo el worker de la cola de tareas y lanza calentar_cache cada tanto; '
+            'gunicorn lo inicia con GUNICORN_TAREAS / GUNICORN_CALENTAR_CADA')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tareas', action='store_true',
+                            help='Mantiene corriendo procesar_tareas y lo relanza si termina')
+        parser.add_argument('--calentar-cada', type=int, default=0,
+                            help='Lanza una pasada de calentar_cache cada N segundos (0 = nunca)')
+        parser.add_argument('--tiempo-maximo', type=float, default=30,
+                            help='Segundos que tienen los procesos para terminar al detenerse (default: 30)')
+
+    def handle(self, *args, **options):
+        detener = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: detener.set())
+        signal.signal(signal.SIGINT, lambda signum, frame: detener.set())
+
+        supervisor = Supervisor()
+        if options['tareas']:
+            supervisor.mantener('procesar_tareas')
+        if options['calentar_cada']:
+            supervisor.cada(options['calentar_cada'], 'calentar_cache')
+
+        # Si el proceso que lo lanzó (el maestro de gunicorn) muere sin avisar, termina también
+        padre = os.getppid()
+        while not detener.wait(5):
+            if os.getppid() != padre:
+                break
+        supervisor.detener(options['tiempo_maximo'])
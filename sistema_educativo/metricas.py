@@ -0,0 +1,116 @@
+"""Tiempos por petición: SQL, plantillas, HTTP saliente (Wikipedia) y SMTP
+
+InstrumentacionMiddleware abre una Medicion por petición en un ContextVar, así también la
+ve el código que corre con sync_to_async, las tareas de asyncio y los hilos lanzados con
+contextvars.copy_context(). Cada parte suma su tiempo con `medir('nombre')`; fuera de una
+petición medida (o si la petición no entró en el muestreo) no hace nada. Los tiempos son
+acumulados: si hay descargas en paralelo, el tiempo HTTP puede superar al total.
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from django.core.mail.backends import smtp
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+_medicion = contextvars.ContextVar('medicion', default=None)
+
+
+class Medicion:
+    """Cantidad y segundos acumulados por tipo de operación durante una petición"""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.tiempos = {}
+        self._lock = threading.Lock()
+
+    def sumar(self, nombre, segundos):
+        with self._lock:
+            cantidad, total = self.tiempos.get(nombre, (0, 0.0))
+            self.tiempos[nombre] = (cantidad + 1, total + segundos)
+
+    def resumen(self):
+        """Copia de los tiempos: {nombre: (cantidad, segundos)}"""
+        with self._lock:
+            return dict(self.tiempos)
+
+    def total(self):
+        return time.perf_counter() - self.inicio
+
+
+def iniciar():
+    """Empieza a medir en el contexto actual; devuelve (medicion, token para terminar)"""
+    medicion = Medicion()
+    return medicion, _medicion.set(medicion)
+
+
+def terminar(token):
+    _medicion.reset(token)
+
+
+@contextmanager
+def medir(nombre):
+    medicion = _medicion.get()
+    if medicion is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        medicion.sumar(nombre, time.perf_counter() - inicio)
+
+
+def medir_sql(execute, sql, params, many, context):
+    """Wrapper de connection.execute_wrapper() que suma cada consulta a la medición"""
+    medicion = _medicion.get()
+    if medicion is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        medicion.sumar('sql', time.perf_counter() - inicio)
+
+
+def instalar_en_conexion(sender, connection, **kwargs):
+    """Registra medir_sql en cada conexión nueva (señal connection_created)
+
+    Va al principio de execute_wrappers y queda instalado: connection.execute_wrapper()
+    saca con pop() el último, así no se pisa con los que se agreguen temporalmente.
+    """
+    if medir_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, medir_sql)
+
+
+class PlantillaMedida(Template):
+
+    def render(self, context=None, request=None):
+        with medir('plantillas'):
+            return super().render(context, request)
+
+
+class DjangoTemplatesMedidos(DjangoTemplates):
+    """Motor de plantillas de Django que mide cada render (los {% include %} van dentro del padre)"""
+
+    def from_string(self, template_code):
+        return PlantillaMedida(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return PlantillaMedida(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+class SMTPEmailBackend(smtp.EmailBackend):
+    """Backend SMTP de Django que mide la conexión y el envío de cada mensaje"""
+
+    def open(self):
+        with medir('smtp'):
+            return super().open()
+
+    def _send(self, email_message):
+        with medir('smtp'):
+            return super()._send(email_message)
@@ -0,0 +1,118 @@
+import json
+import logging
+import random
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from whitenoise.middleware import WhiteNoiseMiddleware
+from . import metricas
+
+logger_lentas = logging.getLogger('sistema_educativo.lentas')
+
+
+class WhiteNoiseAsyncMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise que también funciona en modo asíncrono
+
+    El middleware original es solo síncrono: bajo ASGI Django ejecuta toda la cadena que
+    le sigue (incluidas las vistas async) en un único hilo, una petición a la vez. Esta
+    versión deja pasar las peticiones que no son de archivos estáticos sin salir del event loop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+class InstrumentacionMiddleware:
+    """Mide cada petición y, con METRICAS_SERVER_TIMING, publica los tiempos en Server-Timing
+
+    Total, SQL (cantidad y tiempo), plantillas, HTTP saliente y SMTP (ver metricas.py).
+    Las peticiones que superan METRICAS_UMBRAL_LENTO ms se registran como JSON en el
+    logger 'sistema_educativo.lentas'. Solo se mide la fracción METRICAS_MUESTREO de las
+    peticiones: el resto pasa sin costo.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not _muestrear():
+            return self.get_response(request)
+        medicion, token = metricas.iniciar()
+        try:
+            response = self.get_response(request)
+        finally:
+            metricas.terminar(token)
+        total, tiempos = medicion.total() * 1000, medicion.resumen()
+        _server_timing(response, total, tiempos)
+        if total >= settings.METRICAS_UMBRAL_LENTO:
+            _registrar_lenta(request, response, total, tiempos, getattr(request, 'user', None))
+        return response
+
+    async def __acall__(self, request):
+        if not _muestrear():
+            return await self.get_response(request)
+        medicion, token = metricas.iniciar()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metricas.terminar(token)
+        total, tiempos = medicion.total() * 1000, medicion.resumen()
+        _server_timing(response, total, tiempos)
+        if total >= settings.METRICAS_UMBRAL_LENTO:
+            # request.user cargaría el usuario de forma síncrona dentro del event loop
+            usuario = await request.auser() if hasattr(request, 'auser') else None
+            _registrar_lenta(request, response, total, tiempos, usuario)
+        return response
+
+
+def _muestrear():
+    muestreo = settings.METRICAS_MUESTREO
+    return muestreo >= 1 or (muestreo > 0 and random.random() < muestreo)
+
+
+def _server_timing(response, total, tiempos):
+    if not settings.METRICAS_SERVER_TIMING:
+        return
+    partes = [f'total;dur={total:.1f}']
+    for nombre, (cantidad, segundos) in tiempos.items():
+        partes.append(f'{nombre};dur={segundos * 1000:.1f};desc="{cantidad}"')
+    response['Server-Timing'] = ', '.join(partes)
+
+
+def _registrar_lenta(request, response, total, tiempos, usuario):
+    """Una línea JSON por petición lenta, para buscarla y agregarla en los logs"""
+    logger_lentas.warning(json.dumps({
+        'metodo': request.method,
+        'ruta': request.path,
+        'vista': getattr(request.resolver_match, 'view_name', None),
+        'estado': response.status_code,
+        'usuario': usuario.pk if usuario is not None and usuario.is_authenticated else None,
+        'total_ms': round(total, 1),
+        **{
+            nombre: {'cantidad': cantidad, 'ms': round(segundos * 1000, 1)}
+            for nombre, (cantidad, segundos) in tiempos.items()
+        },
+    }))
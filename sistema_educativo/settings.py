@@ -45,11 +45,14 @@ INSTALLED_APPS = [
     'usuarios',
     'alumnos',
     'scraping',
+    'tareas',
+    'sistema_educativo',
 ]
 
 MIDDLEWARE = [
+    'sistema_educativo.middleware.InstrumentacionMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'sistema_educativo.middleware.WhiteNoiseAsyncMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -62,7 +65,8 @@ ROOT_URLCONF = 'sistema_educativo.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates que además mide el tiempo de render (Server-Timing)
+        'BACKEND': 'sistema_educativo.metricas.DjangoTemplatesMedidos',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -70,6 +74,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'scraping.context_processors.busqueda',
             ],
         },
     },
@@ -85,9 +90,61 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # IMMEDIATE toma el bloqueo de escritura al empezar la transacción: una transacción
+            # que lee y después escribe ya no falla con "database is locked" si otro proceso
+            # escribió en el medio, espera su turno (busy_timeout)
+            'transaction_mode': os.environ.get('SQLITE_TRANSACTION_MODE', 'IMMEDIATE') or None,
+        },
     }
 }
 
+# PRAGMAs que se aplican a cada conexión SQLite nueva (sistema_educativo/sqlite.py).
+# Un valor vacío deja el default de SQLite
+SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),  # lectores y un escritor a la vez
+    'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),  # con WAL no pierde integridad
+    'busy_timeout': os.environ.get('SQLITE_BUSY_TIMEOUT', '5000'),  # ms esperando un bloqueo
+    'mmap_size': os.environ.get('SQLITE_MMAP_SIZE', str(128 * 1024 * 1024)),  # bytes
+    'cache_size': os.environ.get('SQLITE_CACHE_SIZE', '-20000'),  # negativo = KiB (20 MB)
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# En archivos para que la compartan todos los workers de gunicorn de la instancia
+# (la caché en memoria es una por proceso y no se enteraría de las invalidaciones).
+# Con REDIS_URL (redis://host:6379/0) se usa Redis, compartido también entre instancias
+# (requiere el paquete redis)
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+            'TIMEOUT': 300,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_DIR', str(BASE_DIR / 'cache' / 'django')),
+            'TIMEOUT': 300,
+            'OPTIONS': {
+                'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRADAS', '10000')),
+            },
+        }
+    }
+
+# Sesiones leídas desde la caché (y guardadas también en la base, por si la caché se pierde)
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# El usuario de la sesión se lee desde la caché; se invalida al guardarlo o eliminarlo
+# (usuarios/signals.py)
+AUTHENTICATION_BACKENDS = ['usuarios.backends.CachedModelBackend']
+USUARIOS_CACHE_TTL = int(os.environ.get('USUARIOS_CACHE_TTL', '3600'))  # segundos
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -142,7 +199,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # En producción (Render), usar SMTP si hay variables de entorno configuradas
 # En desarrollo, usar consola por defecto
 if os.environ.get('EMAIL_HOST_USER') and os.environ.get('EMAIL_HOST_PASSWORD'):
-    EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+    EMAIL_BACKEND = 'sistema_educativo.metricas.SMTPEmailBackend'  # SMTP de Django con métricas
     EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
     EMAIL_PORT = int(os.environ.get('EMAIL_PORT', '587'))
     EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True') == 'True'
@@ -154,6 +211,111 @@ else:
     EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
     DEFAULT_FROM_EMAIL = 'noreply@sistemaeducativo.com'
 
+# ============================================
+# COLA DE TAREAS EN SEGUNDO PLANO
+# ============================================
+# Los PDFs y correos se procesan con: python manage.py procesar_tareas
+# TAREAS_EN_LINEA=True las ejecuta dentro del request (desarrollo sin worker)
+TAREAS_EN_LINEA = os.environ.get('TAREAS_EN_LINEA', 'False') == 'True'
+TAREAS_MAX_INTENTOS = int(os.environ.get('TAREAS_MAX_INTENTOS', '5'))
+TAREAS_REINTENTO_BASE = int(os.environ.get('TAREAS_REINTENTO_BASE', '30'))  # segundos
+TAREAS_REINTENTO_MAXIMO = int(os.environ.get('TAREAS_REINTENTO_MAXIMO', '3600'))  # segundos
+TAREAS_TIEMPO_MAXIMO = int(os.environ.get('TAREAS_TIEMPO_MAXIMO', '600'))  # segundos sin latido antes de liberarla
+TAREAS_LATIDO = int(os.environ.get('TAREAS_LATIDO', '60'))  # segundos entre renovaciones de una tarea en proceso
+
+# Alumnos por página en el dashboard
+ALUMNOS_POR_PAGINA = int(os.environ.get('ALUMNOS_POR_PAGINA', '50'))
+
+# Segundos que se conserva cacheada cada página de la tabla del dashboard
+ALUMNOS_TABLA_CACHE_TIMEOUT = int(os.environ.get('ALUMNOS_TABLA_CACHE_TIMEOUT', '600'))
+
+# Filas insertadas por cada bulk_create al importar alumnos desde CSV
+ALUMNOS_IMPORTACION_LOTE = int(os.environ.get('ALUMNOS_IMPORTACION_LOTE', '500'))
+
+# Filas leídas de la base (y enviadas al cliente) por vez al exportar alumnos a CSV
+ALUMNOS_EXPORTACION_LOTE = int(os.environ.get('ALUMNOS_EXPORTACION_LOTE', '2000'))
+
+# Cantidad de correos enviados por cada conexión SMTP en los envíos masivos
+ALUMNOS_ENVIO_LOTE = int(os.environ.get('ALUMNOS_ENVIO_LOTE', '50'))
+
+# Caché en disco de las fichas PDF de los alumnos
+PDF_CACHE_DIR = os.environ.get('PDF_CACHE_DIR', str(BASE_DIR / 'cache' / 'pdfs'))
+PDF_CACHE_MAX_BYTES = int(os.environ.get('PDF_CACHE_MAX_MB', '100')) * 1024 * 1024
+PDF_CACHE_CONTROL_CADA = int(os.environ.get('PDF_CACHE_CONTROL_CADA', '100'))  # escrituras entre controles de tamaño
+
+# Procesos usados para renderizar lotes de fichas PDF (por defecto, uno por núcleo)
+PDF_PROCESOS = int(os.environ.get('PDF_PROCESOS', os.cpu_count() or 1))
+# Lotes más chicos se renderizan en el mismo proceso: repartirlos cuesta más de lo que ahorra
+PDF_MINIMO_PARALELO = int(os.environ.get('PDF_MINIMO_PARALELO', '20'))
+
+# ============================================
+# SCRAPING DE WIKIPEDIA
+# ============================================
+WIKIPEDIA_URL = os.environ.get('WIKIPEDIA_URL', 'https://es.wikipedia.org/wiki/')
+WIKIPEDIA_API_URL = os.environ.get('WIKIPEDIA_API_URL', 'https://es.wikipedia.org/w/api.php')
+# De dónde se obtiene el contenido, en orden: si una fuente falla se usa la siguiente.
+# FuenteApi pide solo la introducción en JSON; FuenteHtml descarga y procesa la página completa
+SCRAPING_FUENTES = os.environ.get(
+    'SCRAPING_FUENTES', 'scraping.fuentes.FuenteApi,scraping.fuentes.FuenteHtml'
+).split(',')
+SCRAPING_TIMEOUT = int(os.environ.get('SCRAPING_TIMEOUT', '10'))  # segundos
+SCRAPING_REINTENTOS = int(os.environ.get('SCRAPING_REINTENTOS', '2'))
+SCRAPING_CONEXIONES = int(os.environ.get('SCRAPING_CONEXIONES', '10'))  # conexiones keep-alive por host
+SCRAPING_CONEXIONES_ASYNC = int(os.environ.get('SCRAPING_CONEXIONES_ASYNC', '200'))  # descargas simultáneas (vista async)
+# Las búsquedas simultáneas de la misma palabra comparten una descarga dentro de cada proceso.
+# SCRAPING_BLOQUEO_COMPARTIDO=True lo extiende entre procesos. Con Redis (REDIS_URL), Memcached
+# o la base como CACHES el bloqueo es cache.add, atómico y válido entre máquinas; con la caché en
+# archivos (donde add no es atómico) es un archivo creado con O_EXCL en SCRAPING_BLOQUEO_DIR,
+# válido entre los workers de la misma máquina
+SCRAPING_BLOQUEO_COMPARTIDO = os.environ.get('SCRAPING_BLOQUEO_COMPARTIDO', 'False') == 'True'
+SCRAPING_BLOQUEO_DIR = os.environ.get('SCRAPING_BLOQUEO_DIR', str(BASE_DIR / 'cache' / 'bloqueos'))
+# Búsqueda de varias palabras clave a la vez
+SCRAPING_MAX_PALABRAS = int(os.environ.get('SCRAPING_MAX_PALABRAS', '20'))
+SCRAPING_HILOS = int(os.environ.get('SCRAPING_HILOS', '8'))
+SCRAPING_TIMEOUT_TOTAL = int(os.environ.get('SCRAPING_TIMEOUT_TOTAL', '15'))  # segundos para todas las palabras
+# Caché persistente de artículos: vigencia antes de revalidar y cantidad máxima (LRU)
+SCRAPING_CACHE_TTL = int(os.environ.get('SCRAPING_CACHE_TTL', '21600'))  # segundos
+SCRAPING_CACHE_MAX_ENTRADAS = int(os.environ.get('SCRAPING_CACHE_MAX_ENTRADAS', '2000'))
+# Resultados mostrados (se envían por correo a partir de su id): se eliminan pasados N días
+SCRAPING_RESULTADOS_DIAS = int(os.environ.get('SCRAPING_RESULTADOS_DIAS', '7'))
+# Contador de búsquedas por palabra: se vuelca a la base cada tantas búsquedas o segundos
+SCRAPING_POPULARIDAD_LOTE = int(os.environ.get('SCRAPING_POPULARIDAD_LOTE', '50'))
+SCRAPING_POPULARIDAD_INTERVALO = int(os.environ.get('SCRAPING_POPULARIDAD_INTERVALO', '60'))
+# Autocompletado: índice en memoria de las palabras encontradas (si no, consulta a la base)
+SCRAPING_SUGERENCIAS_EN_MEMORIA = os.environ.get('SCRAPING_SUGERENCIAS_EN_MEMORIA', 'True') == 'True'
+SCRAPING_SUGERENCIAS_MAX = int(os.environ.get('SCRAPING_SUGERENCIAS_MAX', '50000'))
+SCRAPING_SUGERENCIAS_RECARGA = int(os.environ.get('SCRAPING_SUGERENCIAS_RECARGA', '300'))  # segundos
+SCRAPING_SUGERENCIAS_LIMITE = int(os.environ.get('SCRAPING_SUGERENCIAS_LIMITE', '8'))
+
+# ============================================
+# MÉTRICAS POR PETICIÓN
+# ============================================
+# Cabecera Server-Timing con total, SQL, plantillas, HTTP y SMTP (sistema_educativo/middleware.py).
+# La ve cualquiera que haga la petición: por defecto solo en desarrollo
+METRICAS_SERVER_TIMING = os.environ.get('METRICAS_SERVER_TIMING', str(DEBUG)) == 'True'
+# Fracción de peticiones medidas (0 = ninguna, 1 = todas)
+METRICAS_MUESTREO = float(os.environ.get('METRICAS_MUESTREO', '1'))
+# Las peticiones medidas que tardan más que esto se registran como JSON en 'sistema_educativo.lentas'
+METRICAS_UMBRAL_LENTO = float(os.environ.get('METRICAS_UMBRAL_LENTO', '1000'))  # ms
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'format': '%(message)s'},
+        'supervisor': {'format': '[%(asctime)s] [%(process)d] [%(levelname)s] %(message)s'},
+    },
+    'handlers': {
+        'lentas': {'class': 'logging.StreamHandler', 'formatter': 'json'},
+        'supervisor': {'class': 'logging.StreamHandler', 'formatter': 'supervisor'},
+    },
+    'loggers': {
+        'sistema_educativo.lentas': {'handlers': ['lentas'], 'level': 'WARNING', 'propagate': False},
+        # manage.py supervisar corre fuera de gunicorn: sus avisos van a la misma salida
+        'sistema_educativo.supervisor': {'handlers': ['supervisor'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
 # URL de login
 LOGIN_URL = '/usuarios/login/'
 LOGIN_REDIRECT_URL = '/alumnos/dashboard/'
@@ -0,0 +1,27 @@
+"""Ajustes de SQLite para producción con varios workers escribiendo a la vez"""
+import re
+from django.conf import settings
+
+_VALOR = re.compile(r'^-?\w+$')
+
+
+def pragmas():
+    """Sentencias PRAGMA configuradas en SQLITE_PRAGMAS"""
+    sentencias = []
+    for nombre, valor in settings.SQLITE_PRAGMAS.items():
+        valor = str(valor).strip()
+        if not valor:
+            continue
+        if not _VALOR.match(valor):
+            raise ValueError(f'Valor inválido para PRAGMA {nombre}: {valor!r}')
+        sentencias.append(f'PRAGMA {nombre} = {valor}')
+    return sentencias
+
+
+def configurar_conexion(sender, connection, **kwargs):
+    """Aplica los PRAGMA a cada conexión nueva (señal connection_created)"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for sentencia in pragmas():
+            cursor.execute(sentencia)
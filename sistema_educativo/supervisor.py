@@ -0,0 +1,96 @@
+"""Procesos auxiliares que corren junto a la web: el worker de tareas y calentar_cache
+
+El worker de la cola de tareas tiene que correr en la misma máquina que la web porque
+comparten la base SQLite: un servicio aparte (un "background worker" de Render) tendría su
+propio disco. Con GUNICORN_TAREAS=True el maestro de gunicorn lanza `manage.py supervisar`,
+que mantiene corriendo procesar_tareas y, si termina por cualquier motivo, lo vuelve a lanzar
+(esperando cada vez más si muere enseguida). Al apagar gunicorn se le envía SIGTERM y este
+hace lo mismo con sus procesos, para que terminen la tarea en curso.
+
+Lo mismo vale para calentar_cache, pero como trabajo periódico: con GUNICORN_CALENTAR_CADA
+se lo lanza para una sola pasada cada tantos segundos, así no ocupa memoria entre una pasada
+y la siguiente.
+
+El Supervisor no corre dentro del maestro de gunicorn: el árbitro recoge a sus hijos con
+waitpid(-1) y podría quedarse con el código de salida de un proceso antes que wait(), que
+vería 0 y no aplicaría el backoff. En su propio proceso nadie más espera a sus hijos.
+"""
+import logging
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+MANAGE_PY = Path(__file__).resolve().parent.parent / 'manage.py'
+
+logger = logging.getLogger(__name__)
+
+
+class Supervisor:
+
+    def __init__(self):
+        self._procesos = {}
+        self._lock = threading.Lock()
+        self._detenido = threading.Event()
+
+    def mantener(self, *comando, espera_minima=1, espera_maxima=60):
+        """Mantiene corriendo `manage.py <comando>`: si termina se lo vuelve a lanzar"""
+        nombre = ' '.join(comando)
+
+        def vigilar():
+            espera = espera_minima
+            while not self._detenido.is_set():
+                inicio = time.monotonic()
+                codigo = self._ejecutar(nombre, comando)
+                if codigo is None or self._detenido.is_set():
+                    return
+                # Si vivió un buen rato se relanza enseguida; si muere al arrancar, con backoff
+                if time.monotonic() - inicio > espera_maxima:
+                    espera = espera_minima
+                logger.warning('%s terminó con código %s; se relanza en %ss', nombre, codigo, espera)
+                self._detenido.wait(espera)
+                espera = min(espera * 2, espera_maxima)
+
+        threading.Thread(target=vigilar, name=f'supervisor {nombre}', daemon=True).start()
+
+    def cada(self, intervalo, *comando):
+        """Lanza `manage.py <comando>` cada `intervalo` segundos, sin superponer ejecuciones"""
+        nombre = ' '.join(comando)
+
+        def programar():
+            while not self._detenido.wait(intervalo):
+                codigo = self._ejecutar(nombre, comando)
+                if codigo is None or self._detenido.is_set():
+                    return
+                if codigo:
+                    logger.warning('%s terminó con código %s; se reintenta en %ss', nombre, codigo, intervalo)
+
+        threading.Thread(target=programar, name=f'supervisor {nombre}', daemon=True).start()
+
+    def detener(self, tiempo_maximo=30):
+        """Pide a los procesos que terminen (SIGTERM) y los mata si no lo hacen a tiempo"""
+        with self._lock:
+            self._detenido.set()
+            procesos = list(self._procesos.values())
+        for proceso in procesos:
+            proceso.terminate()
+        limite = time.monotonic() + tiempo_maximo
+        for proceso in procesos:
+            try:
+                proceso.wait(max(0, limite - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                proceso.kill()
+
+    def _ejecutar(self, nombre, comando):
+        """Corre el comando hasta que termine; None si el supervisor ya se estaba deteniendo"""
+        with self._lock:
+            if self._detenido.is_set():
+                return None
+            proceso = subprocess.Popen([sys.executable, str(MANAGE_PY), *comando], cwd=MANAGE_PY.parent)
+            self._procesos[nombre] = proceso
+        logger.info('%s iniciado (pid %s)', nombre, proceso.pid)
+        codigo = proceso.wait()
+        with self._lock:
+            self._procesos.pop(nombre, None)
+        return codigo
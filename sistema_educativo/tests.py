@@ -0,0 +1,208 @@
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from alumnos.models import Alumno
+from scraping.stub import iniciar_stub
+from .bench import medir_vistas, sembrar
+from .supervisor import Supervisor
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    TAREAS_EN_LINEA=True,
+)
+class BenchTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.servidor = iniciar_stub(latencia=0)
+        cls.addClassCleanup(cls.servidor.shutdown)
+
+    def test_siembra_reproducible(self):
+        docentes = sembrar(2, 30, semilla=7)
+        self.assertEqual(Alumno.objects.filter(usuario__in=docentes).count(), 60)
+        primeros = list(Alumno.objects.order_by('id').values_list('nombre', 'apellido', 'email')[:5])
+
+        Alumno.objects.all().delete()
+        for docente in docentes:
+            docente.delete()
+        sembrar(2, 30, semilla=7)
+        self.assertEqual(list(Alumno.objects.order_by('id').values_list('nombre', 'apellido', 'email')[:5]), primeros)
+
+    def test_mide_todas_las_vistas_sin_errores(self):
+        docentes = sembrar(2, 30)
+        pdfs = self.enterContext(tempfile.TemporaryDirectory())
+        with override_settings(PDF_CACHE_DIR=pdfs, WIKIPEDIA_URL=self.servidor.url_wiki,
+                               WIKIPEDIA_API_URL=self.servidor.url_api):
+            resultados = medir_vistas(docentes, iteraciones=3)
+
+        self.assertEqual(
+            set(resultados),
+            {'dashboard', 'dashboard_busqueda', 'crear_alumno', 'enviar_pdf_alumno', 'buscar_contenido'},
+        )
+        for vista, estadisticas in resultados.items():
+            self.assertEqual(estadisticas['errores'], 0, vista)
+            self.assertLessEqual(estadisticas['p50_ms'], estadisticas['p99_ms'], vista)
+        # crear_alumno y enviar_pdf_alumno mandan el PDF dentro del request (TAREAS_EN_LINEA)
+        self.assertEqual(len(mail.outbox), 6)
+
+
+
+class SupervisorTests(SimpleTestCase):
+    """manage.py supervisar: relanzar con backoff según el código de salida real"""
+
+    def test_relanza_con_backoff_y_el_codigo_de_salida(self):
+        # Un "manage.py" que termina enseguida con código 3
+        script = Path(self.enterContext(tempfile.TemporaryDirectory())) / 'manage.py'
+        script.write_text('import sys\nsys.exit(3)\n')
+        self.enterContext(mock.patch('sistema_educativo.supervisor.MANAGE_PY', script))
+
+        supervisor = Supervisor()
+        with self.assertLogs('sistema_educativo.supervisor', 'WARNING') as registro:
+            supervisor.mantener('procesar_tareas', espera_minima=0.1, espera_maxima=1)
+            limite = time.monotonic() + 10
+            while len(registro.output) < 3 and time.monotonic() < limite:
+                time.sleep(0.05)
+            supervisor.detener(5)
+
+        self.assertIn('procesar_tareas terminó con código 3; se relanza en 0.1s', registro.output[0])
+        self.assertIn('se relanza en 0.2s', registro.output[1])
+        self.assertIn('se relanza en 0.4s', registro.output[2])
+
+
+class SqliteTests(SimpleTestCase):
+    """Cada conexión nueva a un archivo SQLite sale con los PRAGMA y BEGIN IMMEDIATE"""
+
+    def setUp(self):
+        # La base de los tests está en memoria (sin WAL): se abre otra, con la misma
+        # configuración, sobre un archivo
+        self.archivo = str(Path(self.enterContext(tempfile.TemporaryDirectory())) / 'prueba.sqlite3')
+        base = connections[DEFAULT_DB_ALIAS]
+        self.conexion = type(base)({**base.settings_dict, 'NAME': self.archivo}, alias='prueba')
+        self.addCleanup(self.conexion.close)
+
+    def test_pragmas_en_la_conexion_nueva(self):
+        with self.conexion.cursor() as cursor:
+            valores = {}
+            for pragma in ('journal_mode', 'busy_timeout', 'synchronous', 'cache_size'):
+                cursor.execute(f'PRAGMA {pragma}')
+                valores[pragma] = cursor.fetchone()[0]
+        # Los valores por defecto de SQLITE_PRAGMAS (synchronous 1 = NORMAL)
+        self.assertEqual(valores, {'journal_mode': 'wal', 'busy_timeout': 5000, 'synchronous': 1,
+                                   'cache_size': -20000})
+
+    def test_transacciones_immediate(self):
+        otra = sqlite3.connect(self.archivo, timeout=0, isolation_level=None)
+        self.addCleanup(otra.close)
+
+        with mock.patch('django.db.transaction.get_connection', return_value=self.conexion), transaction.atomic():
+            # Sin haber escrito nada ya tiene el bloqueo de escritura: otro escritor no entra
+            with self.assertRaisesRegex(sqlite3.OperationalError, 'locked'):
+                otra.execute('BEGIN IMMEDIATE')
+        otra.execute('BEGIN IMMEDIATE')
+        otra.execute('ROLLBACK')
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    METRICAS_MUESTREO=1,
+    METRICAS_UMBRAL_LENTO=60_000,
+)
+class InstrumentacionTests(TestCase):
+    """Cabecera Server-Timing y registro JSON de las peticiones lentas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.docente = User.objects.create_user('docente', 'docente@example.com')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.docente)
+
+    @override_settings(METRICAS_SERVER_TIMING=True)
+    def test_server_timing(self):
+        response = self.client.get(reverse('dashboard'))
+        partes = dict(parte.split(';', 1) for parte in response['Server-Timing'].split(', '))
+        self.assertRegex(partes['total'], r'^dur=\d+\.\d$')
+        self.assertRegex(partes['sql'], r'^dur=\d+\.\d;desc="[1-9]\d*"$')
+
+    @override_settings(METRICAS_SERVER_TIMING=False)
+    def test_sin_server_timing(self):
+        self.client.logout()
+        response = self.client.get(reverse('login'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(METRICAS_UMBRAL_LENTO=0)
+    def test_peticion_lenta_en_json(self):
+        with self.assertLogs('sistema_educativo.lentas', 'WARNING') as registro:
+            self.client.get(reverse('dashboard'), {'q': 'ana'})
+        lenta = json.loads(registro.records[0].getMessage())
+        self.assertEqual(
+            {clave: lenta[clave] for clave in ('metodo', 'ruta', 'vista', 'estado', 'usuario')},
+            {'metodo': 'GET', 'ruta': reverse('dashboard'), 'vista': 'dashboard', 'estado': 200,
+             'usuario': self.docente.pk},
+        )
+        self.assertGreater(lenta['total_ms'], 0)
+        self.assertGreater(lenta['sql']['cantidad'], 0)
+
+    @override_settings(METRICAS_UMBRAL_LENTO=0)
+    async def test_peticion_lenta_async(self):
+        await self.async_client.aforce_login(self.docente)
+        with self.assertLogs('sistema_educativo.lentas', 'WARNING') as registro:
+            await self.async_client.get(reverse('buscar_contenido_async'))
+        lenta = json.loads(registro.records[0].getMessage())
+        self.assertEqual((lenta['vista'], lenta['usuario']), ('buscar_contenido_async', self.docente.pk))
+
+    def test_peticion_rapida_sin_registro(self):
+        with self.assertNoLogs('sistema_educativo.lentas'):
+            self.client.get(reverse('dashboard'))
+
+    @override_settings(METRICAS_MUESTREO=0, METRICAS_SERVER_TIMING=True, METRICAS_UMBRAL_LENTO=0)
+    def test_fuera_del_muestreo(self):
+        with self.assertNoLogs('sistema_educativo.lentas'):
+            response = self.client.get(reverse('dashboard'))
+        self.assertNotIn('Server-Timing', response)
+
+
+# Se ejecuta en un intérprete nuevo: en el de los tests ya se importó de todo
+_IMPORTADOS_AL_ARRANCAR = r'''
+import json, sys
+import django
+django.setup()
+import sistema_educativo.asgi, sistema_educativo.wsgi
+from django.urls import get_resolver, resolve, reverse
+get_resolver().url_patterns
+for nombre in ('dashboard', 'exportar_pdfs', 'buscar_contenido', 'buscar_contenido_async', 'lista_tareas'):
+    resolve(reverse(nombre))
+print(json.dumps(sorted(modulo for modulo in json.loads(sys.argv[1]) if modulo in sys.modules)))
+'''
+
+
+class ArranqueTests(SimpleTestCase):
+    """Las dependencias pesadas se importan recién cuando una vista las usa"""
+
+    PESADAS = ['bs4', 'httpx', 'reportlab', 'requests']
+
+    def test_arranque_sin_dependencias_pesadas(self):
+        resultado = subprocess.run(
+            [sys.executable, '-c', _IMPORTADOS_AL_ARRANCAR, json.dumps(self.PESADAS)],
+            cwd=Path(__file__).resolve().parent.parent, capture_output=True, text=True, timeout=60,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'sistema_educativo.settings'},
+        )
+        self.assertEqual(resultado.returncode, 0, resultado.stderr)
+        self.assertEqual(json.loads(resultado.stdout), [])
@@ -27,4 +27,5 @@ urlpatterns = [
     path('usuarios/', include('usuarios.urls')),
     path('alumnos/', include('alumnos.urls')),
     path('scraping/', include('scraping.urls')),
+    path('tareas/', include('tareas.urls')),
 ]
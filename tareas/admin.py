@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import Tarea
+
+@admin.register(Tarea)
+class TareaAdmin(admin.ModelAdmin):
+    list_display = ['id', 'descripcion', 'estado', 'intentos', 'usuario', 'ejecutar_despues', 'fecha_creacion']
+    list_filter = ['estado', 'funcion']
+    search_fields = ['descripcion']
+    readonly_fields = ['fecha_creacion', 'fecha_actualizacion']
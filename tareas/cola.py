@@ -0,0 +1,108 @@
+import random
+import time
+import traceback
+from contextvars import ContextVar
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .models import Tarea
+
+# [pk, momento del último latido] de la tarea que se está ejecutando
+_tarea_actual = ContextVar('tarea_actual', default=None)
+
+
+def encolar(funcion, descripcion, usuario=None, max_intentos=None, **argumentos):
+    """Encola la función (ruta importable) con argumentos serializables en JSON"""
+    tarea = Tarea.objects.create(
+        descripcion=descripcion[:200],
+        funcion=funcion,
+        argumentos=argumentos,
+        usuario=usuario,
+        max_intentos=max_intentos or settings.TAREAS_MAX_INTENTOS,
+    )
+
+    # Sin worker (desarrollo): se ejecuta en el mismo request
+    if settings.TAREAS_EN_LINEA and reclamar(tarea.pk):
+        tarea.refresh_from_db()
+        ejecutar(tarea)
+    return tarea
+
+
+def reclamar(pk):
+    """Marca la tarea como en proceso; devuelve False si otro worker la tomó antes"""
+    return Tarea.objects.filter(pk=pk, estado=Tarea.PENDIENTE).update(
+        estado=Tarea.EN_PROCESO,
+        intentos=F('intentos') + 1,
+        fecha_actualizacion=timezone.now(),
+    ) == 1
+
+
+def reclamar_siguiente():
+    """Reclama la próxima tarea pendiente cuyo momento de ejecución ya llegó"""
+    candidatas = Tarea.objects.filter(
+        estado=Tarea.PENDIENTE,
+        ejecutar_despues__lte=timezone.now(),
+    ).order_by('ejecutar_despues', 'pk').values_list('pk', flat=True)[:10]
+
+    for pk in candidatas:
+        if reclamar(pk):
+            return Tarea.objects.get(pk=pk)
+    return None
+
+
+def espera_reintento(intentos):
+    """Backoff exponencial con algo de azar para no reintentar todas juntas"""
+    espera = min(settings.TAREAS_REINTENTO_BASE * 2 ** (intentos - 1), settings.TAREAS_REINTENTO_MAXIMO)
+    return timedelta(seconds=espera * random.uniform(1, 1.2))
+
+
+def ejecutar(tarea):
+    """Ejecuta una tarea ya reclamada y registra el resultado o el error"""
+    token = _tarea_actual.set([tarea.pk, time.monotonic()])
+    try:
+        funcion = import_string(tarea.funcion)
+        resultado = funcion(**tarea.argumentos)
+    except Exception as e:
+        tarea.ultimo_error = f'{type(e).__name__}: {e}\n\n{traceback.format_exc()}'
+        if tarea.intentos >= tarea.max_intentos:
+            tarea.estado = Tarea.FALLIDA
+        else:
+            tarea.estado = Tarea.PENDIENTE
+            tarea.ejecutar_despues = timezone.now() + espera_reintento(tarea.intentos)
+    else:
+        tarea.estado = Tarea.COMPLETADA
+        tarea.resultado = resultado
+        tarea.ultimo_error = ''
+    finally:
+        _tarea_actual.reset(token)
+
+    tarea.save(update_fields=['estado', 'resultado', 'ultimo_error', 'ejecutar_despues', 'fecha_actualizacion'])
+    return tarea
+
+
+def latido():
+    """Renueva la tarea en curso para que liberar_colgadas no la dé por abandonada
+
+    Las tareas largas la llaman en cada vuelta de su ciclo; escribe en la base como mucho
+    una vez cada TAREAS_LATIDO segundos. Fuera de una tarea no hace nada.
+    """
+    actual = _tarea_actual.get()
+    if actual is None or time.monotonic() - actual[1] < settings.TAREAS_LATIDO:
+        return
+    actual[1] = time.monotonic()
+    Tarea.objects.filter(pk=actual[0], estado=Tarea.EN_PROCESO).update(fecha_actualizacion=timezone.now())
+
+
+def liberar_colgadas():
+    """Devuelve a pendientes las tareas de un worker que murió a mitad de camino
+
+    Una tarea en proceso renueva fecha_actualizacion con latido(); si pasaron más de
+    TAREAS_TIEMPO_MAXIMO segundos sin noticias, el worker que la tenía ya no existe.
+    """
+    limite = timezone.now() - timedelta(seconds=settings.TAREAS_TIEMPO_MAXIMO)
+    return Tarea.objects.filter(estado=Tarea.EN_PROCESO, fecha_actualizacion__lt=limite).update(
+        estado=Tarea.PENDIENTE,
+        ejecutar_despues=timezone.now(),
+    )
@@ -0,0 +1,65 @@
+import signal
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from tareas import cola
+from tareas.models import Tarea
+
+
+class Command(BaseCommand):
+    help = 'Procesa la cola de tareas en segundo plano (PDFs y correos)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--una-vez', action='store_true',
+                            help='Procesa las tareas pendientes y termina en lugar de quedar esperando')
+        parser.add_argument('--intervalo', type=float, default=2.0,
+                            help='Segundos de espera cuando no hay tareas pendientes (default: 2)')
+        parser.add_argument('--max-tareas', type=int, default=0,
+                            help='Termina después de procesar esta cantidad de tareas (0 = sin límite)')
+
+    def handle(self, *args, **options):
+        self.detener = False
+        signal.signal(signal.SIGTERM, self._detener)
+        signal.signal(signal.SIGINT, self._detener)
+
+        procesadas = 0
+        proximo_control = 0
+        while not self.detener:
+            close_old_connections()
+            # Las tareas en proceso renuevan su latido: solo se liberan las de un worker que murió
+            if time.monotonic() >= proximo_control:
+                liberadas = cola.liberar_colgadas()
+                if liberadas:
+                    self.stdout.write(self.style.WARNING(f'{liberadas} tarea(s) colgada(s) vuelven a la cola'))
+                proximo_control = time.monotonic() + settings.TAREAS_LATIDO
+
+            tarea = cola.reclamar_siguiente()
+            if tarea is None:
+                if options['una_vez']:
+                    break
+                time.sleep(options['intervalo'])
+                continue
+
+            inicio = time.monotonic()
+            cola.ejecutar(tarea)
+            duracion = time.monotonic() - inicio
+            procesadas += 1
+
+            if tarea.estado == Tarea.COMPLETADA:
+                self.stdout.write(self.style.SUCCESS(f'✅ {tarea} en {duracion:.2f}s'))
+            elif tarea.estado == Tarea.PENDIENTE:
+                self.stdout.write(self.style.WARNING(
+                    f'↻ {tarea}: intento {tarea.intentos}/{tarea.max_intentos} falló, '
+                    f'se reintenta a las {tarea.ejecutar_despues:%H:%M:%S}'))
+            else:
+                self.stdout.write(self.style.ERROR(f'❌ {tarea}: {tarea.ultimo_error.splitlines()[0]}'))
+
+            if options['max_tareas'] and procesadas >= options['max_tareas']:
+                break
+
+        self.stdout.write(f'Worker detenido. Tareas procesadas: {procesadas}')
+
+    def _detener(self, signum, frame):
+        # Se termina la tarea en curso antes de salir
+        self.detener = True
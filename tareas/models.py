@@ -0,0 +1,44 @@
+from django.db import models
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+class Tarea(models.Model):
+    """Tarea en segundo plano procesada por `python manage.py procesar_tareas`"""
+    PENDIENTE = 'pendiente'
+    EN_PROCESO = 'en_proceso'
+    COMPLETADA = 'completada'
+    FALLIDA = 'fallida'
+    ESTADOS = [
+        (PENDIENTE, 'Pendiente'),
+        (EN_PROCESO, 'En proceso'),
+        (COMPLETADA, 'Completada'),
+        (FALLIDA, 'Fallida'),
+    ]
+
+    descripcion = models.CharField(max_length=200, verbose_name='Descripción')
+    funcion = models.CharField(max_length=200, verbose_name='Función')
+    argumentos = models.JSONField(default=dict, blank=True, verbose_name='Argumentos')
+    estado = models.CharField(max_length=20, choices=ESTADOS, default=PENDIENTE, verbose_name='Estado')
+    intentos = models.PositiveIntegerField(default=0, verbose_name='Intentos')
+    max_intentos = models.PositiveIntegerField(default=5, verbose_name='Máximo de Intentos')
+    ejecutar_despues = models.DateTimeField(default=timezone.now, verbose_name='Ejecutar Después de')
+    resultado = models.JSONField(null=True, blank=True, verbose_name='Resultado')
+    ultimo_error = models.TextField(blank=True, verbose_name='Último Error')
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, verbose_name='Usuario')
+    fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')
+    fecha_actualizacion = models.DateTimeField(auto_now=True, verbose_name='Fecha de Actualización')
+
+    class Meta:
+        verbose_name = 'Tarea'
+        verbose_name_plural = 'Tareas'
+        ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['estado', 'ejecutar_despues'], name='tarea_estado_ejecutar_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.descripcion} ({self.get_estado_display()})"
+
+    @property
+    def terminada(self):
+        return self.estado in (self.COMPLETADA, self.FALLIDA)
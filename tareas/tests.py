@@ -0,0 +1,123 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from . import cola
+from .models import Tarea
+
+
+# Funciones que encolan los tests (se importan por su ruta, como las tareas reales)
+def tarea_ok(valor):
+    return {'valor': valor}
+
+
+def tarea_falla():
+    raise ConnectionError('SMTP caído')
+
+
+def tarea_larga():
+    # Mientras la tarea avisa que sigue viva, otro worker no la libera
+    cola.latido()
+    return {'liberadas': cola.liberar_colgadas()}
+
+
+@override_settings(TAREAS_EN_LINEA=False, TAREAS_REINTENTO_BASE=30, TAREAS_REINTENTO_MAXIMO=3600)
+class ColaTests(TestCase):
+
+    def _encolar(self, funcion, max_intentos=3, **argumentos):
+        return cola.encolar(f'tareas.tests.{funcion}', funcion, max_intentos=max_intentos, **argumentos)
+
+    def _antiguedad(self, tarea, segundos):
+        # update() no pasa por auto_now
+        Tarea.objects.filter(pk=tarea.pk).update(fecha_actualizacion=timezone.now() - timedelta(seconds=segundos))
+
+    def test_reclamar_es_atomico(self):
+        tarea = self._encolar('tarea_ok', valor=1)
+        self.assertTrue(cola.reclamar(tarea.pk))
+        # Un segundo worker que vio la misma tarea pendiente no la obtiene
+        self.assertFalse(cola.reclamar(tarea.pk))
+        tarea.refresh_from_db()
+        self.assertEqual((tarea.estado, tarea.intentos), (Tarea.EN_PROCESO, 1))
+
+    def test_reclamar_siguiente_respeta_el_orden_y_la_espera(self):
+        primera = self._encolar('tarea_ok', valor=1)
+        segunda = self._encolar('tarea_ok', valor=2)
+        futura = self._encolar('tarea_ok', valor=3)
+        Tarea.objects.filter(pk=futura.pk).update(ejecutar_despues=timezone.now() + timedelta(hours=1))
+
+        self.assertEqual(cola.reclamar_siguiente().pk, primera.pk)
+        self.assertEqual(cola.reclamar_siguiente().pk, segunda.pk)
+        self.assertIsNone(cola.reclamar_siguiente())
+
+    def test_ejecutar_completa(self):
+        tarea = self._encolar('tarea_ok', valor=7)
+        tarea = cola.ejecutar(cola.reclamar_siguiente())
+        self.assertEqual(tarea.estado, Tarea.COMPLETADA)
+        self.assertEqual(Tarea.objects.get(pk=tarea.pk).resultado, {'valor': 7})
+
+    def test_reintento_con_backoff(self):
+        self._encolar('tarea_falla')
+        antes = timezone.now()
+        tarea = cola.ejecutar(cola.reclamar_siguiente())
+        self.assertEqual(tarea.estado, Tarea.PENDIENTE)
+        self.assertIn('ConnectionError: SMTP caído', tarea.ultimo_error)
+        # Primer reintento: entre 30 y 36 segundos (base con hasta 20% de azar)
+        self.assertGreaterEqual(tarea.ejecutar_despues, antes + timedelta(seconds=30))
+        self.assertLessEqual(tarea.ejecutar_despues, timezone.now() + timedelta(seconds=36))
+        # Todavía no es su momento
+        self.assertIsNone(cola.reclamar_siguiente())
+
+        self.assertEqual(cola.espera_reintento(2).total_seconds() // 60, 1)
+        self.assertLessEqual(cola.espera_reintento(20).total_seconds(), 3600 * 1.2)
+
+    def test_fallida_al_agotar_los_intentos(self):
+        tarea = self._encolar('tarea_falla', max_intentos=2)
+        for _ in range(2):
+            Tarea.objects.filter(pk=tarea.pk).update(ejecutar_despues=timezone.now())
+            tarea = cola.ejecutar(cola.reclamar_siguiente())
+        self.assertEqual((tarea.estado, tarea.intentos), (Tarea.FALLIDA, 2))
+        self.assertIsNone(cola.reclamar_siguiente())
+
+    @override_settings(TAREAS_TIEMPO_MAXIMO=600)
+    def test_liberar_colgadas(self):
+        abandonada = self._encolar('tarea_ok', valor=1)
+        activa = self._encolar('tarea_ok', valor=2)
+        cola.reclamar(abandonada.pk)
+        cola.reclamar(activa.pk)
+        self._antiguedad(abandonada, 601)
+        self._antiguedad(activa, 30)
+
+        self.assertEqual(cola.liberar_colgadas(), 1)
+        self.assertEqual(Tarea.objects.get(pk=abandonada.pk).estado, Tarea.PENDIENTE)
+        self.assertEqual(Tarea.objects.get(pk=activa.pk).estado, Tarea.EN_PROCESO)
+
+    @override_settings(TAREAS_TIEMPO_MAXIMO=600, TAREAS_LATIDO=0)
+    def test_latido_evita_liberar_una_tarea_larga(self):
+        self._encolar('tarea_larga')
+        tarea = cola.reclamar_siguiente()
+        # La tarea lleva más que TAREAS_TIEMPO_MAXIMO corriendo, pero renueva su latido
+        self._antiguedad(tarea, 3600)
+        tarea = cola.ejecutar(tarea)
+        self.assertEqual(tarea.estado, Tarea.COMPLETADA)
+        self.assertEqual(tarea.resultado, {'liberadas': 0})
+
+    def test_latido_fuera_de_una_tarea(self):
+        with self.assertNumQueries(0):
+            cola.latido()
+
+    @override_settings(TAREAS_EN_LINEA=True)
+    def test_en_linea(self):
+        tarea = self._encolar('tarea_ok', valor=3)
+        self.assertEqual((tarea.estado, tarea.resultado), (Tarea.COMPLETADA, {'valor': 3}))
+
+    def test_procesar_tareas_una_vez(self):
+        self._encolar('tarea_ok', valor=1)
+        self._encolar('tarea_falla', max_intentos=1)
+        salida = StringIO()
+        call_command('procesar_tareas', '--una-vez', stdout=salida)
+        self.assertIn('Tareas procesadas: 2', salida.getvalue())
+        self.assertEqual(
+            sorted(Tarea.objects.values_list('estado', flat=True)),
+            [Tarea.COMPLETADA, Tarea.FALLIDA],
+        )
@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.lista_tareas, name='lista_tareas'),
+    path('<int:pk>/', views.estado_tarea, name='estado_tarea'),
+    path('<int:pk>/json/', views.estado_tarea_json, name='estado_tarea_json'),
+]
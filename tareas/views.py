@@ -0,0 +1,34 @@
+from django.shortcuts import render, get_object_or_404
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from .models import Tarea
+
+@login_required
+def lista_tareas(request):
+    """Últimas tareas en segundo plano del usuario"""
+    tareas = Tarea.objects.filter(usuario=request.user)[:50]
+    return render(request, 'tareas/lista.html', {'tareas': tareas})
+
+@login_required
+def estado_tarea(request, pk):
+    """Página de estado de una tarea"""
+    tarea = get_object_or_404(Tarea, pk=pk, usuario=request.user)
+    return render(request, 'tareas/estado.html', {'tarea': tarea})
+
+@login_required
+def estado_tarea_json(request, pk):
+    """Estado de una tarea en JSON (para consultar desde scripts o con polling)"""
+    tarea = get_object_or_404(Tarea, pk=pk, usuario=request.user)
+    return JsonResponse({
+        'id': tarea.pk,
+        'descripcion': tarea.descripcion,
+        'estado': tarea.estado,
+        'terminada': tarea.terminada,
+        'intentos': tarea.intentos,
+        'max_intentos': tarea.max_intentos,
+        'ejecutar_despues': tarea.ejecutar_despues,
+        'resultado': tarea.resultado,
+        'error': tarea.ultimo_error.splitlines()[0] if tarea.ultimo_error else None,
+        'fecha_creacion': tarea.fecha_creacion,
+        'fecha_actualizacion': tarea.fecha_actualizacion,
+    })
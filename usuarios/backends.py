@@ -0,0 +1,35 @@
+"""Backend de autenticación que guarda en la caché el usuario de la sesión
+
+Con las sesiones en caché (cached_db), una petición autenticada no hace ninguna consulta
+para saber quién es el usuario. La entrada se borra cuando el usuario se guarda o se
+elimina (usuarios/signals.py); los cambios hechos con QuerySet.update() no la invalidan
+y se ven recién cuando vence USUARIOS_CACHE_TTL.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+
+def clave_usuario(user_id):
+    return f'usuarios:usuario:{user_id}'
+
+
+class CachedModelBackend(ModelBackend):
+
+    def get_user(self, user_id):
+        usuario = cache.get(clave_usuario(user_id))
+        if usuario is None:
+            usuario = super().get_user(user_id)
+            if usuario is None:
+                return None
+            cache.set(clave_usuario(user_id), usuario, settings.USUARIOS_CACHE_TTL)
+        return usuario if self.user_can_authenticate(usuario) else None
+
+    async def aget_user(self, user_id):
+        usuario = await cache.aget(clave_usuario(user_id))
+        if usuario is None:
+            usuario = await super().aget_user(user_id)
+            if usuario is None:
+                return None
+            await cache.aset(clave_usuario(user_id), usuario, settings.USUARIOS_CACHE_TTL)
+        return usuario if self.user_can_authenticate(usuario) else None
@@ -0,0 +1,12 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .backends import clave_usuario
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidar_usuario_cacheado(sender, instance, **kwargs):
+    """Descarta el usuario cacheado por el backend de autenticación (contraseña, is_active, datos)"""
+    cache.delete(clave_usuario(instance.pk))
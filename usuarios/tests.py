@@ -1,3 +1,83 @@
-from django.test import TestCase
+from importlib import import_module
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth import aget_user, get_user
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from pruebas.presupuestos import PresupuestoMixin
 
-# Create your tests here.
+CACHE_LOCAL = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class UsuarioCacheadoTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_user('docente', 'docente@example.com', 'clave-segura-123')
+        self.client.force_login(self.usuario)
+
+    def _request(self):
+        request = RequestFactory().get('/')
+        request.session = import_module(settings.SESSION_ENGINE).SessionStore(self.client.session.session_key)
+        return request
+
+    def test_peticion_caliente_sin_consultas(self):
+        get_user(self._request())
+        with self.assertNumQueries(0):
+            usuario = get_user(self._request())
+        self.assertEqual(usuario.pk, self.usuario.pk)
+
+    def test_version_asincronica_usa_la_cache(self):
+        get_user(self._request())
+        with self.assertNumQueries(0):
+            usuario = async_to_sync(aget_user)(self._request())
+        self.assertEqual(usuario.pk, self.usuario.pk)
+
+    def test_guardar_el_usuario_invalida_la_cache(self):
+        get_user(self._request())
+        self.usuario.first_name = 'Ana'
+        self.usuario.save()
+        self.assertEqual(get_user(self._request()).first_name, 'Ana')
+
+        self.usuario.is_active = False
+        self.usuario.save()
+        self.assertFalse(get_user(self._request()).is_authenticated)
+
+
+@override_settings(
+    CACHES=CACHE_LOCAL,
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    # El hash real tarda a propósito; acá se mide el resto de la vista
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class PresupuestoUsuariosTests(PresupuestoMixin, TestCase):
+    """Consultas, tamaño y tiempo máximos de cada URL de usuarios/urls.py"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_registro(self):
+        url = reverse('registro')
+        self.assertPresupuesto(lambda: self.client.get(url), consultas=0, kb=30, ms=200, calentar=True)
+        response, _ = self.assertPresupuesto(lambda: self.client.post(url, {
+            'username': 'nueva', 'email': 'nueva@example.com',
+            'password1': 'clave-segura-123', 'password2': 'clave-segura-123',
+        }), consultas=12, ms=300)
+        self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_login_y_logout(self):
+        User.objects.create_user('docente', 'docente@example.com', 'clave-segura-123')
+        url = reverse('login')
+        self.assertPresupuesto(lambda: self.client.get(url), consultas=0, kb=30, ms=200, calentar=True)
+        response, _ = self.assertPresupuesto(
+            lambda: self.client.post(url, {'username': 'docente', 'password': 'clave-segura-123'}),
+            consultas=9, ms=300,
+        )
+        self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
+        # El login guardó last_login (usuario fuera de la caché) y borrar la sesión es SELECT + DELETE
+        self.assertPresupuesto(lambda: self.client.post(reverse('logout')), consultas=3, ms=200)